@@ -51,8 +51,12 @@ const CourseContentForm = ({ courseId, content, onClose, onSuccess }) => {
         title: formData.title,
         description: formData.description,
         content_type: formData.content_type,
-        order: parseInt(formData.order) || 0,
       };
+      // Without a position, new content is added at the end of the course
+      const order = parseInt(formData.order) || 0;
+      if (content || order > 0) {
+        submitData.order = order;
+      }
 
       // Add content-specific fields
       if (formData.content_type === 'video') {
@@ -216,7 +220,7 @@ const CourseContentForm = ({ courseId, content, onClose, onSuccess }) => {
               placeholder="0"
             />
             <small style={styles.helpText}>
-              Lower numbers appear first in the course
+              Lower numbers appear first in the course; leave at 0 to add at the end
             </small>
           </div>
 
@@ -1,9 +1,32 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { apiRequest, getCourseContent, deleteCourseContent, markContentComplete } from '../services/api';
+import {
+  apiRequest,
+  getCourseContent,
+  deleteCourseContent,
+  updateCourseProgress,
+  bulkCreateCourseContent,
+  reorderCourseContent,
+} from '../services/api';
 import { useMediaQuery } from '../hooks/useMediaQuery';
+import { useVideoHeartbeat } from '../hooks/useVideoHeartbeat';
 import CourseContentForm from './CourseContentForm';
-import { convertToYouTubeEmbed } from '../utils/youtube';
+import { convertToYouTubeEmbed, withPlayerApi } from '../utils/youtube';
+
+// Read a lesson import file: a JSON array of contents, or one JSON object per line (NDJSON)
+const parseContentImport = (text) => {
+  try {
+    const data = JSON.parse(text);
+    if (Array.isArray(data)) return data;
+  } catch (e) {
+    // Not a single JSON document; try NDJSON below
+  }
+  try {
+    return text.split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+  } catch (e) {
+    throw new Error('The file must contain a JSON array or one JSON object per line');
+  }
+};
 
 const CourseLearning = ({ userRole }) => {
   const { courseId } = useParams();
@@ -17,6 +40,12 @@ const CourseLearning = ({ userRole }) => {
   const [showContentForm, setShowContentForm] = useState(false);
   const [editingContent, setEditingContent] = useState(null);
   const [courseProgress, setCourseProgress] = useState({ completed: 0, total: 0, percentage: 0 });
+  const [videoFrame, setVideoFrame] = useState(null);
+  const [importing, setImporting] = useState(false);
+  const importInput = useRef(null);
+
+  // Students' watch time is reported to the heartbeat endpoint
+  useVideoHeartbeat(userRole === 'student' ? videoFrame : null, selectedContent?.id);
 
   useEffect(() => {
     fetchCourseData();
@@ -78,6 +107,25 @@ const CourseLearning = ({ userRole }) => {
     setShowContentForm(true);
   };
 
+  const handleImportContent = async (e) => {
+    const file = e.target.files[0];
+    // Let the same file be picked again after fixing it
+    e.target.value = '';
+    if (!file) return;
+
+    try {
+      setImporting(true);
+      const contents = parseContentImport(await file.text());
+      const result = await bulkCreateCourseContent(courseId, contents);
+      alert(`Imported ${result.created} lessons`);
+      fetchContents();
+    } catch (err) {
+      alert(err.message || 'Failed to import content');
+    } finally {
+      setImporting(false);
+    }
+  };
+
   const handleEditContent = (content) => {
     setEditingContent(content);
     setShowContentForm(true);
@@ -99,6 +147,27 @@ const CourseLearning = ({ userRole }) => {
     }
   };
 
+  // Move a content one place up (-1) or down (+1)
+  const handleMoveContent = async (index, step) => {
+    const target = index + step;
+    if (target < 0 || target >= contents.length) return;
+
+    const reordered = [...contents];
+    const [moved] = reordered.splice(index, 1);
+    reordered.splice(target, 0, moved);
+    const afterId = target > 0 ? reordered[target - 1].id : null;
+    setContents(reordered);
+
+    try {
+      const orders = await reorderCourseContent(courseId, { contentId: moved.id, afterId });
+      const orderById = Object.fromEntries(orders.map(({ id, order }) => [id, order]));
+      setContents(current => current.map(content => ({ ...content, order: orderById[content.id] ?? content.order })));
+    } catch (err) {
+      alert(err.message || 'Failed to reorder content');
+      fetchContents();
+    }
+  };
+
   const handleContentFormClose = () => {
     setShowContentForm(false);
     setEditingContent(null);
@@ -109,7 +178,7 @@ const CourseLearning = ({ userRole }) => {
     if (!selectedContent) return;
 
     try {
-      await markContentComplete(selectedContent.id);
+      await updateCourseProgress(courseId, { [selectedContent.id]: !selectedContent.is_completed });
       // Refresh contents to get updated completion status
       await fetchContents();
     } catch (err) {
@@ -170,9 +239,26 @@ const CourseLearning = ({ userRole }) => {
           <div style={styles.sidebarHeader}>
             <h3 style={styles.sidebarTitle}>Course Content</h3>
             {userRole === 'lecturer' && (
-              <button onClick={handleAddContent} style={styles.addButton}>
-                + Add
-              </button>
+              <div style={styles.sidebarActions}>
+                <button
+                  onClick={() => importInput.current.click()}
+                  disabled={importing}
+                  title="Import lessons from a JSON array or NDJSON file"
+                  style={styles.importButton}
+                >
+                  {importing ? 'Importing...' : 'Import'}
+                </button>
+                <input
+                  ref={importInput}
+                  type="file"
+                  accept=".json,.ndjson,.jsonl,application/json"
+                  onChange={handleImportContent}
+                  style={{ display: 'none' }}
+                />
+                <button onClick={handleAddContent} style={styles.addButton}>
+                  + Add
+                </button>
+              </div>
             )}
           </div>
           {contents.length === 0 ? (
@@ -204,6 +290,28 @@ const CourseLearning = ({ userRole }) => {
                   </div>
                   {userRole === 'lecturer' && (
                     <div style={styles.contentActions}>
+                      <button
+                        onClick={(e) => {
+                          e.stopPropagation();
+                          handleMoveContent(index, -1);
+                        }}
+                        disabled={index === 0}
+                        title="Move up"
+                        style={styles.moveContentButton}
+                      >
+                        ↑
+                      </button>
+                      <button
+                        onClick={(e) => {
+                          e.stopPropagation();
+                          handleMoveContent(index, 1);
+                        }}
+                        disabled={index === contents.length - 1}
+                        title="Move down"
+                        style={styles.moveContentButton}
+                      >
+                        ↓
+                      </button>
                       <button
                         onClick={(e) => {
                           e.stopPropagation();
@@ -241,7 +349,8 @@ const CourseLearning = ({ userRole }) => {
               {selectedContent.content_type === 'video' && selectedContent.video_url && (
                 <div style={styles.videoContainer}>
                   <iframe
-                    src={convertToYouTubeEmbed(selectedContent.video_url)}
+                    ref={setVideoFrame}
+                    src={withPlayerApi(convertToYouTubeEmbed(selectedContent.video_url))}
                     title={selectedContent.title}
                     style={styles.video}
                     allowFullScreen
@@ -407,6 +516,19 @@ const styles = {
     marginBottom: 0,
     color: '#333',
   },
+  sidebarActions: {
+    display: 'flex',
+    gap: '0.5rem',
+  },
+  importButton: {
+    padding: '0.5rem 1rem',
+    backgroundColor: '#6c757d',
+    color: 'white',
+    border: 'none',
+    borderRadius: '4px',
+    cursor: 'pointer',
+    fontSize: '0.9rem',
+  },
   addButton: {
     padding: '0.5rem 1rem',
     backgroundColor: '#28a745',
@@ -464,6 +586,15 @@ const styles = {
     paddingTop: '0.5rem',
     borderTop: '1px solid #e0e0e0',
   },
+  moveContentButton: {
+    padding: '0.4rem 0.6rem',
+    backgroundColor: '#6c757d',
+    color: 'white',
+    border: 'none',
+    borderRadius: '4px',
+    cursor: 'pointer',
+    fontSize: '0.8rem',
+  },
   editContentButton: {
     flex: 1,
     padding: '0.4rem',
@@ -213,6 +213,7 @@ const CourseList = ({ userRole }) => {
                 onChange={(e) => setSortBy(e.target.value)}
                 style={styles.filterSelect}
               >
+                <option value="-search_rank">Best Match</option>
                 <option value="-created_at">Newest First</option>
                 <option value="created_at">Oldest First</option>
                 <option value="-students_count">Most Popular</option>
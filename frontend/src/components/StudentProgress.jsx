@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useMediaQuery } from '../hooks/useMediaQuery';
-import { apiRequest, getCourseStudentProgress } from '../services/api';
+import { apiRequest, getCourseStudentProgress, exportCourseStudentProgress } from '../services/api';
 
 const StudentProgress = () => {
   const { courseId } = useParams();
@@ -36,6 +36,20 @@ const StudentProgress = () => {
     }
   };
 
+  const handleExport = async () => {
+    try {
+      const blob = await exportCourseStudentProgress(courseId);
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `course-${courseId}-progress.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err.message || 'Failed to export student progress');
+    }
+  };
+
   if (loading) {
     return <div style={styles.loading}>Loading student progress...</div>;
   }
@@ -63,6 +77,9 @@ const StudentProgress = () => {
             <p style={{...styles.subtitle, ...(isMobile && styles.subtitleMobile)}}>
               Student Progress Overview ({studentProgress.length} {studentProgress.length === 1 ? 'student' : 'students'})
             </p>
+            <button onClick={handleExport} style={styles.exportButton}>
+              Export CSV
+            </button>
           </div>
         )}
       </div>
@@ -157,6 +174,15 @@ const styles = {
     marginBottom: '1rem',
     fontSize: '0.9rem',
   },
+  exportButton: {
+    padding: '0.5rem 1rem',
+    backgroundColor: '#007bff',
+    color: 'white',
+    border: 'none',
+    borderRadius: '4px',
+    cursor: 'pointer',
+    fontSize: '0.9rem',
+  },
   courseTitle: {
     margin: '0.5rem 0',
     color: '#333',
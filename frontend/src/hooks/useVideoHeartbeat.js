@@ -0,0 +1,95 @@
+import { useEffect } from 'react';
+import { sendVideoHeartbeat } from '../services/api';
+
+const HEARTBEAT_INTERVAL_MS = 15000;
+const YOUTUBE_ORIGIN = 'https://www.youtube.com';
+// IFrame API player states
+const ENDED = 0;
+const PLAYING = 1;
+const PAUSED = 2;
+
+// Report watch progress of the YouTube player `iframe` (its src built with
+// withPlayerApi; null to disable): every 15 seconds while playing, on pause or
+// end, when the page is hidden or closed, and when the video is left.
+export const useVideoHeartbeat = (iframe, contentId) => {
+  useEffect(() => {
+    if (!iframe || !contentId) return undefined;
+
+    const playback = { position: null, duration: null, playing: false, since: null, elapsed: 0 };
+
+    const addWatched = () => {
+      const now = performance.now();
+      if (playback.playing) {
+        playback.elapsed += (now - playback.since) / 1000;
+      }
+      playback.since = now;
+    };
+
+    const send = (options) => {
+      if (playback.position === null) return;
+      addWatched();
+      const elapsed = playback.elapsed;
+      playback.elapsed = 0;
+      sendVideoHeartbeat(contentId, {
+        position: playback.position,
+        duration: playback.duration > 0 ? playback.duration : null,
+        elapsed,
+      }, options).catch(() => {
+        // Watch time is best effort; the next heartbeat carries the position again
+      });
+    };
+
+    // Ask the player to post its state (infoDelivery messages) to this window
+    const listen = () => {
+      iframe.contentWindow?.postMessage(
+        JSON.stringify({ event: 'listening', id: contentId, channel: 'widget' }),
+        YOUTUBE_ORIGIN
+      );
+    };
+
+    const handleMessage = (event) => {
+      if (event.origin !== YOUTUBE_ORIGIN || event.source !== iframe.contentWindow) return;
+      let data;
+      try {
+        data = JSON.parse(event.data);
+      } catch (e) {
+        return;
+      }
+      const info = data?.info;
+      if (!info || (data.event !== 'infoDelivery' && data.event !== 'initialDelivery')) return;
+
+      if (typeof info.currentTime === 'number') playback.position = info.currentTime;
+      if (typeof info.duration === 'number') playback.duration = info.duration;
+      if (typeof info.playerState === 'number') {
+        const playing = info.playerState === PLAYING;
+        if (playing !== playback.playing) {
+          addWatched();
+          playback.playing = playing;
+          if (info.playerState === PAUSED || info.playerState === ENDED) send();
+        }
+      }
+    };
+
+    const handleVisibilityChange = () => {
+      // Also fires when the tab is closed; keepalive lets the request outlive the page
+      if (document.visibilityState === 'hidden') send({ keepalive: true });
+    };
+
+    const timer = setInterval(() => {
+      if (playback.playing) send();
+    }, HEARTBEAT_INTERVAL_MS);
+
+    window.addEventListener('message', handleMessage);
+    document.addEventListener('visibilitychange', handleVisibilityChange);
+    iframe.addEventListener('load', listen);
+    listen();
+
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener('message', handleMessage);
+      document.removeEventListener('visibilitychange', handleVisibilityChange);
+      iframe.removeEventListener('load', listen);
+      send({ keepalive: true });
+    };
+  }, [iframe, contentId]);
+};
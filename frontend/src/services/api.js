@@ -248,6 +248,27 @@ export const createCourseContent = async (courseId, contentData) => {
   return response.json();
 };
 
+// Create many course contents in one request (for lecturers)
+export const bulkCreateCourseContent = async (courseId, contents) => {
+  const response = await apiRequest(`/courses/${courseId}/contents/bulk/`, {
+    method: 'POST',
+    body: JSON.stringify(contents),
+  });
+  
+  if (!response.ok) {
+    const error = await response.json();
+    if (error.errors) {
+      const errorMessages = error.errors
+        .map(({ row, errors }) => `Row ${row + 1}: ${Object.values(errors).flat().join(', ')}`)
+        .join('; ');
+      throw new Error(errorMessages || 'Validation error');
+    }
+    throw new Error(error.error || error.detail || 'Failed to import course content');
+  }
+  
+  return response.json();
+};
+
 // Update course content (for lecturers)
 export const updateCourseContent = async (contentId, contentData) => {
   const response = await apiRequest(`/contents/${contentId}/`, {
@@ -285,6 +306,25 @@ export const deleteCourseContent = async (contentId) => {
   return true;
 };
 
+// Reorder course content (for lecturers): pass the full ordered id list, or
+// { contentId, afterId } to move a single content (afterId null moves it first)
+export const reorderCourseContent = async (courseId, ordering) => {
+  const body = Array.isArray(ordering)
+    ? { content_ids: ordering }
+    : { content_id: ordering.contentId, after_id: ordering.afterId ?? null };
+  const response = await apiRequest(`/courses/${courseId}/contents/reorder/`, {
+    method: 'POST',
+    body: JSON.stringify(body),
+  });
+  
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || error.detail || 'Failed to reorder course content');
+  }
+  
+  return response.json();
+};
+
 // Mark content as complete/incomplete
 export const markContentComplete = async (contentId) => {
   const response = await apiRequest(`/contents/${contentId}/complete/`, {
@@ -299,6 +339,38 @@ export const markContentComplete = async (contentId) => {
   return response.json();
 };
 
+// Set completion for several contents of a course at once, e.g. { 12: true, 13: false }
+export const updateCourseProgress = async (courseId, progress) => {
+  const response = await apiRequest(`/courses/${courseId}/progress/`, {
+    method: 'POST',
+    body: JSON.stringify(progress),
+  });
+  
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || 'Failed to update progress');
+  }
+  
+  return response.json();
+};
+
+// Report video playback position (call every 10-15 seconds while playing);
+// pass { keepalive: true } when the page is being hidden or closed
+export const sendVideoHeartbeat = async (contentId, { position, duration, elapsed }, options = {}) => {
+  const response = await apiRequest(`/contents/${contentId}/heartbeat/`, {
+    method: 'POST',
+    body: JSON.stringify({ position, duration, elapsed }),
+    ...options,
+  });
+  
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || 'Failed to record watch progress');
+  }
+  
+  return response.json();
+};
+
 // Get my progress for all enrolled courses
 export const getMyProgress = async () => {
   const response = await apiRequest('/progress/');
@@ -323,6 +395,17 @@ export const getCourseStudentProgress = async (courseId) => {
   return response.json();
 };
 
+// Download a course's student progress as CSV or NDJSON (lecturers only)
+export const exportCourseStudentProgress = async (courseId, format = 'csv') => {
+  const response = await apiRequest(`/courses/${courseId}/student-progress/export/?format=${format}`);
+  
+  if (!response.ok) {
+    throw new Error('Failed to export student progress');
+  }
+  
+  return response.blob();
+};
+
 // Get all categories
 export const getCategories = async () => {
   const response = await apiRequest('/categories/');
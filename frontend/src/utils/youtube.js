@@ -64,3 +64,15 @@ export const getYouTubeVideoId = (url) => {
   return watchMatch ? watchMatch[1] : null;
 };
 
+/**
+ * Enables the IFrame player API on a YouTube embed URL so the page can follow
+ * playback (see useVideoHeartbeat). Other URLs are returned unchanged.
+ */
+export const withPlayerApi = (embedUrl) => {
+  if (!embedUrl || !embedUrl.includes('youtube.com/embed/')) return embedUrl;
+
+  const url = new URL(embedUrl);
+  url.searchParams.set('enablejsapi', '1');
+  url.searchParams.set('origin', window.location.origin);
+  return url.toString();
+};
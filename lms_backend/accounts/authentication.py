@@ -0,0 +1,71 @@
+"""JWT authentication that resolves the user from token claims instead of a per-request lookup"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Fields the request user is built with; everything else is deferred and loaded on first access
+STATE_FIELDS = ('username', 'role', 'is_active')
+
+
+def user_state_key(user_id):
+    return f'accounts:user-state:{user_id}'
+
+
+def get_user_state(user_id):
+    """Current username/role/is_active for a user, cached for AUTH_USER_STATE_TTL seconds.
+
+    Returns None when the user no longer exists. The entry is dropped whenever
+    the user is saved or deleted, so deactivations and role changes apply on
+    the next request (or within the TTL on per-process caches).
+    """
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*STATE_FIELDS).first() or {}
+        cache.set(key, state, settings.AUTH_USER_STATE_TTL)
+    return state or None
+
+
+def forget_user_state(user_id):
+    cache.delete(user_state_key(user_id))
+
+
+class TokenUserAuthentication(JWTAuthentication):
+    """Authenticate with a `User` instance built from the token's claims.
+
+    The instance is a regular model object marked as loaded from the database,
+    so it works in ORM filters, FK assignments and equality checks. Only
+    `id`, `username`, `role` and `is_active` are populated; other fields are
+    deferred and fetched from the database the first time they are read.
+    Revocation (deleted or deactivated users) and role changes are checked
+    against a short-lived cached state instead of loading the user row.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        # The stored role wins over the claim so role changes don't wait for token expiry
+        values = {
+            'id': int(user_id),
+            'username': state['username'] or validated_token.get('username'),
+            'role': state['role'] or validated_token.get('role'),
+            'is_active': state['is_active'],
+        }
+        # from_db() expects values in model field order
+        field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+        return User.from_db(router.db_for_read(User), field_names, [values[name] for name in field_names])
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from lms_backend.instrumentation import SerializationTimingMixin
 from .models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, min_length=8)
 
     class Meta:
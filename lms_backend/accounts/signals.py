@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_state
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    """Role changes, deactivation and deletion take effect for existing tokens"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user_state(user_id))
@@ -1,3 +1,108 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
-# Create your tests here.
+from lms_backend.testing import QueryScalingMixin
+from .authentication import TokenUserAuthentication
+from .models import User
+from .serializers import CustomTokenObtainPairSerializer
+
+
+# A fast hasher keeps the time budget about the view code rather than PBKDF2
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthEndpointScalingTests(QueryScalingMixin, TestCase):
+    """Registration, login and token authentication don't slow down as users are added"""
+
+    def setUp(self):
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.client = APIClient()
+
+    def seed(self, size):
+        have = User.objects.filter(username__startswith='user-').count()
+        User.objects.bulk_create([
+            User(username=f'user-{index}', email=f'user-{index}@example.com', role='student')
+            for index in range(have, size)
+        ])
+        self.registration = {
+            'username': f'new-user-{size}', 'email': f'new-user-{size}@example.com',
+            'password': 'password123', 'role': 'student',
+        }
+
+    def test_register(self):
+        self.assertScales(lambda: self.client.post('/api/register/', self.registration, format='json'), status_code=201)
+
+    def test_login(self):
+        response = self.assertScales(lambda: self.client.post(
+            '/api/login/', {'username': 'student', 'password': 'password123'}, format='json'
+        ))
+        self.assertIn('access', response.data)
+
+    def test_token_refresh(self):
+        refresh = str(CustomTokenObtainPairSerializer.get_token(self.student))
+        self.assertScales(lambda: self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json'))
+
+    def test_token_authentication(self):
+        access = str(CustomTokenObtainPairSerializer.get_token(self.student).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertScales(lambda: self.client.get('/api/progress/'))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TokenUserAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.token = CustomTokenObtainPairSerializer.get_token(self.student).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token or self.token}')
+        return TokenUserAuthentication().authenticate(request)
+
+    def test_user_from_claims(self):
+        user, _ = self.authenticate()
+        self.assertEqual(user, self.student)
+        self.assertEqual((user.username, user.role, user.is_active), ('student', 'student', True))
+        # Other fields are deferred and loaded on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'student@example.com')
+
+    def test_warm_state_cache_skips_the_user_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/progress/').status_code, 200)
+        self.student.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        self.assertEqual(self.client.get('/api/progress/').status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/progress/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.delete()
+        response = self.client.get('/api/progress/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'user_not_found')
+
+    def test_stored_role_overrides_the_claim(self):
+        self.assertEqual(self.client.get('/api/progress/').status_code, 200)
+        self.student.role = 'lecturer'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        user, _ = self.authenticate()
+        self.assertEqual(user.role, 'lecturer')
+        self.assertEqual(self.token['role'], 'student')
+        # The student-only endpoint now refuses the old token's holder
+        self.assertEqual(self.client.get('/api/progress/').status_code, 403)
+
+    def test_token_without_a_user_id(self):
+        del self.token[api_settings.USER_ID_CLAIM]
+        with self.assertRaises(InvalidToken):
+            self.authenticate()
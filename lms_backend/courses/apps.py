@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from lms_backend.metrics import registry
+        from . import metrics, signals  # noqa: F401
+        registry.register_collector(metrics.collect)
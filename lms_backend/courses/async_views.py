@@ -0,0 +1,204 @@
+"""Async implementations of the read-heavy endpoints, routed when ASGI_MODE is on.
+
+Each wrapper answers GET with the async ORM and hands every other method to the
+synchronous DRF view, so a URL keeps its full behaviour. Payloads come from the
+same serializers and JSON renderer as the sync views. Unlike the sync course
+endpoints, the async ones read course payloads straight from the database
+rather than through the versioned course cache, whose backend calls block.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .conditional import build_etag, set_validator_headers
+from .models import Enrollment, LearningProgress
+from .pagination import KeysetPagination
+from .progress import get_progress_summaries, summarize_enrollment
+from .serializers import CourseContentSerializer, CourseProgressSerializer, CourseSerializer, EnrollmentSerializer
+from .views import (
+    COMPLETION_STATE, CONTENT_STATE, COURSE_STATE, ENROLLMENT_STATE,
+    CourseContentListCreateView, CourseDetailView, CourseListCreateView,
+    MyEnrollmentsView, MyProgressView, get_visible_contents,
+)
+
+
+def render(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def render_exception(exc):
+    # Same payloads as DRF's default exception handler
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = render(data, exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+async def authenticate(request):
+    """Wrap `request` in a DRF Request with its user resolved; raises APIException on bad credentials"""
+    drf_request = Request(
+        request,
+        authenticators=[authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    # Token decoding and the cached user-state check are synchronous
+    user = await sync_to_async(lambda: drf_request.user)()
+    if not user or not user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    return drf_request
+
+
+def require_student(request):
+    if request.user.role != 'student':
+        raise exceptions.PermissionDenied()
+
+
+def get_view(view_class, request, **kwargs):
+    """A DRF view instance set up for `request`, to reuse its queryset building"""
+    view = view_class()
+    view.setup(request, **kwargs)
+    view.format_kwarg = None
+    return view
+
+
+async def conditional(request, state, build):
+    """Answer with 304 when the client's ETag matches `state`, else `await build()`"""
+    etag = build_etag(request, state)
+    response = get_conditional_response(request._request, etag=etag)
+    if response is None:
+        response = await build()
+    return set_validator_headers(response, etag)
+
+
+async def paginate(request, queryset, serialize):
+    """Opt-in keyset pagination, mirroring the sync list views"""
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    if page is None:
+        return render(await serialize([obj async for obj in queryset]))
+    return render(paginator.get_paginated_response(await serialize(page)).data)
+
+
+async def aget_enrolled_course_ids(user, course_ids=None):
+    if user.role != 'student':
+        return set()
+    enrollments = Enrollment.objects.filter(student=user)
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+    return {course_id async for course_id in enrollments.values_list('course_id', flat=True)}
+
+
+async def aget_enrollment_state(user):
+    if user.role != 'student':
+        return None
+    return await Enrollment.objects.filter(student=user).aaggregate(**ENROLLMENT_STATE)
+
+
+async def course_list(request):
+    queryset = get_view(CourseListCreateView, request).get_queryset()
+    courses = await queryset.order_by().aaggregate(**COURSE_STATE)
+    enrollments = await aget_enrollment_state(request.user)
+
+    async def serialize(courses):
+        enrolled_course_ids = await aget_enrolled_course_ids(request.user, [course.id for course in courses])
+        context = {'request': request, 'enrolled_course_ids': enrolled_course_ids}
+        return CourseSerializer(courses, many=True, context=context).data
+
+    return await conditional(
+        request, (courses, enrollments),
+        lambda: paginate(request, queryset, serialize),
+    )
+
+
+async def course_detail(request, pk):
+    view = get_view(CourseDetailView, request, pk=pk)
+    state = await view.get_state_queryset().afirst()
+
+    async def build():
+        course = await view.get_queryset().filter(pk=pk).afirst()
+        if course is None:
+            # Matches the messages of the lecturer (get_object) and student paths
+            raise exceptions.NotFound(
+                'No Course matches the given query.' if request.user.role == 'lecturer' else None
+            )
+        context = {'request': request, 'enrolled_course_ids': {pk} if state['is_enrolled'] else set()}
+        return render(CourseSerializer(course, context=context).data)
+
+    return await conditional(request, state, build)
+
+
+async def content_list(request, course_id):
+    user = request.user
+    is_enrolled = user.role == 'student' and await Enrollment.objects.filter(
+        student=user, course_id=course_id
+    ).aexists()
+    queryset = get_visible_contents(user, course_id, is_enrolled)
+    contents = await queryset.order_by().aaggregate(**CONTENT_STATE)
+    completed = {}
+    progress = LearningProgress.objects.filter(student=user, content__course_id=course_id)
+    if user.role == 'student':
+        completed = await progress.aaggregate(**COMPLETION_STATE)
+
+    async def serialize(contents):
+        context = {'request': request}
+        if user.role == 'student':
+            context['completed_content_ids'] = {
+                content_id async for content_id in
+                progress.filter(completed=True).order_by().values_list('content_id', flat=True)
+            }
+        return CourseContentSerializer(contents, many=True, context=context).data
+
+    return await conditional(
+        request, (contents, completed),
+        lambda: paginate(request, queryset, serialize),
+    )
+
+
+async def my_enrollments(request):
+    require_student(request)
+    queryset = Enrollment.objects.filter(student=request.user).select_related('course', 'student')
+
+    async def serialize(enrollments):
+        return EnrollmentSerializer(enrollments, many=True).data
+
+    return await paginate(request, queryset, serialize)
+
+
+async def my_progress(request):
+    require_student(request)
+    user = request.user
+    rows = [summarize_enrollment(user, enrollment) async for enrollment in get_progress_summaries(user)]
+    return render(CourseProgressSerializer(rows, many=True).data)
+
+
+def async_read_view(view_class, handler):
+    """Serve GET with `handler` and every other method with the sync `view_class`"""
+    sync_view = view_class.as_view()
+    allow = ', '.join(view_class().allowed_methods)
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        try:
+            response = await handler(await authenticate(request), *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = render_exception(exc)
+        response['Allow'] = allow
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    # Named after the sync view in instrumentation and metrics; DRF views are CSRF exempt
+    view.view_class = view_class
+    view.csrf_exempt = True
+    return view
+
+
+course_list_view = async_read_view(CourseListCreateView, course_list)
+course_detail_view = async_read_view(CourseDetailView, course_detail)
+content_list_view = async_read_view(CourseContentListCreateView, content_list)
+my_enrollments_view = async_read_view(MyEnrollmentsView, my_enrollments)
+my_progress_view = async_read_view(MyProgressView, my_progress)
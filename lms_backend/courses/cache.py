@@ -0,0 +1,200 @@
+"""Two-level (process-local + shared Django cache) caching helpers"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+
+class TwoLevelCache:
+    """Cache values in process memory in front of the shared Django cache.
+
+    The local layer keeps a short TTL so that invalidations issued by another
+    worker process are picked up quickly; invalidations in this process clear
+    both layers immediately. Only a shared backend (Redis, Memcached, the
+    database) carries invalidations between workers; on a per-process backend
+    `shared_ttl` should be as short as `local_ttl`.
+    """
+
+    def __init__(self, prefix, local_ttl, shared_ttl):
+        self.prefix = prefix
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key):
+        return f'{self.prefix}:{key}'
+
+    def get(self, key):
+        now = time.monotonic()
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+        value = cache.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            with self._lock:
+                self._local[key] = (now + self.local_ttl, value)
+        return value
+
+    def set(self, key, value):
+        cache.set(self._key(key), value, self.shared_ttl)
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, value)
+
+    def get_or_set(self, key, default):
+        value = self.get(key)
+        if value is None:
+            value = default()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        cache.delete_many([self._key(key) for key in keys])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'local_entries': len(self._local),
+        }
+
+
+class VersionedCache:
+    """Read-through cache of serialized objects keyed by id plus a per-object version.
+
+    Saving an object bumps its version, so stale entries are never read again and
+    simply age out. Entries are kept in a bounded process-local LRU in front of
+    the configured Django cache; hit/miss counts are kept per process.
+
+    Versions only reach other workers through a shared backend. With a
+    per-process backend, `version_ttl` expires them so that every worker
+    re-reads an object at least that often (None keeps them until bumped).
+    """
+
+    def __init__(self, prefix, alias, ttl, max_local_entries, version_ttl=None):
+        self.prefix = prefix
+        self.alias = alias
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.max_local_entries = max_local_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _version_key(self, object_id):
+        return f'{self.prefix}:{object_id}:version'
+
+    def _data_key(self, object_id, version):
+        return f'{self.prefix}:{object_id}:v{version}'
+
+    def _get_versions(self, object_ids):
+        keys = {self._version_key(object_id): object_id for object_id in object_ids}
+        found = self.backend.get_many(list(keys))
+        versions = {keys[key]: version for key, version in found.items()}
+        missing = {}
+        for object_id in object_ids:
+            if object_id not in versions:
+                # A nanosecond timestamp never collides with an evicted earlier version
+                versions[object_id] = missing[self._version_key(object_id)] = time.time_ns()
+        if missing:
+            self.backend.set_many(missing, self.version_ttl)
+        return versions
+
+    def get_many(self, object_ids, loader):
+        """Return {id: data} for `object_ids`, calling `loader(missing_ids)` -> {id: data} on misses.
+
+        Ids the loader does not return are omitted from the result.
+        """
+        versions = self._get_versions(object_ids)
+        result = {}
+        shared_lookup = {}
+        with self._lock:
+            for object_id in object_ids:
+                key = self._data_key(object_id, versions[object_id])
+                if key in self._local:
+                    self._local.move_to_end(key)
+                    result[object_id] = self._local[key]
+                else:
+                    shared_lookup[key] = object_id
+
+        if shared_lookup:
+            for key, data in self.backend.get_many(list(shared_lookup)).items():
+                result[shared_lookup[key]] = data
+                self._remember(key, data)
+
+        missing = [object_id for object_id in object_ids if object_id not in result]
+        if missing:
+            loaded = loader(missing)
+            self.backend.set_many(
+                {self._data_key(object_id, versions[object_id]): data for object_id, data in loaded.items()},
+                self.ttl
+            )
+            for object_id, data in loaded.items():
+                self._remember(self._data_key(object_id, versions[object_id]), data)
+            result.update(loaded)
+
+        with self._lock:
+            self.hits += len(object_ids) - len(missing)
+            self.misses += len(missing)
+        return result
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._local[key] = data
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def bump(self, *object_ids):
+        """Invalidate the cached data of the given objects"""
+        version = time.time_ns()
+        self.backend.set_many({self._version_key(object_id): version for object_id in object_ids}, self.version_ttl)
+
+    def clear(self):
+        """Drop this process's entries and counters (the shared backend is left alone)"""
+        with self._lock:
+            self._local.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'local_entries': len(self._local),
+            }
+
+
+category_cache = TwoLevelCache(
+    'categories',
+    local_ttl=settings.CATEGORY_CACHE_LOCAL_TTL,
+    shared_ttl=settings.CATEGORY_CACHE_TTL,
+)
+
+course_cache = VersionedCache(
+    'course',
+    alias=settings.COURSE_CACHE_ALIAS,
+    ttl=settings.COURSE_CACHE_TTL,
+    max_local_entries=settings.COURSE_CACHE_LOCAL_MAX_ENTRIES,
+    version_ttl=settings.COURSE_CACHE_VERSION_TTL or None,
+)
@@ -0,0 +1,46 @@
+"""ETag support for read endpoints"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def build_etag(request, state):
+    """Return the ETag for a response depending on `state`"""
+    # The same URL renders differently per user (is_enrolled, is_completed)
+    digest = hashlib.md5(
+        repr((request.get_full_path(), request.user.pk, state)).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def set_validator_headers(response, etag):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        # Let browsers keep the body but always revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """Answer GET requests with an ETag built from cheap aggregate queries.
+
+    Views implement `get_validator_state()` returning any repr-able summary of
+    everything the response depends on (typically max `updated_at` plus row
+    counts). When the client's `If-None-Match` matches, a 304 is returned
+    without running the full query or serialization. No `Last-Modified` is
+    sent: deletions, unpublished courses and counter updates change the state
+    without moving any `updated_at`, so `If-Modified-Since` alone would get
+    stale 304s.
+    """
+
+    def get_validator_state(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag = build_etag(request, self.get_validator_state())
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validator_headers(response, etag)
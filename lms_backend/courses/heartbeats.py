@@ -0,0 +1,219 @@
+"""Write-behind aggregation of video watch-time heartbeats"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import CourseContent, LearningProgress
+from .progress import apply_progress_changes, lock_enrollments, upsert_progress
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    """Coalesce player heartbeats per (student, content) in memory and flush them in batches.
+
+    Each worker process keeps its own buffer. Pending pings are written with a
+    single upsert when `flush_size` keys are pending or every `flush_interval`
+    seconds (0 disables the timer thread), and once more at interpreter exit.
+    Content past `completion_threshold` of its duration is marked completed.
+    Pings for videos or students deleted in the meantime are dropped; a batch
+    that fails for another reason is kept and retried by the next flush.
+    """
+
+    # Longest gap between pings that still counts as continuous watching
+    max_elapsed = 60
+    # How long a successful enrollment/content check is trusted for
+    authorization_ttl = 300
+
+    def __init__(self, flush_interval, flush_size, completion_threshold):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.completion_threshold = completion_threshold
+        self._pending = {}
+        self._authorized = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self.received = 0
+        self.flushed_rows = 0
+
+    def is_authorized(self, student, content_id):
+        """Whether the student may report watch time for this video (cached per process)"""
+        key = (student.id, content_id)
+        now = time.monotonic()
+        expires = self._authorized.get(key)
+        if expires and expires > now:
+            return True
+        allowed = CourseContent.objects.filter(
+            id=content_id,
+            content_type='video',
+            course__enrollments__student=student,
+        ).exists()
+        if allowed:
+            self._authorized[key] = now + self.authorization_ttl
+        return allowed
+
+    def record(self, student_id, content_id, position, duration=None, elapsed=None):
+        """Buffer one heartbeat; `elapsed` is the watch time since the previous ping"""
+        key = (student_id, content_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {'position': position, 'watched': 0.0, 'duration': None}
+            if elapsed is None:
+                # Fall back to the playback delta between pings in this buffer
+                elapsed = position - entry['position']
+            if 0 < elapsed <= self.max_elapsed:
+                entry['watched'] += elapsed
+            entry['position'] = position
+            if duration:
+                entry['duration'] = duration
+            self.received += 1
+            should_flush = len(self._pending) >= self.flush_size
+        self._ensure_timer()
+        if should_flush:
+            try:
+                self.flush()
+            except Exception:
+                # The ping is buffered either way; the batch is retried on the next flush
+                logger.exception('Failed to flush video heartbeats')
+
+    def flush(self):
+        """Write all pending heartbeats, returning the number of rows upserted"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self._prune_authorized()
+        if not pending:
+            return 0
+        try:
+            return self._write(pending)
+        except IntegrityError:
+            # A video or student was deleted between the existence check and the write;
+            # checking again drops it, and anything still failing is not retried forever
+            try:
+                return self._write(pending)
+            except IntegrityError:
+                logger.exception('Dropped %d video heartbeats that could not be written', len(pending))
+                return 0
+        except Exception:
+            self._restore(pending)
+            raise
+
+    def _prune_authorized(self):
+        """Forget expired enrollment/content checks so the cache doesn't grow without bound"""
+        now = time.monotonic()
+        with self._lock:
+            self._authorized = {key: expires for key, expires in self._authorized.items() if expires > now}
+
+    def _restore(self, pending):
+        """Put unwritten heartbeats back so the next flush retries them"""
+        with self._lock:
+            for key, entry in pending.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = entry
+                else:
+                    newer['watched'] += entry['watched']
+                    newer['duration'] = newer['duration'] or entry['duration']
+
+    def _write(self, pending):
+        content_ids = {content_id for _, content_id in pending}
+        course_ids = dict(CourseContent.objects.filter(id__in=content_ids).values_list('id', 'course_id'))
+        student_ids = set(get_user_model().objects.filter(
+            id__in={student_id for student_id, _ in pending}
+        ).values_list('id', flat=True))
+        writable = {
+            key: entry for key, entry in pending.items()
+            if key[0] in student_ids and key[1] in course_ids
+        }
+        if len(writable) < len(pending):
+            logger.info('Dropping %d video heartbeats for deleted videos or students', len(pending) - len(writable))
+            with self._lock:
+                for key in pending.keys() - writable.keys():
+                    self._authorized.pop(key, None)
+            pending = writable
+            if not pending:
+                return 0
+        content_ids = set(course_ids)
+
+        with transaction.atomic():
+            # Locking the enrollments first serializes this read-modify-write with other
+            # progress writers of the same students and keeps completed_count exact
+            enrollment_ids = lock_enrollments(
+                (student_id, course_ids[content_id]) for student_id, content_id in pending
+            )
+            existing = {
+                (row.student_id, row.content_id): row
+                for row in LearningProgress.objects.filter(
+                    student_id__in=student_ids, content_id__in=content_ids
+                ).order_by().only(
+                    'student_id', 'content_id', 'completed', 'completed_at', 'watched_seconds', 'duration_seconds'
+                )
+            }
+
+            now = timezone.now()
+            rows = []
+            for (student_id, content_id), entry in pending.items():
+                # Watch time accumulates on the stored total
+                current = existing.get((student_id, content_id))
+                watched = entry['watched'] + (current.watched_seconds if current else 0)
+                duration = entry['duration'] or (current.duration_seconds if current else None)
+                completed = bool(current and current.completed)
+                completed_at = current.completed_at if completed else None
+                if not completed and duration and watched >= duration * self.completion_threshold:
+                    completed, completed_at = True, now
+                rows.append(LearningProgress(
+                    student_id=student_id,
+                    content_id=content_id,
+                    position_seconds=entry['position'],
+                    watched_seconds=watched,
+                    duration_seconds=duration,
+                    completed=completed,
+                    completed_at=completed_at,
+                ))
+
+            upsert_progress(rows, fields=(
+                'position_seconds', 'watched_seconds', 'duration_seconds', 'completed', 'completed_at'
+            ))
+            apply_progress_changes(enrollment_ids, now)
+        self.flushed_rows += len(rows)
+        return len(rows)
+
+    def _ensure_timer(self):
+        if self.flush_interval <= 0 or self._timer is not None:
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._run_timer, name='heartbeat-flush', daemon=True)
+                self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush video heartbeats')
+            finally:
+                # The timer thread holds its own connection; don't keep it open between flushes
+                connection.close()
+
+
+heartbeat_buffer = HeartbeatBuffer(
+    flush_interval=settings.HEARTBEAT_FLUSH_INTERVAL,
+    flush_size=settings.HEARTBEAT_FLUSH_SIZE,
+    completion_threshold=settings.VIDEO_COMPLETION_THRESHOLD,
+)
+
+
+@atexit.register
+def flush_on_exit():
+    try:
+        heartbeat_buffer.flush()
+    except Exception:
+        logger.exception('Failed to flush video heartbeats at exit')
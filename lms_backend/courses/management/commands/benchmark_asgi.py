@@ -0,0 +1,226 @@
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from courses.models import Course, CourseContent, Enrollment
+
+PREFIX = 'asgi-benchmark-'
+
+
+def add_latency(seconds):
+    """Delay every query on new connections by `seconds`, like a remote database would"""
+
+    def slow_execute(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Outermost, so the execute_wrapper() blocks pushed and popped per request stay balanced
+        if slow_execute not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, slow_execute)
+
+    connection_created.connect(install, weak=False)
+
+
+class Command(BaseCommand):
+    help = ('Compare read throughput of the WSGI and ASGI deployments at 100 and 1,000 concurrent '
+            'clients, driving each application in-process with a simulated database round trip')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000])
+        parser.add_argument('--requests', type=int, default=3, help='Sequential requests per client')
+        parser.add_argument('--db-latency-ms', type=float, default=20,
+                            help='Added to every query to model a database across the network')
+        parser.add_argument('--wsgi-threads', type=int, default=4,
+                            help='Request threads of one WSGI worker (gunicorn --threads)')
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--courses', type=int, default=50)
+        parser.add_argument('--run', choices=['wsgi', 'asgi'], help='Internal: benchmark one deployment in this process')
+
+    def handle(self, *args, **options):
+        if options['run']:
+            self.stdout.write(json.dumps(self.run(options)))
+            return
+
+        # Both deployments run in child processes (ASGI_MODE is read at startup),
+        # so the benchmark data has to be committed; it is removed afterwards
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f'Users named {PREFIX}* already exist; remove them before benchmarking')
+        try:
+            self.seed(options['students'], options['courses'])
+            results = {mode: self.spawn(mode, options) for mode in ('wsgi', 'asgi')}
+        finally:
+            Course.objects.filter(lecturer__username__startswith=PREFIX).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+        self.stdout.write(f'{options["db_latency_ms"]:g} ms per query, '
+                          f'{options["wsgi_threads"]} WSGI threads, {options["requests"]} requests per client')
+        self.stdout.write(f'{"clients":>8} {"mode":>5} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"errors":>7}')
+        for clients in options['clients']:
+            for mode in ('wsgi', 'asgi'):
+                result = results[mode][str(clients)]
+                self.stdout.write(
+                    f'{clients:>8} {mode:>5} {result["throughput"]:>9,.0f} {result["p50_ms"]:>9,.1f} '
+                    f'{result["p99_ms"]:>9,.1f} {result["errors"]:>7}'
+                )
+
+    def spawn(self, mode, options):
+        command = [
+            sys.executable, sys.argv[0], 'benchmark_asgi', '--run', mode,
+            '--requests', str(options['requests']),
+            '--db-latency-ms', str(options['db_latency_ms']),
+            '--wsgi-threads', str(options['wsgi_threads']),
+            '--clients', *map(str, options['clients']),
+        ]
+        env = dict(os.environ, ASGI_MODE=str(mode == 'asgi'), PERF_LOG_LEVEL='ERROR')
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode:
+            raise CommandError(f'{mode} run failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def seed(self, students, courses):
+        lecturer = User.objects.create(username=f'{PREFIX}lecturer', role='lecturer')
+        Course.objects.bulk_create([
+            Course(title=f'Benchmark course {index}', description='Benchmark', price=0,
+                   lecturer=lecturer, is_published=True)
+            for index in range(courses)
+        ])
+        course_ids = list(Course.objects.filter(lecturer=lecturer).values_list('id', flat=True))
+        CourseContent.objects.bulk_create([
+            CourseContent(course_id=course_id, title=f'Lesson {order}', content_type='text',
+                          content_text='Lesson', order=order)
+            for course_id in course_ids for order in range(10)
+        ])
+        Course.objects.filter(id__in=course_ids).update(content_count=10)
+        User.objects.bulk_create([
+            User(username=f'{PREFIX}{index}', role='student') for index in range(students)
+        ], batch_size=1000)
+        student_ids = User.objects.filter(username__startswith=PREFIX, role='student').values_list('id', flat=True)
+        Enrollment.objects.bulk_create([
+            Enrollment(student_id=student_id, course_id=course_ids[(student_id + offset) % len(course_ids)])
+            for student_id in student_ids for offset in range(3)
+        ])
+
+    def run(self, options):
+        """Child process: drive this deployment with every client count and return the stats"""
+        students = list(User.objects.filter(username__startswith=PREFIX, role='student'))
+        course_ids = list(Course.objects.filter(lecturer__username__startswith=PREFIX).values_list('id', flat=True))
+        tokens = [str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in students]
+        paths = [
+            '/api/courses/?limit=20',
+            *(f'/api/courses/{course_id}/' for course_id in course_ids[:5]),
+            *(f'/api/courses/{course_id}/contents/' for course_id in course_ids[:5]),
+            '/api/enrollments/',
+            '/api/progress/',
+        ]
+        connection.close()
+        add_latency(options['db_latency_ms'] / 1000)
+
+        if options['run'] == 'asgi':
+            from lms_backend.asgi import application
+            request = self.asgi_requester(application)
+        else:
+            from django.core.wsgi import get_wsgi_application
+            request = self.wsgi_requester(get_wsgi_application(), options['wsgi_threads'])
+
+        results = {}
+        for clients in options['clients']:
+            results[str(clients)] = asyncio.run(
+                self.drive(request, clients, options['requests'], tokens, paths)
+            )
+        return results
+
+    async def drive(self, request, clients, requests, tokens, paths):
+        latencies = []
+        errors = 0
+
+        async def client(index):
+            nonlocal errors
+            token = tokens[index % len(tokens)]
+            for number in range(requests):
+                path = paths[(index + number) % len(paths)]
+                start = time.perf_counter()
+                status = await request(path, token)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(clients)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+            'errors': errors,
+        }
+
+    def asgi_requester(self, application):
+        async def request(path, token):
+            path, _, query = path.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+                'root_path': '', 'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+            }
+            sent_request = False
+            status = None
+
+            async def receive():
+                nonlocal sent_request
+                if not sent_request:
+                    sent_request = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Django waits for a disconnect alongside the view; the client never leaves
+                await asyncio.Event().wait()
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+
+            await application(scope, receive, send)
+            return status
+
+        return request
+
+    def wsgi_requester(self, application, workers):
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        def call(path, token):
+            path, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Bearer {token}', 'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            statuses = []
+            response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                for _ in response:
+                    pass
+            finally:
+                response.close()
+            return int(statuses[0].split()[0])
+
+        async def request(path, token):
+            # Requests queue for a free thread, as they would in gunicorn's backlog
+            return await asyncio.get_running_loop().run_in_executor(executor, call, path, token)
+
+        return request
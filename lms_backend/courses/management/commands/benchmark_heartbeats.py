@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from courses.heartbeats import heartbeat_buffer
+from courses.models import Course, CourseContent, Enrollment, LearningProgress
+from courses.views import VideoHeartbeatView
+
+
+class Command(BaseCommand):
+    help = 'Measure sustained video heartbeat request and flush rates on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--videos', type=int, default=20)
+        parser.add_argument('--seconds', type=float, default=10, help='How long to send pings for')
+        parser.add_argument('--flush-interval', type=float, default=1.0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Pings go through the view (authentication, parsing, the enrollment check and
+        # the buffer) on this thread, so every query runs inside the rolled-back
+        # transaction; the loop plays the flush timer
+        heartbeat_buffer.flush_interval = 0
+        heartbeat_buffer.flush_size = float('inf')
+        view = VideoHeartbeatView.as_view()
+        factory = APIRequestFactory()
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            students, content_ids = self.seed(options['students'], options['videos'])
+            position = {}
+            latencies = []
+            statuses = Counter()
+            flushes = []
+            start = time.perf_counter()
+            deadline = start + options['seconds']
+            next_flush = start + options['flush_interval']
+            while (now := time.perf_counter()) < deadline:
+                if now >= next_flush:
+                    flushes.append(self.timed_flush())
+                    next_flush = time.perf_counter() + options['flush_interval']
+                student, content_id = rng.choice(students), rng.choice(content_ids)
+                key = (student.id, content_id)
+                position[key] = position.get(key, 0) + 15
+                request = factory.post(
+                    f'/api/contents/{content_id}/heartbeat/',
+                    {'position': position[key], 'duration': 600, 'elapsed': 15},
+                    format='json',
+                )
+                force_authenticate(request, student)
+                request_start = time.perf_counter()
+                response = view(request, content_id=content_id)
+                latencies.append((time.perf_counter() - request_start) * 1000)
+                statuses[response.status_code] += 1
+            flushes.append(self.timed_flush())
+            elapsed = time.perf_counter() - start
+
+            rows = sum(count for count, _ in flushes)
+            flush_seconds = sum(duration for _, duration in flushes)
+            latencies.sort()
+            self.stdout.write(f'Heartbeats sent:     {len(latencies):,} in {elapsed:.1f}s '
+                              f'({len(latencies) / elapsed:,.0f}/s), statuses {dict(statuses)}')
+            self.stdout.write(f'Request latency:     p50 {statistics.median(latencies):.2f} ms, '
+                              f'p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms, max {latencies[-1]:.2f} ms')
+            self.stdout.write(f'Rows upserted:       {rows:,} in {len(flushes)} flushes, '
+                              f'{flush_seconds:.2f}s of flush time ({rows / max(flush_seconds, 1e-9):,.0f} rows/s)')
+            self.stdout.write(f'Coalescing ratio:    {len(latencies) / max(rows, 1):,.1f} pings per row written')
+            self.stdout.write(f'Progress rows:       {LearningProgress.objects.filter(content_id__in=content_ids).count():,}')
+            transaction.set_rollback(True)
+
+    def timed_flush(self):
+        start = time.perf_counter()
+        rows = heartbeat_buffer.flush()
+        return rows, time.perf_counter() - start
+
+    def seed(self, students, videos):
+        lecturer = User.objects.create(username='heartbeat-benchmark-lecturer', role='lecturer')
+        course = Course.objects.create(title='Heartbeat benchmark', description='', price=0, lecturer=lecturer)
+        CourseContent.objects.bulk_create([
+            CourseContent(course=course, title=f'Video {index}', content_type='video',
+                          video_url='https://example.com/video', order=index)
+            for index in range(videos)
+        ])
+        User.objects.bulk_create([
+            User(username=f'heartbeat-benchmark-{index}', role='student') for index in range(students)
+        ], batch_size=1000)
+        student_list = list(User.objects.filter(username__startswith='heartbeat-benchmark-', role='student'))
+        Enrollment.objects.bulk_create([
+            Enrollment(course=course, student=student) for student in student_list
+        ], batch_size=1000)
+        content_ids = list(CourseContent.objects.filter(course=course).values_list('id', flat=True))
+        return student_list, content_ids
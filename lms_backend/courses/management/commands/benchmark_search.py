@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from courses.models import Category, Course
+from courses.search import index_courses, search_courses
+from courses.views import COURSE_STATE
+
+WORDS = (
+    'python django react javascript data science machine learning web design '
+    'marketing business finance photography music guitar piano language spanish '
+    'french fitness yoga nutrition cloud devops security network database sql '
+    'mobile android ios swift kotlin testing agile leadership writing drawing '
+    'painting excel statistics algebra calculus physics chemistry biology history'
+).split()
+
+SYLLABLES = 'ka lo mi ne ru ta vi so pe du ga ri zo fe mu'.split()
+
+QUERIES = ['python', 'mach', 'web design', 'data science', 'guitar', 'zzz']
+
+
+def build_vocabulary(rng, size=5000):
+    """Real topic words followed by pseudo-words, so descriptions have a long-tail vocabulary"""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return words
+
+
+class Command(BaseCommand):
+    help = 'Compare ranked token-index search against the icontains search on synthetic catalogs (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.seed(size, random.Random(options['seed']))
+                self.stdout.write(f'\n{size} courses')
+                self.stdout.write(f'{"query":<16}{"icontains ms":>14}{"index ms":>12}{"state ms":>10}{"hits":>8}')
+                for query in QUERIES:
+                    old_ms, old_hits = self.measure(lambda: self.icontains(query), options['repeat'])
+                    new_ms, new_hits = self.measure(lambda: self.indexed(query), options['repeat'])
+                    state_ms, _ = self.measure(lambda: [self.indexed_state(query)], options['repeat'])
+                    self.stdout.write(f'{query:<16}{old_ms:>14.1f}{new_ms:>12.1f}{state_ms:>10.1f}{new_hits:>8}')
+                transaction.set_rollback(True)
+
+    def seed(self, size, rng):
+        lecturer = User.objects.create(username=f'benchmark-lecturer-{size}', role='lecturer')
+        categories = [
+            Category.objects.create(name=f'Benchmark {name} {size}')
+            for name in ('Programming', 'Design', 'Business', 'Music', 'Science')
+        ]
+        vocabulary = build_vocabulary(rng)
+        # Zipf-like skew: low-ranked (topic) words are far more common than the tail
+        word_weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        for start in range(0, size, 1000):
+            batch = [
+                Course(
+                    title=' '.join(rng.choices(WORDS, k=4)).title(),
+                    description=' '.join(rng.choices(vocabulary, weights=word_weights, k=60)),
+                    price=rng.randint(0, 200),
+                    category=rng.choice(categories),
+                    lecturer=lecturer,
+                    is_published=True,
+                )
+                for _ in range(min(1000, size - start))
+            ]
+            Course.objects.bulk_create(batch)
+        # Re-read so primary keys are available on every backend
+        courses = Course.objects.filter(lecturer=lecturer).select_related('category').order_by('id')
+        last_id = 0
+        while True:
+            batch = list(courses.filter(id__gt=last_id)[:1000])
+            if not batch:
+                break
+            index_courses(batch)
+            last_id = batch[-1].id
+
+    def icontains(self, query):
+        return Course.objects.filter(is_published=True).filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__name__icontains=query)
+        ).order_by('-created_at').distinct()[:20]
+
+    def indexed(self, query):
+        queryset = search_courses(Course.objects.filter(is_published=True), query)
+        return queryset.order_by('-search_rank', '-created_at')[:20]
+
+    def indexed_state(self, query):
+        # The listing also aggregates the search results for its ETag
+        return search_courses(Course.objects.filter(is_published=True), query).order_by().aggregate(**COURSE_STATE)
+
+    def measure(self, build, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = len(list(build()))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), hits
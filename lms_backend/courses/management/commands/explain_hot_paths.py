@@ -0,0 +1,244 @@
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from courses.cache import course_cache
+from courses.models import Category, Course, CourseContent, Enrollment, LearningProgress
+from courses.ordering import ORDER_GAP
+from courses.progress import rebuild_rollups
+from courses.search import index_courses
+
+
+def sqlite_plan(cursor, sql):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    lines, flags = [], set()
+    for row in cursor.fetchall():
+        detail = row[-1]
+        lines.append(detail)
+        # "SCAN table" without an index is a full table scan
+        if detail.startswith('SCAN ') and ' INDEX ' not in detail:
+            flags.add('full scan')
+        if 'USE TEMP B-TREE' in detail:
+            flags.add('filesort')
+    return lines, flags
+
+
+def mysql_plan(cursor, sql):
+    cursor.execute('EXPLAIN ' + sql)
+    columns = [column[0] for column in cursor.description]
+    lines, flags = [], set()
+    for values in cursor.fetchall():
+        row = dict(zip(columns, values))
+        lines.append(
+            f"{row.get('table')}: type={row.get('type')} key={row.get('key')} "
+            f"rows={row.get('rows')} extra={row.get('Extra') or ''}"
+        )
+        if row.get('type') == 'ALL':
+            flags.add('full scan')
+        if 'filesort' in (row.get('Extra') or ''):
+            flags.add('filesort')
+        if 'temporary' in (row.get('Extra') or ''):
+            flags.add('temporary table')
+    return lines, flags
+
+
+def postgresql_plan(cursor, sql):
+    cursor.execute('EXPLAIN ' + sql)
+    lines, flags = [], set()
+    for (line,) in cursor.fetchall():
+        lines.append(line)
+        node = line.strip().removeprefix('->').strip()
+        if node.startswith('Seq Scan'):
+            flags.add('full scan')
+        if node.startswith(('Sort', 'Incremental Sort')):
+            flags.add('filesort')
+    return lines, flags
+
+
+def truncate(sql, length=300):
+    return sql if len(sql) <= length else sql[:length] + '...'
+
+
+PLANNERS = {
+    'sqlite': sqlite_plan,
+    'mysql': mysql_plan,
+    'postgresql': postgresql_plan,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the read endpoints in courses/views.py against seeded data (rolled back) '
+        'and print EXPLAIN output for every query, flagging full scans and filesorts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=2000)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--contents', type=int, default=10, help='Contents per course')
+        parser.add_argument('--enrollments', type=int, default=10, help='Enrollments per student')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--path', action='append', dest='paths', help='Only explain hot paths with this name')
+        parser.add_argument('--flagged-only', action='store_true', help='Only print plans that were flagged')
+
+    def handle(self, *args, **options):
+        planner = PLANNERS.get(connection.vendor)
+        if planner is None:
+            raise CommandError(f'EXPLAIN is not supported for the {connection.vendor} backend')
+
+        with transaction.atomic():
+            data = self.seed(options, random.Random(options['seed']))
+            self.analyze()
+            flagged = 0
+            for name, user, url in self.hot_paths(data):
+                if options['paths'] and name not in options['paths']:
+                    continue
+                flagged += self.explain(
+                    name, user, url, planner, options['flagged_only'], options['verbosity'] > 1
+                )
+            transaction.set_rollback(True)
+
+        summary = f'\n{flagged} flagged queries on {connection.vendor}'
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
+
+    def hot_paths(self, data):
+        course = data['course']
+        student = data['student']
+        lecturer = data['lecturer']
+        return [
+            ('categories', student, '/api/categories/'),
+            ('catalog', student, '/api/courses/'),
+            ('catalog_page', student, '/api/courses/?page_size=20'),
+            ('catalog_popular', student, '/api/courses/?sort=-students_count&page_size=20'),
+            ('catalog_category', student, f'/api/courses/?category={data["category"].id}&page_size=20'),
+            ('catalog_search', student, '/api/courses/?search=python&page_size=20'),
+            ('lecturer_courses', lecturer, '/api/courses/'),
+            ('course_detail', student, f'/api/courses/{course.id}/'),
+            ('my_enrollments', student, '/api/enrollments/?page_size=20'),
+            ('course_contents', student, f'/api/courses/{course.id}/contents/'),
+            ('my_progress', student, '/api/progress/'),
+            ('student_progress', lecturer, f'/api/courses/{course.id}/student-progress/?page_size=100'),
+        ]
+
+    def explain(self, name, user, url, planner, flagged_only, verbose):
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        request = APIRequestFactory().get(url, HTTP_HOST=host)
+        force_authenticate(request, user=user)
+        match = resolve(url.split('?')[0])
+        # Cached reads would hide the queries being examined
+        cache.clear()
+        course_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = match.func(request, *match.args, **match.kwargs)
+            response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{name}: {url} returned {response.status_code}')
+
+        flagged = 0
+        seen = set()
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT') or sql in seen:
+                    continue
+                seen.add(sql)
+                lines, flags = planner(cursor, sql)
+                flagged += bool(flags)
+                if flagged_only and not flags:
+                    continue
+                header = f'\n[{name}] {url} ({query["time"]}s)'
+                self.stdout.write(self.style.WARNING(f'{header} {", ".join(sorted(flags))}') if flags else header)
+                self.stdout.write(f'  {sql if verbose else truncate(sql)}')
+                for line in lines:
+                    self.stdout.write(f'    {line}')
+        return flagged
+
+    def analyze(self):
+        """Refresh planner statistics for the seeded rows (MySQL's ANALYZE TABLE would commit them)"""
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def seed(self, options, rng):
+        User.objects.bulk_create([
+            User(username=f'explain-lecturer-{index}', role='lecturer') for index in range(20)
+        ])
+        User.objects.bulk_create([
+            User(username=f'explain-student-{index}', role='student') for index in range(options['students'])
+        ])
+        Category.objects.bulk_create([
+            Category(name=f'Explain {name}')
+            for name in ('Programming', 'Design', 'Business', 'Music', 'Science')
+        ])
+        # Re-read so primary keys are available on every backend
+        lecturers = list(User.objects.filter(username__startswith='explain-lecturer-').order_by('id'))
+        students = list(User.objects.filter(username__startswith='explain-student-').order_by('id'))
+        categories = list(Category.objects.filter(name__startswith='Explain ').order_by('id'))
+
+        Course.objects.bulk_create([
+            Course(
+                title=f'{rng.choice(["Python", "Design", "Finance", "Guitar", "Data"])} course {index}',
+                description='Explain hot paths seed course',
+                price=rng.randint(0, 200),
+                category=rng.choice(categories),
+                lecturer=rng.choice(lecturers),
+                is_published=rng.random() < 0.9,
+                students_count=rng.randint(0, 1000),
+            )
+            for index in range(options['courses'])
+        ], batch_size=1000)
+        courses = list(Course.objects.filter(lecturer__in=lecturers).select_related('category').order_by('id'))
+        index_courses(courses)
+
+        CourseContent.objects.bulk_create([
+            CourseContent(
+                course=course,
+                title=f'Lesson {index}',
+                content_type='text',
+                content_text='Explain hot paths seed content',
+                order=(index + 1) * ORDER_GAP,
+            )
+            for course in courses
+            for index in range(options['contents'])
+        ], batch_size=1000)
+
+        published = [course for course in courses if course.is_published]
+        enrollments = []
+        for student in students:
+            for course in rng.sample(published, min(options['enrollments'], len(published))):
+                enrollments.append(Enrollment(student=student, course=course))
+        # The first published course is the one every hot path looks at; give it a full roster
+        course = published[0]
+        enrolled = {(e.student_id, e.course_id) for e in enrollments}
+        enrollments += [
+            Enrollment(student=student, course=course)
+            for student in students
+            if (student.id, course.id) not in enrolled
+        ]
+        Enrollment.objects.bulk_create(enrollments, batch_size=1000)
+
+        contents = list(CourseContent.objects.filter(course__in=published).values_list('id', 'course_id'))
+        by_course = {}
+        for content_id, course_id in contents:
+            by_course.setdefault(course_id, []).append(content_id)
+        LearningProgress.objects.bulk_create([
+            LearningProgress(student_id=e.student_id, content_id=content_id, completed=rng.random() < 0.6)
+            for e in enrollments
+            for content_id in by_course[e.course_id]
+            if rng.random() < 0.5
+        ], batch_size=1000)
+        rebuild_rollups()
+
+        return {
+            'course': course,
+            'category': course.category,
+            'lecturer': course.lecturer,
+            'student': students[0],
+        }
@@ -0,0 +1,40 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses.roster import enroll_roster, read_roster
+
+
+class Command(BaseCommand):
+    help = ('Enroll the students listed in a CSV of usernames or emails (first column, optional header) '
+            'in a course')
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('csv_path', help="Path to the CSV file, or '-' for stdin")
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Students resolved and inserted per batch')
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f'Course {options["course_id"]} does not exist')
+
+        start = time.perf_counter()
+        if options['csv_path'] == '-':
+            report = enroll_roster(course, read_roster(sys.stdin), options['chunk_size'])
+        else:
+            try:
+                with open(options['csv_path'], newline='', encoding='utf-8-sig') as roster:
+                    report = enroll_roster(course, read_roster(roster), options['chunk_size'])
+            except OSError as exc:
+                raise CommandError(f'Cannot read {options["csv_path"]}: {exc}')
+
+        for identifier in report['unknown_students']:
+            self.stdout.write(f'Unknown student: {identifier}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{course.title}: {report["created"]} enrolled, {report["existing"]} already enrolled, '
+            f'{report["unknown"]} unknown in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,312 @@
+import http.client
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from courses.models import Course, CourseContent
+
+PREFIX = 'loadtest-'
+COURSE_TITLE = 'Load test'
+TOPICS = ['Python', 'Web design', 'Data science', 'Guitar', 'Marketing', 'Photography']
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[1] for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for status, _, _ in samples if not 200 <= status < 400),
+        'rps': len(samples) / elapsed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'queries': sum(queries) / len(queries) if queries else None,
+    }
+
+
+class SessionError(Exception):
+    """A request a session depends on failed; the session is abandoned"""
+
+
+class ConnectionFailed(SessionError):
+    pass
+
+
+class Client:
+    """Keep-alive HTTP/JSON client for one simulated user, recording every request"""
+
+    def __init__(self, base_url, record, timeout):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connect = lambda: connection_class(url.hostname, url.port, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.record = record
+        self.connection = self.connect()
+        self.token = None
+
+    def request(self, name, method, path, body=None, expect=(200,)):
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            status, response_headers, payload = self.send(method, self.prefix + path, body, headers)
+        except (OSError, http.client.HTTPException):
+            self.record(name, 0, (time.perf_counter() - start) * 1000, None)
+            self.connection.close()
+            self.connection = self.connect()
+            raise ConnectionFailed(f'{method} {path}: connection failed')
+        latency = (time.perf_counter() - start) * 1000
+
+        match = QUERY_COUNT.search(response_headers.get('Server-Timing', ''))
+        self.record(name, status, latency, int(match.group(1)) if match else None)
+        if status not in expect:
+            raise SessionError(f'{method} {path}: HTTP {status}')
+        return json.loads(payload) if payload else None
+
+    def send(self, method, path, body, headers):
+        for attempt in range(2):
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once
+                self.connection.close()
+                self.connection = self.connect()
+                if attempt:
+                    raise
+
+    def login(self, username, password):
+        self.token = None
+        tokens = self.request('login', 'POST', '/api/login/', {'username': username, 'password': password})
+        self.token = tokens['access']
+
+
+def results_of(data):
+    """List payloads are plain lists, or {'results': [...]} when paginated"""
+    return data['results'] if isinstance(data, dict) else data
+
+
+class Command(BaseCommand):
+    help = ('Simulate student and lecturer sessions against a running server and report latency '
+            'percentiles, throughput and DB queries per request (from the Server-Timing header)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--students', type=int, default=20, help='Concurrent student sessions')
+        parser.add_argument('--lecturers', type=int, default=2, help='Concurrent lecturer sessions')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to generate load for')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Mean pause in seconds between a user\'s requests')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='loadtest-password')
+        parser.add_argument('--setup', action='store_true',
+                            help=f'Create the {PREFIX}* accounts and recreate their courses (needs the '
+                                 'server\'s database); courses are rebuilt so every run starts equal')
+        parser.add_argument('--courses-per-lecturer', type=int, default=3)
+        parser.add_argument('--lessons', type=int, default=8)
+        parser.add_argument('--save', metavar='PATH', help='Write the results as JSON, e.g. for a baseline')
+        parser.add_argument('--compare', metavar='PATH', help='Compare with results saved by --save')
+
+    def handle(self, *args, **options):
+        if options['setup']:
+            self.setup(options)
+        baseline = self.load(options['compare']) if options['compare'] else None
+
+        samples = defaultdict(list)
+        lock = threading.Lock()
+
+        def record(name, status, latency, queries):
+            with lock:
+                samples[name].append((status, latency, queries))
+
+        deadline = time.monotonic() + options['duration']
+        sessions = [
+            (self.student_session, f'{PREFIX}student-{index}') for index in range(options['students'])
+        ] + [
+            (self.lecturer_session, f'{PREFIX}lecturer-{index}') for index in range(options['lecturers'])
+        ]
+        failures = []
+        threads = [
+            threading.Thread(target=self.run_user, args=(
+                session, username, Client(options['base_url'], record, options['timeout']),
+                random.Random(options['seed'] + index), deadline, options, failures,
+            ))
+            for index, (session, username) in enumerate(sessions)
+        ]
+        self.stdout.write(f'Running {options["students"]} student and {options["lecturers"]} lecturer '
+                          f'sessions against {options["base_url"]} for {options["duration"]:g}s')
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        if not any(samples.values()):
+            raise CommandError('No requests completed; is the server running?')
+        results = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'base_url': options['base_url'],
+            'students': options['students'],
+            'lecturers': options['lecturers'],
+            'duration': elapsed,
+            'total': summarize([sample for values in samples.values() for sample in values], elapsed),
+            'endpoints': {name: summarize(values, elapsed) for name, values in sorted(samples.items())},
+        }
+        self.report(results, baseline)
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f'{len(failures)} sessions abandoned, e.g. {"; ".join(sorted(set(failures))[:3])}'
+            ))
+        if options['save']:
+            with open(options['save'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f'Saved results to {options["save"]}')
+
+    def run_user(self, session, username, client, rng, deadline, options, failures):
+        def pause():
+            if options['think_time']:
+                time.sleep(rng.expovariate(1 / options['think_time']))
+
+        while time.monotonic() < deadline:
+            try:
+                client.login(username, options['password'])
+                session(client, rng, pause)
+            except SessionError as exc:
+                failures.append(str(exc))
+                if isinstance(exc, ConnectionFailed):
+                    # Don't hammer a server that is down or restarting
+                    time.sleep(1)
+                else:
+                    pause()
+
+    def student_session(self, client, rng, pause):
+        """Browse and search the catalog, enroll, study a course and check progress"""
+        client.request('categories', 'GET', '/api/categories/')
+        pause()
+        catalog = results_of(client.request('catalog', 'GET', '/api/courses/'))
+        pause()
+        client.request('search', 'GET', '/api/courses/?' + urlencode({'search': rng.choice(TOPICS).split()[0]}))
+        pause()
+
+        courses = [course for course in catalog if course['title'].startswith(COURSE_TITLE)]
+        if not courses:
+            raise SessionError('no load test courses in the catalog; run with --setup')
+        course = client.request('course_detail', 'GET', f'/api/courses/{rng.choice(courses)["id"]}/')
+        pause()
+        if not course['is_enrolled']:
+            client.request('enroll', 'POST', f'/api/courses/{course["id"]}/enroll/', expect=(200, 201))
+            pause()
+        client.request('my_enrollments', 'GET', '/api/enrollments/')
+        pause()
+
+        # CourseLearning loads the course and its lessons, then marks lessons done
+        client.request('course_detail', 'GET', f'/api/courses/{course["id"]}/')
+        contents = results_of(client.request('contents', 'GET', f'/api/courses/{course["id"]}/contents/'))
+        pause()
+        remaining = [content for content in contents if not content['is_completed']]
+        for content in remaining[:rng.randint(1, 2)]:
+            client.request('mark_complete', 'POST', f'/api/contents/{content["id"]}/complete/')
+            pause()
+        client.request('my_progress', 'GET', '/api/progress/')
+        pause()
+
+    def lecturer_session(self, client, rng, pause):
+        """Open the dashboard and a course's student-progress view"""
+        courses = results_of(client.request('lecturer_courses', 'GET', '/api/courses/'))
+        pause()
+        if not courses:
+            raise SessionError('lecturer has no courses; run with --setup')
+        course = rng.choice(courses)
+        client.request('student_progress', 'GET', f'/api/courses/{course["id"]}/student-progress/')
+        pause()
+        client.request('lecturer_contents', 'GET', f'/api/courses/{course["id"]}/contents/')
+        pause()
+
+    def setup(self, options):
+        password = make_password(options['password'])
+        usernames = [f'{PREFIX}student-{index}' for index in range(options['students'])]
+        lecturer_names = [f'{PREFIX}lecturer-{index}' for index in range(max(options['lecturers'], 1))]
+        existing = set(User.objects.filter(username__startswith=PREFIX).values_list('username', flat=True))
+        User.objects.bulk_create([
+            User(username=username, role=role, password=password)
+            for names, role in ((usernames, 'student'), (lecturer_names, 'lecturer'))
+            for username in names if username not in existing
+        ])
+        User.objects.filter(username__startswith=PREFIX).update(password=password, is_active=True)
+
+        # Rebuilding the courses drops earlier runs' enrollments and progress with them
+        Course.objects.filter(lecturer__username__startswith=PREFIX).delete()
+        rng = random.Random(options['seed'])
+        for lecturer in User.objects.filter(username__in=lecturer_names):
+            for number in range(options['courses_per_lecturer']):
+                topic = rng.choice(TOPICS)
+                course = Course.objects.create(
+                    title=f'{COURSE_TITLE} {topic} {lecturer.username[len(PREFIX):]}-{number}',
+                    description=f'A {topic.lower()} course used for load testing',
+                    price=0, lecturer=lecturer, is_published=True,
+                )
+                for order in range(options['lessons']):
+                    CourseContent.objects.create(
+                        course=course, title=f'Lesson {order + 1}', content_type='text',
+                        content_text='Load test lesson', order=order,
+                    )
+        self.stdout.write(f'Set up {len(usernames)} students and {len(lecturer_names)} lecturers with '
+                          f'{len(lecturer_names) * options["courses_per_lecturer"]} courses')
+
+    def load(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+    def report(self, results, baseline):
+        def cell(value, digits=1):
+            return '-' if value is None else f'{value:,.{digits}f}'
+
+        def change(name, key, value):
+            old = (baseline['endpoints'].get(name) if name != 'total' else baseline['total']) or {}
+            if value is None or not old.get(key):
+                return ''
+            return f' ({(value - old[key]) / old[key]:+.0%})'
+
+        columns = ('rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries')
+        self.stdout.write(f'\n{"endpoint":<18}{"requests":>9}{"errors":>8}' +
+                          ''.join(f'{column:>16}' for column in columns))
+        rows = list(results['endpoints'].items()) + [('total', results['total'])]
+        for name, stats in rows:
+            cells = []
+            for column in columns:
+                text = cell(stats[column])
+                if baseline:
+                    text += change(name, column, stats[column])
+                cells.append(f'{text:>16}')
+            self.stdout.write(f'{name:<18}{stats["requests"]:>9}{stats["errors"]:>8}' + ''.join(cells))
+        if baseline:
+            self.stdout.write(f'Changes are relative to the baseline from {baseline["started_at"]}')
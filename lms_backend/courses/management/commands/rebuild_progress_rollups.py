@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.progress import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Course.content_count and Enrollment.completed_count/last_activity_at from source rows'
+
+    def handle(self, *args, **options):
+        courses, enrollments = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {courses} courses and {enrollments} enrollments'))
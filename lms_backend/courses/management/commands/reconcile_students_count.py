@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from courses.cache import course_cache
+from courses.models import Course, Enrollment
+
+
+class Command(BaseCommand):
+    help = 'Reconcile Course.students_count with the Enrollment table (safe to run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted courses without updating them')
+
+    def handle(self, *args, **options):
+        drifted = Course.objects.annotate(
+            actual_count=self.actual_count()
+        ).exclude(students_count=F('actual_count')).values_list('id', 'students_count', 'actual_count')
+
+        batch = []
+        fixed = 0
+        for course_id, stored, actual in drifted.iterator(chunk_size=options['batch_size']):
+            self.stdout.write(f'Course {course_id}: students_count {stored} -> {actual}')
+            batch.append(course_id)
+            if len(batch) >= options['batch_size']:
+                fixed += self.save(batch, options['dry_run'])
+                batch = []
+        fixed += self.save(batch, options['dry_run'])
+
+        verb = 'Would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} courses'))
+
+    def actual_count(self):
+        enrolled = Enrollment.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course').annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(enrolled), 0)
+
+    def save(self, course_ids, dry_run):
+        # The count is taken in the UPDATE itself, so increments made since the drift
+        # was found are counted rather than overwritten; only the counter is written
+        if course_ids and not dry_run:
+            with transaction.atomic():
+                Course.objects.filter(id__in=course_ids).update(students_count=self.actual_count())
+                transaction.on_commit(lambda: course_cache.bump(*course_ids))
+        return len(course_ids)
@@ -0,0 +1,251 @@
+import itertools
+import random
+import time
+from bisect import bisect_left
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from courses.models import Category, Course, CourseContent, Enrollment, LearningProgress
+from courses.ordering import ORDER_GAP
+from courses.search import index_courses
+
+PREFIX = 'seed-'
+TOPICS = {
+    'Programming': 'python java rust golang algorithms debugging',
+    'Web Development': 'django react javascript css html api',
+    'Data Science': 'pandas statistics machine learning visualisation',
+    'Design': 'figma typography color layout branding',
+    'Business': 'finance startup strategy leadership negotiation',
+    'Music': 'guitar piano theory production mixing',
+    'Photography': 'lighting portrait landscape editing camera',
+    'Language': 'spanish french german japanese grammar vocabulary',
+}
+LEVELS = ['Introduction to', 'Practical', 'Advanced', 'Mastering', 'Complete guide to']
+CONTENT_TYPES = ['video'] * 7 + ['text'] * 2 + ['pdf']
+VIDEO_SECONDS = 600
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = ('Generate a large synthetic dataset (students, courses, lessons, enrollments and progress) '
+            'with chunked bulk_create; the same --seed always produces the same data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100000)
+        parser.add_argument('--lecturers', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=5000)
+        parser.add_argument('--lessons', type=int, default=200, help='Lessons per course')
+        parser.add_argument('--enrollments-per-student', type=float, default=8, help='Mean; exponentially distributed')
+        parser.add_argument('--lessons-per-enrollment', type=float, default=6,
+                            help='Mean lessons completed before a student drops off (a few finish everything)')
+        parser.add_argument('--finish-rate', type=float, default=0.02, help='Share of enrollments completed fully')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent of course popularity (0 = uniform)')
+        parser.add_argument('--password', help='Password for every seeded account (default: unusable)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f'Users named {PREFIX}* already exist; seed an empty database '
+                               '(e.g. DB_ENGINE=sqlite DB_NAME=/tmp/lms-seed.sqlite3 manage.py migrate)')
+        if options['courses'] < 1 or options['lessons'] < 1 or options['lecturers'] < 1:
+            raise CommandError('--courses, --lessons and --lecturers must be at least 1')
+        self.options = options
+        self.batch_size = options['batch_size']
+        # Adapted once for the raw inserts (e.g. a naive UTC string on SQLite)
+        self.db_now = connection.ops.adapt_datetimefield_value(timezone.now())
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        categories = self.step('categories', self.create_categories)
+        password = make_password(options['password'])
+        lecturer_ids = self.step('lecturers', lambda: self.create_users('lecturer', options['lecturers'], password))
+        student_ids = self.step('students', lambda: self.create_users('student', options['students'], password))
+        # Enrollments are planned first so the denormalized counters can be written with the rows
+        plan = self.step('enrollment plan', lambda: self.plan_enrollments(rng, len(student_ids)))
+        course_ids = self.step('courses', lambda: self.create_courses(rng, categories, lecturer_ids, plan))
+        content_ids = self.step('lessons', lambda: self.create_lessons(rng, course_ids),
+                                count=lambda contents: sum(map(len, contents.values())))
+        self.step('enrollments', lambda: self.create_enrollments(plan, student_ids, course_ids))
+        self.step('progress', lambda: self.create_progress(rng, plan, student_ids, course_ids, content_ids))
+        self.step('search index', lambda: self.index(course_ids))
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.0f}s'))
+
+    def step(self, name, build, count=len):
+        start = time.perf_counter()
+        result = build()
+        rows = result if isinstance(result, int) else count(result)
+        self.stdout.write(f'{name:<16}{rows:>12,} in {time.perf_counter() - start:6.1f}s')
+        return result
+
+    def bulk_create(self, model, objects):
+        """Insert `objects` in chunks, each committed on its own, so memory and the
+        transaction log stay flat; returns the row count"""
+        total = 0
+        for chunk in chunks(objects, self.batch_size):
+            model.objects.bulk_create(chunk, batch_size=self.batch_size)
+            total += len(chunk)
+        return total
+
+    def insert_rows(self, model, fields, rows):
+        """Chunked executemany INSERT of ready-made value tuples for the multi-million-row
+        tables, where bulk_create's per-value compilation caps out around 10k rows/s"""
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+        total = 0
+        with connection.cursor() as cursor:
+            for chunk in chunks(rows, self.batch_size):
+                with transaction.atomic():
+                    cursor.executemany(sql, chunk)
+                total += len(chunk)
+        return total
+
+    def create_categories(self):
+        return [
+            Category.objects.get_or_create(name=name, defaults={'description': f'{name} courses'})[0]
+            for name in TOPICS
+        ]
+
+    def create_users(self, role, count, password):
+        prefix = f'{PREFIX}{role}-'
+        self.bulk_create(User, (
+            User(username=f'{prefix}{index:07d}', email=f'{prefix}{index}@example.com', role=role, password=password)
+            for index in range(count)
+        ))
+        # bulk_create doesn't return primary keys on every backend; ids follow insertion order
+        return list(User.objects.filter(username__startswith=prefix).order_by('id').values_list('id', flat=True))
+
+    def plan_enrollments(self, rng, students):
+        """[(student index, course index, lessons completed, next lesson started)] with Zipf-skewed course popularity"""
+        courses = self.options['courses']
+        lessons = self.options['lessons']
+        # Popularity rank is shuffled so popular courses are spread over ids and lecturers
+        ranks = list(range(courses))
+        rng.shuffle(ranks)
+        cumulative = list(itertools.accumulate(1 / (rank + 1) ** self.options['skew'] for rank in ranks))
+        total = cumulative[-1]
+        extra_mean = max(self.options['enrollments_per_student'] - 1, 0)
+        depth_mean = self.options['lessons_per_enrollment']
+
+        plan = []
+        for student in range(students):
+            wanted = min(1 + (int(rng.expovariate(1 / extra_mean)) if extra_mean else 0), courses)
+            picked = set()
+            # Popular courses collide often; give up after a few rounds rather than loop forever
+            for _ in range(4):
+                picked.update(
+                    bisect_left(cumulative, rng.random() * total) for _ in range(wanted - len(picked))
+                )
+                if len(picked) >= wanted:
+                    break
+            for course in sorted(picked):
+                if rng.random() < self.options['finish_rate']:
+                    completed = lessons
+                else:
+                    completed = min(int(rng.expovariate(1 / depth_mean)) if depth_mean else 0, lessons)
+                # Half the students who dropped off are part-way through their next lesson
+                started = completed < lessons and rng.random() < 0.5
+                plan.append((student, course, completed, started))
+        return plan
+
+    def create_courses(self, rng, categories, lecturer_ids, plan):
+        students_count = [0] * self.options['courses']
+        for _, course, _, _ in plan:
+            students_count[course] += 1
+
+        def build():
+            for index in range(self.options['courses']):
+                category = categories[index % len(categories)]
+                words = TOPICS[category.name].split()
+                topic = rng.choice(words)
+                yield Course(
+                    title=f'{rng.choice(LEVELS)} {topic.title()} {index}',
+                    description=f'{category.name} course covering {", ".join(rng.sample(words, 3))}.',
+                    price=Decimal(rng.choice([0, 9, 19, 49, 99, 199])),
+                    category=category,
+                    difficulty=rng.choice(['beginner', 'intermediate', 'advanced']),
+                    lecturer_id=rng.choice(lecturer_ids),
+                    is_published=rng.random() < 0.95,
+                    duration_hours=rng.randint(1, 60),
+                    students_count=students_count[index],
+                    content_count=self.options['lessons'],
+                )
+
+        first_id = Course.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk_create(Course, build())
+        return list(Course.objects.filter(id__gt=first_id).order_by('id').values_list('id', flat=True))
+
+    def create_lessons(self, rng, course_ids):
+        """Returns {course id: [content ids in lesson order]}"""
+        now = self.db_now
+
+        def build():
+            for course_id in course_ids:
+                for order in range(self.options['lessons']):
+                    content_type = rng.choice(CONTENT_TYPES)
+                    yield (
+                        course_id, f'Lesson {order + 1}', '', content_type,
+                        'https://www.youtube.com/watch?v=dQw4w9WgXcQ' if content_type == 'video' else None,
+                        'https://example.com/lesson.pdf' if content_type == 'pdf' else None,
+                        'Lesson notes' if content_type == 'text' else '',
+                        (order + 1) * ORDER_GAP, now, now,
+                    )
+
+        self.insert_rows(CourseContent, (
+            'course', 'title', 'description', 'content_type', 'video_url', 'file_url', 'content_text',
+            'order', 'created_at', 'updated_at',
+        ), build())
+        contents = {course_id: [] for course_id in course_ids}
+        rows = CourseContent.objects.filter(
+            course_id__gte=course_ids[0], course_id__lte=course_ids[-1]
+        ).order_by('course_id', 'order', 'id').values_list('course_id', 'id')
+        for course_id, content_id in rows.iterator(chunk_size=self.batch_size):
+            contents[course_id].append(content_id)
+        return contents
+
+    def create_enrollments(self, plan, student_ids, course_ids):
+        now = self.db_now
+        return self.insert_rows(Enrollment, ('student', 'course', 'enrolled_at', 'completed_count', 'last_activity_at'), (
+            (student_ids[student], course_ids[course], now, completed, now if completed or started else None)
+            for student, course, completed, started in plan
+        ))
+
+    def create_progress(self, rng, plan, student_ids, course_ids, content_ids):
+        now = self.db_now
+
+        def build():
+            for student, course, completed, started in plan:
+                student_id = student_ids[student]
+                lessons = content_ids[course_ids[course]]
+                for content_id in lessons[:completed]:
+                    yield student_id, content_id, True, now, VIDEO_SECONDS, VIDEO_SECONDS, now, now
+                if started:
+                    position = rng.uniform(0, VIDEO_SECONDS)
+                    yield student_id, lessons[completed], False, None, position, position, now, now
+
+        return self.insert_rows(LearningProgress, (
+            'student', 'content', 'completed', 'completed_at', 'position_seconds', 'watched_seconds',
+            'created_at', 'updated_at',
+        ), build())
+
+    def index(self, course_ids):
+        courses = Course.objects.filter(
+            id__gte=course_ids[0], id__lte=course_ids[-1]
+        ).select_related('category').order_by('id')
+        for chunk in chunks(courses.iterator(chunk_size=1000), 1000):
+            index_courses(chunk)
+        return len(course_ids)
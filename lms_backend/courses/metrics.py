@@ -0,0 +1,14 @@
+"""Course app counters read into the project metrics registry at scrape time"""
+from .cache import category_cache, course_cache
+from .heartbeats import heartbeat_buffer
+
+
+def collect():
+    samples = []
+    for name, cache in (('category', category_cache), ('course', course_cache)):
+        stats = cache.stats()
+        samples.append(('lms_cache_hits_total', {'cache': name}, stats['hits']))
+        samples.append(('lms_cache_misses_total', {'cache': name}, stats['misses']))
+    samples.append(('lms_heartbeats_received_total', {}, heartbeat_buffer.received))
+    samples.append(('lms_progress_writes_total', {'source': 'heartbeat'}, heartbeat_buffer.flushed_rows))
+    return samples
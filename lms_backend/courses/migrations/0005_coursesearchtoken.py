@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from courses.search import build_token_weights
+
+    Course = apps.get_model('courses', 'Course')
+    CourseSearchToken = apps.get_model('courses', 'CourseSearchToken')
+    rows = []
+    for course in Course.objects.select_related('category').iterator(chunk_size=1000):
+        category_name = course.category.name if course.category_id else ''
+        weights = build_token_weights(course.title, course.description, category_name)
+        rows.extend(
+            CourseSearchToken(course_id=course.id, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+        if len(rows) >= 5000:
+            CourseSearchToken.objects.bulk_create(rows)
+            rows = []
+    CourseSearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_category_course_difficulty_course_duration_hours_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField(default=0, help_text='Relevance weight of the token for this course')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='courses.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token'], name='courses_search_token_idx', opclasses=['varchar_pattern_ops'])],
+                'unique_together': {('token', 'course')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
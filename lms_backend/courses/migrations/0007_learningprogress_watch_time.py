@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningprogress',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, help_text='Video duration reported by the player', null=True),
+        ),
+        migrations.AddField(
+            model_name='learningprogress',
+            name='position_seconds',
+            field=models.FloatField(default=0, help_text='Last reported video playback position'),
+        ),
+        migrations.AddField(
+            model_name='learningprogress',
+            name='watched_seconds',
+            field=models.FloatField(default=0, help_text='Total video watch time'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:04
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_rollups(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseContent = apps.get_model('courses', 'CourseContent')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    LearningProgress = apps.get_model('courses', 'LearningProgress')
+
+    content_count = CourseContent.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(count=Count('id')).values('count')
+    Course.objects.update(content_count=Coalesce(Subquery(content_count), 0))
+
+    progress = LearningProgress.objects.filter(
+        student=OuterRef('student'), content__course=OuterRef('course')
+    ).order_by().values('student')
+    Enrollment.objects.update(
+        completed_count=Coalesce(
+            Subquery(progress.filter(completed=True).annotate(count=Count('id')).values('count')), 0
+        ),
+        last_activity_at=Subquery(progress.annotate(last=Max('updated_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_learningprogress_watch_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='content_count',
+            field=models.IntegerField(default=0, help_text='Number of content items'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_count',
+            field=models.IntegerField(default=0, help_text='Number of course contents the student has completed'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, help_text="Last time the student's progress changed", null=True),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
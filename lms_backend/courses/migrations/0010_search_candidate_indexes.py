@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursesearchtoken',
+            index=models.Index(fields=['token', '-weight', '-course'], name='courses_search_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursesearchtoken',
+            index=models.Index(fields=['course', 'token', 'weight'], name='courses_search_course_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_search_candidate_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='coursesearchtoken',
+            name='courses_search_rank_idx',
+        ),
+    ]
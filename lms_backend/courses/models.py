@@ -34,12 +34,26 @@ class Course(models.Model):
     thumbnail_url = models.URLField(blank=True, null=True)
     duration_hours = models.IntegerField(default=0, help_text="Estimated course duration in hours")
     students_count = models.IntegerField(default=0, help_text="Number of enrolled students")
+    content_count = models.IntegerField(default=0, help_text="Number of content items")
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['category', 'is_published']),
             models.Index(fields=['title']),
+            # Keyset pagination: each catalog sort order with id as the tiebreaker
+            models.Index(fields=['created_at', 'id'], name='courses_cou_created_keyset_idx'),
+            models.Index(fields=['price', 'id'], name='courses_cou_price_keyset_idx'),
+            models.Index(fields=['title', 'id'], name='courses_cou_title_keyset_idx'),
+            models.Index(fields=['students_count', 'id'], name='courses_cou_stucnt_keyset_idx'),
+            # Published catalog: default and popularity sorts, and the ETag aggregate. The
+            # sort indexes serve MySQL (is_published = 1) and PostgreSQL; SQLite can't
+            # seek on the bare boolean Django emits and walks the keyset indexes above
+            models.Index(fields=['is_published', 'created_at', 'id'], name='courses_cou_pub_created_idx'),
+            models.Index(fields=['is_published', 'students_count', 'id'], name='courses_cou_pub_stucnt_idx'),
+            models.Index(fields=['is_published', 'updated_at', 'students_count'], name='courses_cou_pub_state_idx'),
+            # Lecturer dashboard: own courses, newest first
+            models.Index(fields=['lecturer', 'created_at'], name='courses_cou_lect_created_idx'),
         ]
 
     def __str__(self):
@@ -50,10 +64,17 @@ class Enrollment(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='enrollments', limit_choices_to={'role': 'student'})
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    completed_count = models.IntegerField(default=0, help_text="Number of course contents the student has completed")
+    last_activity_at = models.DateTimeField(null=True, blank=True, help_text="Last time the student's progress changed")
     
     class Meta:
         unique_together = ['student', 'course']
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['student', 'enrolled_at', 'id'], name='courses_enr_student_keyset_idx'),
+            # Course roster pages (student progress report) walk enrollments by id
+            models.Index(fields=['course', 'id'], name='courses_enr_course_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} enrolled in {self.course.title}"
@@ -79,6 +100,9 @@ class CourseContent(models.Model):
     
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['course', 'order', 'created_at', 'id'], name='courses_con_course_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.content_type}) - {self.course.title}"
@@ -90,6 +114,9 @@ class LearningProgress(models.Model):
     content = models.ForeignKey(CourseContent, on_delete=models.CASCADE, related_name='progress')
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
+    position_seconds = models.FloatField(default=0, help_text="Last reported video playback position")
+    watched_seconds = models.FloatField(default=0, help_text="Total video watch time")
+    duration_seconds = models.FloatField(null=True, blank=True, help_text="Video duration reported by the player")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -102,9 +129,29 @@ class LearningProgress(models.Model):
         return f"{self.student.username} - {self.content.title} ({status})"
     
     def save(self, *args, **kwargs):
+        from django.utils import timezone
         if self.completed and not self.completed_at:
-            from django.utils import timezone
             self.completed_at = timezone.now()
         elif not self.completed:
             self.completed_at = None
         super().save(*args, **kwargs)
+
+
+class CourseSearchToken(models.Model):
+    """Inverted index entry: a token appearing in a course's title, description or category"""
+    token = models.CharField(max_length=50)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='search_tokens')
+    weight = models.PositiveIntegerField(default=0, help_text="Relevance weight of the token for this course")
+
+    class Meta:
+        unique_together = ['token', 'course']
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL use the index for prefix LIKE lookups;
+            # other backends ignore the operator class
+            models.Index(fields=['token'], name='courses_search_token_idx', opclasses=['varchar_pattern_ops']),
+            # Sums a course's matching weights without reading all of its tokens
+            models.Index(fields=['course', 'token', 'weight'], name='courses_search_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.course_id}"
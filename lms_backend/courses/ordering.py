@@ -0,0 +1,84 @@
+"""Sparse (gap-based) ordering of course contents"""
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CourseContent
+
+# Distance between consecutive order keys; a move takes the midpoint of its
+# neighbours, so about log2(ORDER_GAP) moves into the same slot fit before a rebalance
+ORDER_GAP = 1024
+
+
+class OrderingError(ValueError):
+    """A reorder request that doesn't match the course's contents; the message is safe to show"""
+
+
+def next_order(course):
+    """Order key that appends after the course's current last content"""
+    last = CourseContent.objects.filter(course=course).aggregate(Max('order'))['order__max']
+    return (last or 0) + ORDER_GAP
+
+
+def get_ordered_contents(course):
+    return list(
+        CourseContent.objects.filter(course=course)
+        .order_by('order', 'created_at', 'id')
+        .only('id', 'order')
+    )
+
+
+def _save_orders(contents, keys):
+    """Write the new keys of changed rows in a single bulk UPDATE"""
+    now = timezone.now()
+    changed = []
+    for content, key in zip(contents, keys):
+        if content.order != key:
+            content.order = key
+            # bulk_update bypasses auto_now; keep updated_at current for ETags
+            content.updated_at = now
+            changed.append(content)
+    if changed:
+        CourseContent.objects.bulk_update(changed, ['order', 'updated_at'])
+    return contents
+
+
+def rebalance(course):
+    """Respace all contents of a course ORDER_GAP apart, keeping their order"""
+    contents = get_ordered_contents(course)
+    return _save_orders(contents, [(index + 1) * ORDER_GAP for index in range(len(contents))])
+
+
+def apply_ordering(course, content_ids):
+    """Reorder a course's contents to match `content_ids`, which must list every content once"""
+    contents = {content.id: content for content in get_ordered_contents(course)}
+    if len(content_ids) != len(contents) or set(content_ids) != set(contents):
+        raise OrderingError('content_ids must list every content of the course exactly once')
+    ordered = [contents[content_id] for content_id in content_ids]
+    with transaction.atomic():
+        return _save_orders(ordered, [(index + 1) * ORDER_GAP for index in range(len(ordered))])
+
+
+def move_content(course, content_id, after_id=None):
+    """Move one content after `after_id` (or to the start), normally updating a single row"""
+    contents = get_ordered_contents(course)
+    ids = [content.id for content in contents]
+    if content_id not in ids or (after_id is not None and after_id not in ids):
+        raise OrderingError('Content not found in this course')
+    if content_id == after_id:
+        return contents
+
+    with transaction.atomic():
+        moving = contents.pop(ids.index(content_id))
+        position = 0 if after_id is None else [c.id for c in contents].index(after_id) + 1
+        previous_key = contents[position - 1].order if position > 0 else 0
+        next_key = contents[position].order if position < len(contents) else previous_key + 2 * ORDER_GAP
+
+        if next_key - previous_key < 2:
+            # No integer key left between the neighbours: respace the whole course
+            contents.insert(position, moving)
+            return _save_orders(contents, [(index + 1) * ORDER_GAP for index in range(len(contents))])
+
+        _save_orders([moving], [(previous_key + next_key) // 2])
+        contents.insert(position, moving)
+        return contents
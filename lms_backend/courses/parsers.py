@@ -0,0 +1,37 @@
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list, one object per non-blank line"""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        rows = []
+        for line_number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {line_number} - {exc}')
+        return rows
+
+
+class CSVParser(BaseParser):
+    """Parse a CSV request body into its decoded lines (read them with csv.reader)"""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        try:
+            # utf-8-sig drops the byte order mark spreadsheet exports start with
+            return stream.read().decode('utf-8-sig' if encoding.lower() == 'utf-8' else encoding).splitlines()
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'CSV parse error - {exc}')
@@ -0,0 +1,226 @@
+"""Set-based helpers for building student progress reports"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Course, CourseContent, Enrollment, LearningProgress
+
+
+def get_course_contents(course):
+    """Return the course contents in display order (one query)"""
+    return list(
+        CourseContent.objects.filter(course=course)
+        .order_by('order', 'created_at')
+        .only('id', 'title', 'order', 'created_at')
+    )
+
+
+def get_completions(course, student_ids):
+    """Map student_id -> {content_id: completed_at} for the given students (one query)"""
+    completions = defaultdict(dict)
+    if not student_ids:
+        return completions
+    rows = LearningProgress.objects.filter(
+        content__course=course,
+        student_id__in=student_ids,
+        completed=True,
+    ).order_by().values_list('student_id', 'content_id', 'completed_at')
+    for student_id, content_id, completed_at in rows:
+        completions[student_id][content_id] = completed_at
+    return completions
+
+
+def build_student_rows(course, enrollments, contents):
+    """Build the student x content progress matrix for a batch of enrollments.
+
+    `enrollments` must have `student` selected; the whole batch costs a single
+    LearningProgress query regardless of how many students or contents it covers.
+    """
+    enrollments = list(enrollments)
+    total_content = len(contents)
+    completions = get_completions(course, [e.student_id for e in enrollments])
+
+    rows = []
+    for enrollment in enrollments:
+        student = enrollment.student
+        completed = completions.get(student.id, {})
+        content_progress = [
+            {
+                'content_id': content.id,
+                'content_title': content.title,
+                'completed': content.id in completed,
+                'completed_at': completed.get(content.id),
+            }
+            for content in contents
+        ]
+        completed_content = len(completed)
+        progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
+        rows.append({
+            'student_id': student.id,
+            'student_name': student.username,
+            'student_email': student.email,
+            'enrolled_at': enrollment.enrolled_at,
+            'total_content': total_content,
+            'completed_content': completed_content,
+            'progress_percentage': round(progress_percentage, 2),
+            'content_progress': content_progress,
+        })
+    return rows
+
+
+def get_progress_summaries(student):
+    """Per-course totals for the student's enrollments, as a values() queryset (one query)"""
+    # Totals and completed counts are denormalized rollups kept current on write,
+    # so the report is a single indexed read however many courses are enrolled
+    return Enrollment.objects.filter(student=student).annotate(
+        total_content=F('course__content_count'),
+        completed_content=F('completed_count'),
+    ).values('course_id', 'course__title', 'total_content', 'completed_content')
+
+
+def summarize_enrollment(student, enrollment):
+    """Build a CourseProgressSerializer row from a get_progress_summaries() row"""
+    total_content = enrollment['total_content']
+    completed_content = enrollment['completed_content']
+    progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
+    return {
+        'course_id': enrollment['course_id'],
+        'course_title': enrollment['course__title'],
+        'total_content': total_content,
+        'completed_content': completed_content,
+        'progress_percentage': round(progress_percentage, 2),
+        'student_name': student.username,
+        'student_id': student.id,
+    }
+
+
+# Columns of the progress export, in output order
+EXPORT_FIELDS = (
+    'student_id', 'student_name', 'student_email', 'enrolled_at', 'last_activity_at',
+    'completed_content', 'total_content', 'progress_percentage', 'status',
+)
+EXPORT_STATUSES = ('not_started', 'in_progress', 'completed')
+
+
+def get_export_rows(course, enrolled_after=None, enrolled_before=None, status=None):
+    """values() of a course's enrollments for the progress export, in enrollment order.
+
+    Completion comes from the denormalized rollups, so this is a single query
+    that can be streamed with `.iterator()` however many students are enrolled.
+    """
+    enrollments = Enrollment.objects.filter(course=course)
+    if enrolled_after:
+        enrollments = enrollments.filter(enrolled_at__gte=enrolled_after)
+    if enrolled_before:
+        enrollments = enrollments.filter(enrolled_at__lt=enrolled_before)
+    total_content = course.content_count
+    if status == 'not_started':
+        enrollments = enrollments.filter(completed_count__lte=0)
+    elif status == 'in_progress':
+        enrollments = enrollments.filter(completed_count__gt=0, completed_count__lt=total_content)
+    elif status == 'completed':
+        enrollments = enrollments.filter(completed_count__gte=total_content) if total_content else enrollments.none()
+    # values() rather than values_list(): only its iterable is lazy enough for aiterator()
+    return enrollments.order_by('id').values(
+        'student_id', 'student__username', 'student__email', 'enrolled_at', 'last_activity_at', 'completed_count'
+    )
+
+
+def build_export_row(enrollment, total_content):
+    """Turn a get_export_rows() row into an EXPORT_FIELDS dict"""
+    completed_content = enrollment['completed_count']
+    last_activity_at = enrollment['last_activity_at']
+    if total_content and completed_content >= total_content:
+        status = 'completed'
+    else:
+        status = 'in_progress' if completed_content > 0 else 'not_started'
+    progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
+    return {
+        'student_id': enrollment['student_id'],
+        'student_name': enrollment['student__username'],
+        'student_email': enrollment['student__email'],
+        'enrolled_at': enrollment['enrolled_at'].isoformat(),
+        'last_activity_at': last_activity_at.isoformat() if last_activity_at else None,
+        'completed_content': completed_content,
+        'total_content': total_content,
+        'progress_percentage': round(progress_percentage, 2),
+        'status': status,
+    }
+
+
+def upsert_progress(rows, fields=('completed', 'completed_at')):
+    """Insert or update LearningProgress rows (and their updated_at) in a single statement"""
+    kwargs = {}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = ['student', 'content']
+    LearningProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        update_fields=[*fields, 'updated_at'],
+        **kwargs
+    )
+
+
+def completed_count():
+    """Expression counting an enrollment's completed contents, for Enrollment updates"""
+    completed = LearningProgress.objects.filter(
+        student=OuterRef('student'), content__course=OuterRef('course'), completed=True
+    ).order_by().values('student').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(completed), 0)
+
+
+def lock_enrollments(pairs):
+    """Lock the enrollments of (student_id, course_id) pairs and return their ids.
+
+    Progress writers call this first in their transaction, so writers of the same
+    enrollment take turns and the recount in `apply_progress_changes()` sees
+    every completion committed before the lock was granted. Rows are locked in
+    id order so that overlapping batches can't deadlock.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return []
+    student_ids = {student_id for student_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    enrollments = Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+    if len(student_ids) > 1 and len(course_ids) > 1:
+        # The filter covers every student x course combination; find the requested
+        # pairs without locking so no other enrollment is held
+        enrollments = Enrollment.objects.filter(id__in=[
+            enrollment_id for enrollment_id, student_id, course_id
+            in enrollments.values_list('id', 'student_id', 'course_id')
+            if (student_id, course_id) in pairs
+        ])
+    return list(enrollments.select_for_update().order_by('id').values_list('id', flat=True))
+
+
+def apply_progress_changes(enrollment_ids, now):
+    """Recount completed_count and set `last_activity_at = now` on the enrollments in one UPDATE.
+
+    Counting in the UPDATE rather than adding deltas keeps the rollup exact when
+    two requests complete the same content; lock the rows with `lock_enrollments()`
+    before writing the progress rows.
+    """
+    if enrollment_ids:
+        Enrollment.objects.filter(id__in=enrollment_ids).update(
+            completed_count=completed_count(), last_activity_at=now
+        )
+
+
+def rebuild_rollups():
+    """Recompute Course.content_count and Enrollment.completed_count/last_activity_at from source rows"""
+    content_count = CourseContent.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(count=Count('id')).values('count')
+    progress = LearningProgress.objects.filter(
+        student=OuterRef('student'), content__course=OuterRef('course')
+    ).order_by().values('student')
+    with transaction.atomic():
+        courses = Course.objects.update(content_count=Coalesce(Subquery(content_count), 0))
+        enrollments = Enrollment.objects.update(
+            completed_count=completed_count(),
+            last_activity_at=Subquery(progress.annotate(last=Max('updated_at')).values('last')),
+        )
+    return courses, enrollments
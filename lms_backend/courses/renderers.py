@@ -0,0 +1,58 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class Echo:
+    """Write target that hands back what it is given, so csv.writer produces strings"""
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """Row-oriented renderer that can also encode a header and single rows for streaming.
+
+    `render()` takes a list of flat dicts, or a single dict (e.g. an error), and
+    uses the keys of the first row as the columns.
+    """
+    charset = 'utf-8'
+
+    def render_header(self, fields):
+        return ''
+
+    def render_row(self, row, fields):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = [data] if isinstance(data, dict) else list(data or [])
+        if not rows:
+            return b''
+        fields = list(rows[0])
+        lines = [self.render_header(fields)] + [self.render_row(row, fields) for row in rows]
+        return ''.join(lines).encode(self.charset)
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(Echo())
+
+    def render_header(self, fields):
+        return self.writer.writerow(fields)
+
+    def render_row(self, row, fields):
+        return self.writer.writerow([row.get(field) for field in fields])
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Newline-delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_row(self, row, fields):
+        return json.dumps(row, cls=JSONEncoder) + '\n'
@@ -0,0 +1,90 @@
+"""Bulk enrollment of a course roster (usernames or emails)"""
+import csv
+import itertools
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import User
+from lms_backend.metrics import registry as metrics
+from .cache import course_cache
+from .models import Course, Enrollment
+
+# First cells recognised as a header row rather than a student
+HEADER_NAMES = {'username', 'email', 'student', 'user'}
+# Unknown identifiers echoed back in the report; the count covers all of them
+MAX_REPORTED_UNKNOWN = 100
+
+
+def read_roster(lines):
+    """Yield the student identifier (first non-blank cell) of each CSV row, skipping a header"""
+    for index, row in enumerate(csv.reader(lines)):
+        cells = [cell.strip() for cell in row if cell.strip()]
+        if not cells:
+            continue
+        if index == 0 and cells[0].lower() in HEADER_NAMES:
+            continue
+        yield cells[0]
+
+
+def enroll_roster(course, identifiers, chunk_size=1000):
+    """Enroll every student named in `identifiers` (usernames or emails) in `course`.
+
+    Each chunk costs one IN query to resolve the students, one to find those
+    already enrolled and one conflict-tolerant bulk insert, so concurrent
+    self-enrollments can't fail the import. `students_count` is recounted once
+    at the end. Returns the created/existing/unknown counts and the first
+    unknown identifiers.
+    """
+    report = {'created': 0, 'existing': 0, 'unknown': 0, 'unknown_students': []}
+    with transaction.atomic():
+        iterator = iter(identifiers)
+        while chunk := set(itertools.islice(iterator, chunk_size)):
+            enroll_chunk(course, chunk, report)
+        if report['created']:
+            # Recounted rather than incremented: rows skipped as conflicts aren't new enrollments
+            Course.objects.filter(pk=course.pk).update(students_count=enrolled_count())
+            transaction.on_commit(lambda: course_cache.bump(course.pk))
+    if report['created']:
+        metrics.inc('lms_enrollments_total', value=report['created'])
+    return report
+
+
+def enrolled_count():
+    """Expression counting a course's enrollments, for Course updates"""
+    enrolled = Enrollment.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(enrolled), 0)
+
+
+def enroll_chunk(course, identifiers, report):
+    # Usernames may contain '@' too, so those identifiers are tried against both columns
+    emails = {identifier for identifier in identifiers if '@' in identifier}
+    students = User.objects.filter(
+        Q(username__in=identifiers) | Q(email__in=emails), role='student'
+    ).values_list('id', 'username', 'email')
+
+    student_ids = set()
+    found = set()
+    for student_id, username, email in students:
+        student_ids.add(student_id)
+        found.update((username.lower(), email.lower()))
+    # Compared case-insensitively: MySQL's default collation matches identifiers that way
+    unknown = sorted(identifier for identifier in identifiers if identifier.lower() not in found)
+    report['unknown'] += len(unknown)
+    report['unknown_students'].extend(unknown[:MAX_REPORTED_UNKNOWN - len(report['unknown_students'])])
+
+    existing = set(
+        Enrollment.objects.filter(course=course, student_id__in=student_ids).values_list('student_id', flat=True)
+    )
+    new_ids = student_ids - existing
+    # A student enrolling themselves meanwhile is skipped by the unique constraint
+    # (and reported as created; the counter is recounted at the end)
+    Enrollment.objects.bulk_create(
+        [Enrollment(course=course, student_id=student_id) for student_id in new_ids],
+        ignore_conflicts=True,
+    )
+    report['created'] += len(new_ids)
+    report['existing'] += len(existing)
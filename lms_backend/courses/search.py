@@ -0,0 +1,118 @@
+"""Token index and ranked search over the course catalog"""
+import re
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+
+from .models import Course, CourseSearchToken
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKEN_LENGTH = 50
+MAX_QUERY_TERMS = 8
+
+# Relevance weight of a single occurrence of a token in each field
+TITLE_WEIGHT = 10
+CATEGORY_WEIGHT = 5
+DESCRIPTION_WEIGHT = 1
+
+# Course fields that feed the index; saves touching none of them skip re-indexing
+INDEXED_FIELDS = {'title', 'description', 'category', 'category_id'}
+
+def tokenize(text, min_length=2):
+    """Split text into lower-cased index tokens"""
+    if not text:
+        return []
+    return [
+        token[:MAX_TOKEN_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if len(token) >= min_length or token.isdigit()
+    ]
+
+
+def build_token_weights(title, description, category_name):
+    """Return {token: weight} for a course's searchable text"""
+    weights = Counter()
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    for token in tokenize(category_name):
+        weights[token] += CATEGORY_WEIGHT
+    for token in tokenize(description):
+        weights[token] += DESCRIPTION_WEIGHT
+    return weights
+
+
+def index_courses(courses):
+    """Rebuild the index rows of the given courses (category must be selectable)"""
+    courses = list(courses)
+    rows = []
+    for course in courses:
+        category_name = course.category.name if course.category_id else ''
+        weights = build_token_weights(course.title, course.description, category_name)
+        rows.extend(
+            CourseSearchToken(course=course, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+    with transaction.atomic():
+        CourseSearchToken.objects.filter(course__in=courses).delete()
+        CourseSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+def index_course(course):
+    index_courses([course])
+
+
+def prefix_match(term, field='token'):
+    """Q object matching index tokens that start with `term`, in an index-friendly form"""
+    if connection.vendor == 'sqlite':
+        # SQLite only uses an index for LIKE under a NOCASE collation, so express the
+        # prefix as a range; tokens are lower-case and the default collation is binary
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        return Q(**{f'{field}__gte': term, f'{field}__lt': upper})
+    return Q(**{f'{field}__startswith': term})
+
+
+def search_courses(queryset, query):
+    """Filter a Course queryset to courses matching every term and annotate `search_rank`.
+
+    Each term matches index tokens by prefix; exact token matches count double
+    towards the rank. Every match is ranked, however many courses share a term.
+    """
+    # Single characters are kept in queries so prefixes match while the user types
+    terms = list(dict.fromkeys(tokenize(query, min_length=1)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    # Every term must match; each check is one range scan of the token index
+    for term in terms:
+        queryset = queryset.filter(
+            id__in=CourseSearchToken.objects.filter(prefix_match(term)).values('course_id')
+        )
+
+    # Sum the weights of each course's matching tokens; a correlated subquery reads
+    # a few index entries per course instead of grouping the joined course rows
+    matching = CourseSearchToken.objects.filter(
+        reduce(or_, [prefix_match(term) for term in terms]), course=OuterRef('pk')
+    )
+    rank = matching.order_by().values('course').annotate(rank=Sum(Case(
+        When(token__in=terms, then=F('weight') * 2),
+        default=F('weight'),
+        output_field=IntegerField(),
+    ))).values('rank')
+    return queryset.annotate(search_rank=Subquery(rank, output_field=IntegerField()))
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every course, returning how many were indexed"""
+    total = 0
+    courses = Course.objects.select_related('category').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(courses.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return total
+        index_courses(batch)
+        total += len(batch)
+        last_id = batch[-1].id
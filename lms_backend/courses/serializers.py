@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from lms_backend.instrumentation import SerializationTimingMixin
 from .models import Course, Enrollment, CourseContent, LearningProgress, Category
 from accounts.models import User
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SerializationTimingMixin, serializers.ModelSerializer):
     courses_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -11,10 +12,13 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'courses_count']
 
     def get_courses_count(self, obj):
+        # Listing querysets annotate the count to avoid a query per category
+        if hasattr(obj, 'published_courses_count'):
+            return obj.published_courses_count
         return obj.courses.filter(is_published=True).count()
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     lecturer_name = serializers.CharField(source='lecturer.username', read_only=True)
     lecturer_email = serializers.CharField(source='lecturer.email', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -31,6 +35,10 @@ class CourseSerializer(serializers.ModelSerializer):
     def get_is_enrolled(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'student':
+            # Views resolve the student's enrollments once for the whole page
+            enrolled_course_ids = self.context.get('enrolled_course_ids')
+            if enrolled_course_ids is not None:
+                return obj.id in enrolled_course_ids
             return Enrollment.objects.filter(student=request.user, course=obj).exists()
         return False
 
@@ -40,7 +48,7 @@ class CourseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     course_description = serializers.CharField(source='course.description', read_only=True)
     course_thumbnail = serializers.URLField(source='course.thumbnail_url', read_only=True)
@@ -53,7 +61,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['student', 'enrolled_at']
 
 
-class CourseContentSerializer(serializers.ModelSerializer):
+class CourseContentSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     is_completed = serializers.SerializerMethodField()
 
@@ -66,6 +74,10 @@ class CourseContentSerializer(serializers.ModelSerializer):
     def get_is_completed(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated and request.user.role == 'student':
+            # List views resolve the student's completed content once for the whole course
+            completed_content_ids = self.context.get('completed_content_ids')
+            if completed_content_ids is not None:
+                return obj.id in completed_content_ids
             progress = LearningProgress.objects.filter(
                 student=request.user,
                 content=obj,
@@ -94,18 +106,17 @@ class CourseContentSerializer(serializers.ModelSerializer):
                     'content_text': 'Text content is required for text content'
                 })
         
-        # Convert empty strings to None for optional fields
+        # Convert empty strings to None for optional fields (content_text is NOT NULL,
+        # so an empty string is its blank value)
         if 'video_url' in data and data['video_url'] == '':
             data['video_url'] = None
         if 'file_url' in data and data['file_url'] == '':
             data['file_url'] = None
-        if 'content_text' in data and data['content_text'] == '':
-            data['content_text'] = None
         
         return data
 
 
-class LearningProgressSerializer(serializers.ModelSerializer):
+class LearningProgressSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.username', read_only=True)
     content_title = serializers.CharField(source='content.title', read_only=True)
     course_title = serializers.CharField(source='content.course.title', read_only=True)
@@ -114,11 +125,13 @@ class LearningProgressSerializer(serializers.ModelSerializer):
     class Meta:
         model = LearningProgress
         fields = ['id', 'student', 'student_name', 'content', 'content_title', 'course_id', 
-                  'course_title', 'completed', 'completed_at', 'created_at', 'updated_at']
-        read_only_fields = ['student', 'completed_at', 'created_at', 'updated_at']
+                  'course_title', 'completed', 'completed_at', 'position_seconds', 'watched_seconds',
+                  'duration_seconds', 'created_at', 'updated_at']
+        read_only_fields = ['student', 'completed_at', 'position_seconds', 'watched_seconds',
+                            'duration_seconds', 'created_at', 'updated_at']
 
 
-class CourseProgressSerializer(serializers.Serializer):
+class CourseProgressSerializer(SerializationTimingMixin, serializers.Serializer):
     """Serializer for course progress summary"""
     course_id = serializers.IntegerField()
     course_title = serializers.CharField()
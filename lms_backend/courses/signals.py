@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import User
+from .cache import category_cache, course_cache
+from .models import Course, Category, CourseContent, Enrollment, LearningProgress
+from .progress import completed_count
+from .search import INDEXED_FIELDS, index_course, index_courses
+
+
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_listing(sender, **kwargs):
+    """Course publication, category changes and deletes all affect the category sidebar"""
+    category_cache.invalidate('published')
+
+
+@receiver(post_save, sender=Course)
+def update_course_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_course(instance)
+
+
+@receiver(post_save, sender=Category)
+def update_category_search_index(sender, instance, created=False, **kwargs):
+    # Category names are indexed on their courses
+    if not created:
+        index_courses(instance.courses.select_related('category'))
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_cached_course(sender, instance, **kwargs):
+    course_id = instance.pk
+    transaction.on_commit(lambda: course_cache.bump(course_id))
+
+
+def touch_courses(courses):
+    """Mark courses modified so response validators and cached payloads change"""
+    course_ids = list(courses.values_list('id', flat=True))
+    if course_ids:
+        Course.objects.filter(id__in=course_ids).update(updated_at=timezone.now())
+        transaction.on_commit(lambda: course_cache.bump(*course_ids))
+
+
+@receiver([post_save, pre_delete], sender=Category)
+def invalidate_cached_category_courses(sender, instance, created=False, **kwargs):
+    # Category name and icon are part of the course payload
+    if not created:
+        touch_courses(instance.courses.all())
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_lecturer_courses(sender, instance, created=False, update_fields=None, **kwargs):
+    # Lecturer username and email are part of the course payload; logins only save last_login
+    if created or instance.role != 'lecturer':
+        return
+    if update_fields is not None and not {'username', 'email'}.intersection(update_fields):
+        return
+    touch_courses(instance.courses.all())
+
+
+@receiver(post_save, sender=CourseContent)
+def increment_content_count(sender, instance, created=False, **kwargs):
+    if created:
+        Course.objects.filter(pk=instance.course_id).update(content_count=F('content_count') + 1)
+
+
+@receiver(pre_delete, sender=CourseContent)
+def decrement_content_rollups(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(content_count=F('content_count') - 1)
+    # Progress rows are removed by the cascade; drop them from the students' completed counts
+    Enrollment.objects.filter(
+        course_id=instance.course_id,
+        student__learning_progress__content=instance,
+        student__learning_progress__completed=True,
+    ).update(completed_count=F('completed_count') - 1)
+
+
+@receiver(post_save, sender=LearningProgress)
+def recount_completed_content(sender, instance, raw=False, **kwargs):
+    # Single saves (mark complete, the admin) recount their enrollment; the batch and
+    # heartbeat writers use bulk upserts and call apply_progress_changes() themselves
+    if raw:
+        return
+    Enrollment.objects.filter(
+        student_id=instance.student_id, course_id=instance.content.course_id
+    ).update(completed_count=completed_count(), last_activity_at=timezone.now())
@@ -1,3 +1,1141 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from lms_backend.testing import QueryScalingMixin
+from . import async_views
+from .cache import course_cache
+from .heartbeats import HeartbeatBuffer, heartbeat_buffer
+from .models import Category, Course, CourseContent, Enrollment, LearningProgress
+from .ordering import ORDER_GAP, move_content, rebalance
+from .progress import lock_enrollments, rebuild_rollups
+from .search import index_courses, search_courses
+from .views import CourseStudentProgressView
+
+
+class MyProgressViewTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def enroll_in_new_course(self, contents=3, completed=1):
+        course = Course.objects.create(
+            title='Course', description='Description', price=10,
+            lecturer=self.lecturer, is_published=True
+        )
+        Enrollment.objects.create(student=self.student, course=course)
+        for i in range(contents):
+            content = CourseContent.objects.create(
+                course=course, title=f'Lesson {i}', content_type='text', content_text='Text', order=i
+            )
+            if i < completed:
+                LearningProgress.objects.create(student=self.student, content=content, completed=True)
+        return course
+
+    def get_progress(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/progress/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_progress_counts(self):
+        course = self.enroll_in_new_course(contents=4, completed=1)
+        self.enroll_in_new_course(contents=0, completed=0)
+        response, _ = self.get_progress()
+
+        by_course = {row['course_id']: row for row in response.data}
+        self.assertEqual(by_course[course.id]['total_content'], 4)
+        self.assertEqual(by_course[course.id]['completed_content'], 1)
+        self.assertEqual(by_course[course.id]['progress_percentage'], 25.0)
+        empty = [row for row in response.data if row['course_id'] != course.id][0]
+        self.assertEqual(empty['total_content'], 0)
+        self.assertEqual(empty['progress_percentage'], 0)
+
+    def test_query_count_does_not_grow_with_enrollments(self):
+        self.enroll_in_new_course()
+        _, baseline = self.get_progress()
+        for _ in range(5):
+            self.enroll_in_new_course()
+        response, queries = self.get_progress()
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(queries, baseline)
+
+
+class EndpointScalingTests(QueryScalingMixin, TestCase):
+    """Every course endpoint runs a fixed number of queries at 10, 100 and 1,000 rows"""
+
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.student_client = APIClient()
+        self.student_client.force_authenticate(self.student)
+        self.lecturer_client = APIClient()
+        self.lecturer_client.force_authenticate(self.lecturer)
+        # The course whose lessons and classmates grow with each size
+        self.course = Course.objects.create(
+            title='Python for everyone', description='Description', price=10,
+            lecturer=self.lecturer, is_published=True
+        )
+        Enrollment.objects.create(student=self.student, course=self.course)
+        # Buffered heartbeats are dropped, not flushed from a timer thread
+        flush_interval = heartbeat_buffer.flush_interval
+        heartbeat_buffer.flush_interval = 0
+        self.addCleanup(setattr, heartbeat_buffer, 'flush_interval', flush_interval)
+        self.addCleanup(heartbeat_buffer._pending.clear)
+
+    def seed(self, size):
+        """Grow categories, the published catalog (the student is enrolled in all of it),
+        the lessons of `self.course` and its enrolled students to `size` rows each"""
+        have = Category.objects.count()
+        Category.objects.bulk_create([Category(name=f'Category {index}') for index in range(have, size)])
+        self.seed_catalog(size)
+        self.seed_lessons(size)
+        self.seed_classmates(size)
+        Course.objects.filter(pk=self.course.pk).update(
+            students_count=Enrollment.objects.filter(course=self.course).count(),
+            content_count=CourseContent.objects.filter(course=self.course).count(),
+        )
+        # A course the student hasn't enrolled in yet
+        self.new_course = Course.objects.create(
+            title=f'New course {size}', description='Description', price=10,
+            lecturer=self.lecturer, is_published=True
+        )
+
+    def seed_catalog(self, size):
+        have = Course.objects.filter(title__startswith='Catalog course').count()
+        last_id = Course.objects.order_by('-id').values_list('id', flat=True).first()
+        categories = list(Category.objects.order_by('id'))
+        Course.objects.bulk_create([
+            Course(
+                title=f'Catalog course {index}', description='Python programming', price=index % 50,
+                category=categories[index % len(categories)], lecturer=self.lecturer,
+                is_published=True, students_count=1,
+            )
+            for index in range(have, size)
+        ])
+        # bulk_create skips the signals that index courses
+        courses = list(Course.objects.filter(id__gt=last_id).select_related('category'))
+        index_courses(courses)
+        Enrollment.objects.bulk_create([Enrollment(student=self.student, course=course) for course in courses])
+
+    def seed_lessons(self, size):
+        """Video lessons; the student has completed every other one"""
+        have = CourseContent.objects.filter(course=self.course).count()
+        CourseContent.objects.bulk_create([
+            CourseContent(
+                course=self.course, title=f'Lesson {index}', content_type='video',
+                video_url='https://example.com/lesson.mp4', order=(index + 1) * ORDER_GAP,
+            )
+            for index in range(have, size)
+        ])
+        self.contents = list(CourseContent.objects.filter(course=self.course).order_by('order', 'id'))
+        done = set(LearningProgress.objects.filter(student=self.student).values_list('content_id', flat=True))
+        LearningProgress.objects.bulk_create([
+            LearningProgress(student=self.student, content=content, completed=True)
+            for index, content in enumerate(self.contents)
+            if index % 2 == 0 and content.id not in done
+        ])
+        # The denormalized completed counts are maintained by the views, not by bulk_create
+        Enrollment.objects.filter(student=self.student, course=self.course).update(
+            completed_count=LearningProgress.objects.filter(
+                student=self.student, content__course=self.course, completed=True
+            ).count()
+        )
+
+    def seed_classmates(self, size):
+        """Students of `self.course` who have each completed its first two lessons"""
+        have = User.objects.filter(username__startswith='classmate-').count()
+        User.objects.bulk_create([
+            User(username=f'classmate-{index}', email=f'classmate-{index}@example.com', role='student')
+            for index in range(have, size)
+        ])
+        classmates = list(User.objects.filter(username__startswith='classmate-', enrollments__isnull=True))
+        Enrollment.objects.bulk_create([
+            Enrollment(student=classmate, course=self.course, completed_count=2) for classmate in classmates
+        ])
+        LearningProgress.objects.bulk_create([
+            LearningProgress(student=classmate, content=content, completed=True)
+            for classmate in classmates for content in self.contents[:2]
+        ])
+
+    def test_category_list(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/categories/'))
+        self.assertEqual(len(response.data), 1000)
+
+    def test_course_list_for_student(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/courses/'))
+        self.assertGreater(len(response.data), 1000)
+        self.assertTrue(all(course['is_enrolled'] for course in response.data if course['title'].startswith('Catalog')))
+
+    def test_course_list_for_lecturer(self):
+        self.assertScales(lambda: self.lecturer_client.get('/api/courses/'))
+
+    def test_course_list_page(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/courses/?page_size=20&sort=price'))
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_course_search(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/courses/?search=python'))
+        self.assertEqual(response.data[0]['id'], self.course.id)
+
+    def test_course_detail_for_student(self):
+        response = self.assertScales(lambda: self.student_client.get(f'/api/courses/{self.course.id}/'))
+        self.assertEqual(response.data['students_count'], 1001)
+
+    def test_course_detail_for_lecturer(self):
+        self.assertScales(lambda: self.lecturer_client.get(f'/api/courses/{self.course.id}/'))
+
+    def test_enroll(self):
+        self.assertScales(
+            lambda: self.student_client.post(f'/api/courses/{self.new_course.id}/enroll/'), status_code=201
+        )
+
+    def test_roster_import(self):
+        def import_cohort():
+            usernames = User.objects.filter(username__startswith='classmate-').order_by('-id')[:10]
+            return self.lecturer_client.post(
+                f'/api/courses/{self.new_course.id}/roster/',
+                '\n'.join(user.username for user in usernames), content_type='text/csv'
+            )
+        response = self.assertScales(import_cohort)
+        self.assertEqual(response.data['created'], 10)
+
+    def test_my_enrollments(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/enrollments/'))
+        self.assertEqual(len(response.data), 1001)
+
+    def test_content_list_for_student(self):
+        response = self.assertScales(lambda: self.student_client.get(f'/api/courses/{self.course.id}/contents/'))
+        self.assertEqual(sum(content['is_completed'] for content in response.data), 500)
+
+    def test_content_list_for_lecturer(self):
+        self.assertScales(lambda: self.lecturer_client.get(f'/api/courses/{self.course.id}/contents/'))
+
+    def test_content_bulk_create(self):
+        rows = [{'title': f'Imported {index}', 'content_type': 'text', 'content_text': 'Text'} for index in range(10)]
+        self.assertScales(
+            lambda: self.lecturer_client.post(f'/api/courses/{self.course.id}/contents/bulk/', rows, format='json'),
+            status_code=201
+        )
+
+    def test_content_move(self):
+        self.assertScales(lambda: self.lecturer_client.post(
+            f'/api/courses/{self.course.id}/contents/reorder/',
+            {'content_id': self.contents[-1].id, 'after_id': None}, format='json'
+        ))
+
+    def test_content_detail(self):
+        self.assertScales(lambda: self.student_client.get(f'/api/contents/{self.contents[0].id}/'))
+
+    def test_content_update(self):
+        self.assertScales(lambda: self.lecturer_client.patch(
+            f'/api/contents/{self.contents[0].id}/', {'title': 'Renamed'}, format='json'
+        ))
+
+    def test_content_delete(self):
+        self.assertScales(lambda: self.lecturer_client.delete(f'/api/contents/{self.contents[-1].id}/'), status_code=204)
+
+    def test_mark_complete(self):
+        response = self.assertScales(lambda: self.student_client.post(
+            f'/api/contents/{self.contents[-1].id}/complete/', {'completed': True}, format='json'
+        ))
+        self.assertTrue(response.data['completed'])
+
+    def test_batch_progress_update(self):
+        self.assertScales(lambda: self.student_client.post(
+            f'/api/courses/{self.course.id}/progress/',
+            {str(content.id): True for content in self.contents[-10:]}, format='json'
+        ))
+
+    def test_video_heartbeat(self):
+        self.assertScales(lambda: self.student_client.post(
+            f'/api/contents/{self.contents[-1].id}/heartbeat/',
+            {'position': 30, 'duration': 600, 'elapsed': 10}, format='json'
+        ), status_code=202)
+
+    def test_my_progress(self):
+        response = self.assertScales(lambda: self.student_client.get('/api/progress/'))
+        progress = {row['course_id']: row for row in response.data}[self.course.id]
+        self.assertEqual(progress['completed_content'], 500)
+
+    def test_student_progress(self):
+        url = f'/api/courses/{self.course.id}/student-progress/'
+        # The full report is a students x lessons matrix (a million cells at 1,000 rows);
+        # its time budget is covered by the paginated and streamed variants below
+        response = self.assertScales(lambda: self.lecturer_client.get(url), time_budget_ms=0)
+        self.assertEqual(len(response.data['students']), 1001)
+
+    def test_student_progress_page(self):
+        url = f'/api/courses/{self.course.id}/student-progress/?page_size=50'
+        response = self.assertScales(lambda: self.lecturer_client.get(url))
+        self.assertEqual(len(response.data['students']), 50)
+
+    def test_student_progress_stream(self):
+        url = f'/api/courses/{self.course.id}/student-progress/?stream=true'
+        # Streaming costs one progress query per batch of students; keep it to one batch
+        with mock.patch.object(CourseStudentProgressView, 'stream_batch_size', 2000):
+            response = self.assertScales(lambda: self.lecturer_client.get(url))
+        self.assertEqual(len(json.loads(response.getvalue())['students']), 1001)
+
+    def test_progress_export(self):
+        url = f'/api/courses/{self.course.id}/student-progress/export/?format=ndjson'
+        response = self.assertScales(lambda: self.lecturer_client.get(url))
+        self.assertEqual(len(response.getvalue().splitlines()), 1001)
+
+
+class ProgressExportTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.lecturer)
+        self.course = Course.objects.create(
+            title='Course', description='Description', price=10, lecturer=self.lecturer, is_published=True
+        )
+        for order in range(2):
+            CourseContent.objects.create(
+                course=self.course, title=f'Lesson {order}', content_type='text', content_text='Text', order=order
+            )
+        self.enrollments = {}
+        for name, completed in (('fresh', 0), ('halfway', 1), ('done', 2)):
+            student = User.objects.create_user(name, f'{name}@example.com', 'password123', role='student')
+            self.enrollments[name] = Enrollment.objects.create(
+                student=student, course=self.course, completed_count=completed
+            )
+        Enrollment.objects.filter(pk=self.enrollments['fresh'].pk).update(enrolled_at='2024-01-01T00:00:00Z')
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/courses/{self.course.id}/student-progress/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response, response.getvalue().decode()
+
+    def test_csv(self):
+        response, body = self.export()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'course-{self.course.id}-progress.csv', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'student_id,student_name,student_email,enrolled_at,last_activity_at,'
+                                   'completed_content,total_content,progress_percentage,status')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['fresh', 'halfway', 'done'])
+        self.assertTrue(lines[2].endswith(',1,2,50.0,in_progress'))
+
+    def test_ndjson(self):
+        response, body = self.export('?format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['status'] for row in rows], ['not_started', 'in_progress', 'completed'])
+        self.assertEqual(rows[2]['progress_percentage'], 100.0)
+
+    def test_filters(self):
+        _, body = self.export('?format=ndjson&status=completed')
+        self.assertEqual([json.loads(line)['student_name'] for line in body.splitlines()], ['done'])
+        _, body = self.export('?format=ndjson&enrolled_before=2025-01-01')
+        self.assertEqual([json.loads(line)['student_name'] for line in body.splitlines()], ['fresh'])
+        _, body = self.export('?format=ndjson&enrolled_after=2025-01-01&status=not_started')
+        self.assertEqual(body, '')
+
+    def test_invalid_filters_and_access(self):
+        url = f'/api/courses/{self.course.id}/student-progress/export/'
+        self.assertEqual(self.client.get(f'{url}?status=unknown').status_code, 400)
+        self.assertEqual(self.client.get(f'{url}?enrolled_after=yesterday').status_code, 400)
+        student_client = APIClient()
+        student_client.force_authenticate(self.enrollments['done'].student)
+        self.assertEqual(student_client.get(url).status_code, 403)
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.lecturer)
+        self.course = Course.objects.create(
+            title='Course', description='Description', price=10, lecturer=self.lecturer, is_published=True
+        )
+        self.students = [
+            User.objects.create_user(f'student{index}', f'student{index}@example.com', 'password123', role='student')
+            for index in range(4)
+        ]
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(students_count=1)
+
+    def post_roster(self, body):
+        return self.client.post(f'/api/courses/{self.course.id}/roster/', body, content_type='text/csv')
+
+    def test_import_counts(self):
+        response = self.post_roster(
+            'username\nstudent0\nstudent1\nstudent2@example.com\n\nstudent1\nnobody\nlecturer\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['existing'], 1)
+        # Lecturers can't be enrolled as students
+        self.assertEqual(response.data['unknown'], 2)
+        self.assertEqual(response.data['unknown_students'], ['lecturer', 'nobody'])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.students_count, 3)
+        self.assertEqual(
+            set(Enrollment.objects.filter(course=self.course).values_list('student__username', flat=True)),
+            {'student0', 'student1', 'student2'}
+        )
+
+    def test_file_upload(self):
+        upload = SimpleUploadedFile('roster.csv', '\ufeffemail,name\nstudent3@example.com,Student Three\n'.encode())
+        response = self.client.post(f'/api/courses/{self.course.id}/roster/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+
+    def test_query_count_does_not_grow_with_roster(self):
+        with CaptureQueriesContext(connection) as small:
+            self.post_roster('student1\n')
+        User.objects.bulk_create([User(username=f'cohort-{index}', role='student') for index in range(500)])
+        with CaptureQueriesContext(connection) as large:
+            response = self.post_roster('\n'.join(f'cohort-{index}' for index in range(500)))
+        self.assertEqual(response.data['created'], 500)
+        # The insert may be split to fit the backend's parameter limit; lookups must not grow
+        lookups = [len([query for query in captured if query['sql'].startswith('SELECT')]) for captured in (small, large)]
+        self.assertEqual(lookups[0], lookups[1])
+
+    def test_only_the_owner_can_import(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password123', role='lecturer')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.post_roster('student1\n').status_code, 404)
+        self.client.force_authenticate(self.students[1])
+        self.assertEqual(self.post_roster('student1\n').status_code, 403)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 1)
+
+    def test_usernames_with_at_signs(self):
+        User.objects.create_user('ada@home', 'ada@example.com', 'password123', role='student')
+        response = self.post_roster('ada@home\nstudent1@example.com\n')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['unknown_students'], [])
+
+    def test_counter_is_recounted_after_skipped_conflicts(self):
+        bulk_create = Enrollment.objects.bulk_create
+
+        def enroll_meanwhile(enrollments, **kwargs):
+            # The student enrolls themselves (and bumps the counter) between the existence check and the insert
+            Enrollment.objects.create(student=self.students[1], course=self.course)
+            Course.objects.filter(pk=self.course.pk).update(students_count=F('students_count') + 1)
+            return bulk_create(enrollments, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, 'bulk_create', side_effect=enroll_meanwhile):
+            response = self.post_roster('student1\nstudent2\n')
+        self.assertEqual(response.status_code, 200)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.students_count, 3)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as roster:
+            roster.write('student1\nstudent2\nmissing@example.com\n')
+        self.addCleanup(os.remove, roster.name)
+        output = io.StringIO()
+        call_command('import_roster', self.course.id, roster.name, stdout=output)
+        self.assertIn('2 enrolled, 0 already enrolled, 1 unknown', output.getvalue())
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        # Course ids are reused across tests and version bumps only happen on commit
+        course_cache.backend.clear()
+        course_cache.clear()
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def create_courses(self, titles, **fields):
+        courses = [
+            Course.objects.create(title=title, description='', price=10, lecturer=self.lecturer,
+                                  is_published=True, **fields)
+            for title in titles
+        ]
+        index_courses(Course.objects.filter(id__in=[course.id for course in courses]).select_related('category'))
+        return courses
+
+    def search(self, query, **params):
+        response = self.client.get('/api/courses/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [course['title'] for course in response.json()]
+
+    def test_every_term_must_match_by_prefix(self):
+        self.create_courses(['Python Data Science', 'Python Web', 'Data Pipelines'])
+        self.assertEqual(self.search('pyth dat'), ['Python Data Science'])
+        self.assertEqual(self.search('zzz'), [])
+
+    def test_exact_and_title_matches_rank_first(self):
+        self.create_courses(['Pythonic Idioms', 'Python Basics'])
+        self.assertEqual(self.search('python'), ['Python Basics', 'Pythonic Idioms'])
+
+    def test_every_match_is_ranked(self):
+        # More courses share each word than a per-term shortlist would keep
+        courses = Course.objects.bulk_create([
+            Course(title=f'{topic} basics {index}', description='', price=10, lecturer=self.lecturer,
+                   is_published=True)
+            for topic in ('Web', 'Design') for index in range(600)
+        ] + [
+            Course(title=f'Course {index}', description='A web design primer', price=10, lecturer=self.lecturer,
+                   is_published=True)
+            for index in range(5)
+        ])
+        index_courses(Course.objects.filter(id__in=[course.id for course in courses]).select_related('category'))
+
+        self.assertEqual(sorted(self.search('web design')), [f'Course {index}' for index in range(5)])
+        response = self.client.get('/api/courses/', {'search': 'web', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        # Title matches outrank the descriptions, newest first among equals
+        self.assertEqual(response.json()['results'][0]['title'], 'Web basics 599')
+        self.assertEqual(search_courses(Course.objects.all(), 'web').count(), 605)
+
+    def test_search_respects_other_filters(self):
+        music = Category.objects.create(name='Music')
+        self.create_courses(['Python Guitar'], category=music)
+        self.create_courses([f'Python {index}' for index in range(3)])
+
+        self.assertEqual(len(self.search('python')), 4)
+        self.assertEqual(self.search('python', category=music.id), ['Python Guitar'])
+
+
+class HeartbeatBufferTests(TestCase):
+    def setUp(self):
+        lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=lecturer,
+                                            is_published=True)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.videos = [
+            CourseContent.objects.create(course=self.course, title=f'Video {index}', content_type='video',
+                                         video_url='https://example.com/video', order=index)
+            for index in range(2)
+        ]
+        self.buffer = HeartbeatBuffer(flush_interval=0, flush_size=100, completion_threshold=0.9)
+
+    def test_deleted_video_is_dropped(self):
+        self.assertTrue(self.buffer.is_authorized(self.student, self.videos[0].id))
+        self.buffer.record(self.student.id, self.videos[0].id, 30, duration=600, elapsed=30)
+        self.buffer.record(self.student.id, self.videos[1].id, 30, duration=600, elapsed=30)
+        self.videos[0].delete()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer._pending, {})
+        self.assertNotIn((self.student.id, self.videos[0].id), self.buffer._authorized)
+        progress = LearningProgress.objects.get(student=self.student)
+        self.assertEqual(progress.content_id, self.videos[1].id)
+        self.assertEqual(progress.watched_seconds, 30)
+
+    def test_deleted_student_is_dropped(self):
+        self.buffer.record(self.student.id, self.videos[0].id, 30, duration=600, elapsed=30)
+        self.student.delete()
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer._pending, {})
+
+    def test_integrity_errors_are_not_retried(self):
+        self.buffer.record(self.student.id, self.videos[0].id, 30, duration=600, elapsed=30)
+        with mock.patch.object(self.buffer, '_write', side_effect=IntegrityError) as write, \
+                self.assertLogs('courses.heartbeats', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(self.buffer._pending, {})
+
+    def test_other_errors_are_retried(self):
+        self.buffer.record(self.student.id, self.videos[0].id, 30, duration=600, elapsed=30)
+        with mock.patch.object(self.buffer, '_write', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+        self.assertIn((self.student.id, self.videos[0].id), self.buffer._pending)
+        self.assertEqual(self.buffer.flush(), 1)
+
+    def test_failed_inline_flush_keeps_accepting_pings(self):
+        self.buffer.flush_size = 1
+        with mock.patch.object(self.buffer, '_write', side_effect=OperationalError), \
+                self.assertLogs('courses.heartbeats', 'ERROR'):
+            self.buffer.record(self.student.id, self.videos[0].id, 30, duration=600, elapsed=30)
+        self.assertEqual(len(self.buffer._pending), 1)
+
+    def test_expired_authorizations_are_pruned(self):
+        self.assertTrue(self.buffer.is_authorized(self.student, self.videos[0].id))
+        self.buffer._authorized[(0, 0)] = time.monotonic() - 1
+        self.buffer.flush()
+        self.assertEqual(list(self.buffer._authorized), [(self.student.id, self.videos[0].id)])
+
+
+class CourseDetailCacheTests(TestCase):
+    def setUp(self):
+        course_cache.backend.clear()
+        course_cache.clear()
+        lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=lecturer,
+                                            is_published=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/courses/{self.course.id}/'
+
+    def test_unpublished_course_is_not_served_from_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        # Another worker's invalidation never reached this process's cache
+        Course.objects.filter(pk=self.course.pk).update(is_published=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_counters_come_from_the_database(self):
+        self.assertEqual(self.client.get(self.url).json()['students_count'], 0)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(students_count=1)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['students_count'], 1)
+        self.assertTrue(data['is_enrolled'])
+
+
+class CourseValidatorTests(TestCase):
+    def setUp(self):
+        course_cache.backend.clear()
+        course_cache.clear()
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.category = Category.objects.create(name='Programming', icon='💻')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=self.lecturer,
+                                            category=self.category, is_published=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def assertRevalidates(self, url, change, field, value):
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data[0] if isinstance(data, list) else data)[field], value)
+
+    def rename_category(self):
+        self.category.name = 'Software'
+        self.category.save()
+
+    def rename_lecturer(self):
+        self.lecturer.email = 'teacher@example.com'
+        self.lecturer.save()
+
+    def test_category_rename_changes_list_and_detail(self):
+        self.assertRevalidates('/api/courses/', self.rename_category, 'category_name', 'Software')
+        self.category.icon = '🖥'
+        self.assertRevalidates(f'/api/courses/{self.course.id}/', self.category.save, 'category_icon', '🖥')
+
+    def test_lecturer_change_changes_list_and_detail(self):
+        self.assertRevalidates('/api/courses/', self.rename_lecturer, 'lecturer_email', 'teacher@example.com')
+        self.lecturer.username = 'teacher'
+        self.assertRevalidates(f'/api/courses/{self.course.id}/', self.lecturer.save, 'lecturer_name', 'teacher')
+
+    def test_no_last_modified_validator(self):
+        # Changes that leave every updated_at alone must not be answered with a 304
+        other = Course.objects.create(title='Other', description='', price=10, lecturer=self.lecturer,
+                                      is_published=True)
+        for url in ('/api/courses/', f'/api/courses/{self.course.id}/', f'/api/courses/{self.course.id}/contents/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotIn('Last-Modified', response)
+                since = http_date(time.time() + 60)
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+        Course.objects.filter(pk=other.pk).delete()
+        self.assertEqual(len(self.client.get('/api/courses/', HTTP_IF_MODIFIED_SINCE=since).json()), 1)
+
+    def test_login_does_not_touch_courses(self):
+        updated_at = self.course.updated_at
+        self.lecturer.save(update_fields=['last_login'])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.updated_at, updated_at)
+
+
+class ReconcileStudentsCountTests(TestCase):
+    def setUp(self):
+        lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.courses = [
+            Course.objects.create(title=f'Course {index}', description='', price=10, lecturer=lecturer,
+                                  is_published=True)
+            for index in range(3)
+        ]
+        students = [
+            User.objects.create_user(f'student{index}', f'student{index}@example.com', 'password123')
+            for index in range(2)
+        ]
+        for student in students:
+            Enrollment.objects.create(student=student, course=self.courses[0])
+        Enrollment.objects.create(student=students[0], course=self.courses[1])
+        # Drift: bulk paths and crashes can leave the counters wrong
+        Course.objects.filter(pk=self.courses[0].pk).update(students_count=5)
+        Course.objects.filter(pk=self.courses[1].pk).update(students_count=1)
+        Course.objects.filter(pk=self.courses[2].pk).update(students_count=3)
+
+    def counts(self):
+        return list(Course.objects.filter(id__in=[c.id for c in self.courses]).order_by('id')
+                    .values_list('students_count', flat=True))
+
+    def test_dry_run(self):
+        output = io.StringIO()
+        call_command('reconcile_students_count', '--dry-run', stdout=output)
+        self.assertIn('Would fix 2 courses', output.getvalue())
+        self.assertEqual(self.counts(), [5, 1, 3])
+
+    def test_fixes_drifted_courses_and_bumps_their_cache(self):
+        output = io.StringIO()
+        with mock.patch.object(course_cache, 'bump') as bump, self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_students_count', '--batch-size', '1', stdout=output)
+        self.assertIn('Fixed 2 courses', output.getvalue())
+        self.assertEqual(self.counts(), [2, 1, 0])
+        bumped = {course_id for call in bump.call_args_list for course_id in call.args}
+        self.assertEqual(bumped, {self.courses[0].id, self.courses[2].id})
+
+
+class CourseContentCreateTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=self.lecturer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.lecturer)
+
+    def video(self, index):
+        # Forms submit every field, leaving the ones of other content types empty
+        return {'title': f'Video {index}', 'content_type': 'video', 'video_url': 'https://example.com/video',
+                'file_url': '', 'content_text': ''}
+
+    def test_bulk_create_with_blank_text(self):
+        response = self.client.post(f'/api/courses/{self.course.id}/contents/bulk/',
+                                    [self.video(0), self.video(1)], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(self.course.contents.values_list('content_text', 'file_url')), [('', None)] * 2)
+
+    def test_create_with_blank_text(self):
+        response = self.client.post(f'/api/courses/{self.course.id}/contents/', self.video(0), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.course.contents.get().content_text, '')
+
+
+    def test_default_order_appends(self):
+        url = f'/api/courses/{self.course.id}/contents/'
+        # The lesson form sends order 0 unless the lecturer picks a position
+        for index in range(2):
+            self.assertEqual(self.client.post(url, {**self.video(index), 'order': 0}, format='json').status_code, 201)
+        self.client.post(f'{url}bulk/', [{**self.video(2), 'order': 0}, self.video(3)], format='json')
+        self.client.post(url, {**self.video(4), 'order': ORDER_GAP + 1}, format='json')
+        self.assertEqual(
+            list(self.course.contents.order_by('order').values_list('title', 'order')),
+            [('Video 0', ORDER_GAP), ('Video 4', ORDER_GAP + 1), ('Video 1', 2 * ORDER_GAP),
+             ('Video 2', 3 * ORDER_GAP), ('Video 3', 4 * ORDER_GAP)]
+        )
+
+class ProgressRollupTests(TestCase):
+    """Course.content_count and Enrollment.completed_count stay equal to the source rows"""
+
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=self.lecturer,
+                                            is_published=True)
+        self.enrollment = Enrollment.objects.create(student=self.student, course=self.course)
+        self.contents = [
+            CourseContent.objects.create(course=self.course, title=f'Video {index}', content_type='video',
+                                         video_url='https://example.com/video', order=index)
+            for index in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def assertRollups(self, content_count, completed_count):
+        self.course.refresh_from_db()
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.course.content_count, self.enrollment.completed_count),
+                         (content_count, completed_count))
+        self.assertEqual(self.course.contents.count(), content_count)
+        self.assertEqual(
+            LearningProgress.objects.filter(student=self.student, content__course=self.course, completed=True).count(),
+            completed_count
+        )
+
+    def set_progress(self, updates):
+        response = self.client.post(f'/api/courses/{self.course.id}/progress/', updates, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_lock_enrollments_locks_only_the_requested_pairs(self):
+        other_student = User.objects.create_user('other', 'other@example.com', 'password123', role='student')
+        other_course = Course.objects.create(title='Other', description='', price=10, lecturer=self.lecturer)
+        wanted = Enrollment.objects.create(student=other_student, course=other_course)
+        # Enrolled in both courses, but not part of the request
+        Enrollment.objects.create(student=self.student, course=other_course)
+        Enrollment.objects.create(student=other_student, course=self.course)
+
+        with CaptureQueriesContext(connection) as queries:
+            ids = lock_enrollments([(self.student.id, self.course.id), (other_student.id, other_course.id)])
+        self.assertEqual(ids, sorted([self.enrollment.id, wanted.id]))
+        # The locking query names exactly the requested rows
+        locked = re.search(r'"id" IN \(([^)]*)\)', queries[-1]['sql']).group(1)
+        self.assertEqual({int(value) for value in locked.split(',')}, set(ids))
+
+    def test_fixture_loads_leave_rollups_alone(self):
+        progress = LearningProgress(student=self.student, content=self.contents[0], completed=True)
+        post_save.send(LearningProgress, instance=progress, created=True, raw=True)
+        self.assertRollups(3, 0)
+
+    def test_content_create_and_delete(self):
+        self.assertRollups(3, 0)
+        LearningProgress.objects.create(student=self.student, content=self.contents[0], completed=True)
+        LearningProgress.objects.create(student=self.student, content=self.contents[1], completed=False)
+        self.assertRollups(3, 1)
+
+        self.contents[0].delete()
+        self.assertRollups(2, 0)
+        self.contents[1].delete()
+        self.assertRollups(1, 0)
+
+    def test_bulk_content_create(self):
+        lecturer_client = APIClient()
+        lecturer_client.force_authenticate(self.lecturer)
+        rows = [{'title': f'Text {index}', 'content_type': 'text', 'content_text': 'Text'} for index in range(4)]
+        response = lecturer_client.post(f'/api/courses/{self.course.id}/contents/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertRollups(7, 0)
+
+    def test_mark_complete_flips(self):
+        url = f'/api/contents/{self.contents[0].id}/complete/'
+        self.client.post(url, {'completed': True}, format='json')
+        self.client.post(url, {'completed': True}, format='json')
+        self.assertRollups(3, 1)
+        self.client.post(url, {}, format='json')
+        self.assertRollups(3, 0)
+        self.client.post(url, {}, format='json')
+        self.assertRollups(3, 1)
+
+    def test_stale_instances_do_not_double_count(self):
+        # Two requests that loaded the row before either wrote it
+        LearningProgress.objects.create(student=self.student, content=self.contents[0])
+        first = LearningProgress.objects.get(content=self.contents[0])
+        second = LearningProgress.objects.get(content=self.contents[0])
+        first.completed = second.completed = True
+        first.save()
+        second.save()
+        self.assertRollups(3, 1)
+
+    def test_batch_progress(self):
+        first, second, third = (content.id for content in self.contents)
+        self.set_progress({first: True, second: True})
+        self.assertRollups(3, 2)
+        self.set_progress({first: True, second: False, third: True})
+        self.assertRollups(3, 2)
+        self.set_progress({first: False, third: False})
+        self.assertRollups(3, 0)
+
+    def test_heartbeat_completion(self):
+        buffer = HeartbeatBuffer(flush_interval=0, flush_size=100, completion_threshold=0.9)
+        LearningProgress.objects.create(student=self.student, content=self.contents[0], completed=True)
+        buffer.record(self.student.id, self.contents[0].id, 600, duration=600, elapsed=60)
+        buffer.record(self.student.id, self.contents[1].id, 60, duration=60, elapsed=60)
+        buffer.record(self.student.id, self.contents[2].id, 10, duration=600, elapsed=10)
+        buffer.flush()
+        self.assertRollups(3, 2)
+        self.assertIsNotNone(self.enrollment.last_activity_at)
+
+    def test_rebuild_matches_maintained_rollups(self):
+        self.set_progress({self.contents[0].id: True, self.contents[2].id: True})
+        # bulk_create skips the signals; the rebuild repairs it
+        CourseContent.objects.bulk_create([
+            CourseContent(course=self.course, title='Extra', content_type='text', content_text='Text')
+        ])
+        Enrollment.objects.filter(pk=self.enrollment.pk).update(completed_count=0)
+        rebuild_rollups()
+        self.assertRollups(4, 2)
+
+
+class ContentOrderingTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.course = Course.objects.create(title='Course', description='', price=10, lecturer=self.lecturer)
+        self.contents = [
+            CourseContent.objects.create(course=self.course, title=f'Lesson {index}', content_type='text',
+                                         content_text='Text', order=(index + 1) * ORDER_GAP)
+            for index in range(4)
+        ]
+        self.ids = [content.id for content in self.contents]
+        self.client = APIClient()
+        self.client.force_authenticate(self.lecturer)
+        self.url = f'/api/courses/{self.course.id}/contents/reorder/'
+
+    def stored_order(self):
+        return list(self.course.contents.order_by('order', 'created_at', 'id').values_list('id', 'order'))
+
+    def test_move_updates_one_row(self):
+        a, b, c, d = self.ids
+        with CaptureQueriesContext(connection) as queries:
+            move_content(self.course, d, after_id=a)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 1)
+        self.assertEqual(self.stored_order(), [
+            (a, ORDER_GAP), (d, ORDER_GAP + ORDER_GAP // 2), (b, 2 * ORDER_GAP), (c, 3 * ORDER_GAP),
+        ])
+
+        move_content(self.course, b, after_id=None)
+        move_content(self.course, a, after_id=c)
+        self.assertEqual([content_id for content_id, _ in self.stored_order()], [b, d, c, a])
+
+    def test_move_rebalances_when_the_gap_runs_out(self):
+        a = self.ids[0]
+        # Each move halves the gap after the first content; log2(ORDER_GAP) moves use it up
+        for _ in range(10):
+            move_content(self.course, self.stored_order()[-1][0], after_id=a)
+        self.assertEqual(self.stored_order()[1][1], ORDER_GAP + 1)
+
+        moved = self.stored_order()[-1][0]
+        move_content(self.course, moved, after_id=a)
+        orders = self.stored_order()
+        self.assertEqual(orders[1][0], moved)
+        self.assertEqual(len({order for _, order in orders}), 4)
+        self.assertEqual([order % ORDER_GAP for _, order in orders], [0] * 4)
+        self.assertEqual(orders[0][0], a)
+
+    def test_rebalance_keeps_order(self):
+        CourseContent.objects.filter(pk=self.ids[2]).update(order=ORDER_GAP + 1)
+        before = [content_id for content_id, _ in self.stored_order()]
+        rebalance(self.course)
+        self.assertEqual(self.stored_order(), [(content_id, (index + 1) * ORDER_GAP)
+                                               for index, content_id in enumerate(before)])
+
+    def test_reorder_view(self):
+        reordered = list(reversed(self.ids))
+        response = self.client.post(self.url, {'content_ids': reordered}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([content_id for content_id, _ in self.stored_order()], reordered)
+
+        response = self.client.post(self.url, {'content_id': self.ids[0], 'after_id': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_order()[0][0], self.ids[0])
+
+    def test_reorder_view_rejects_invalid_ids(self):
+        invalid = [
+            ({'content_ids': 'abc'}, 'content_ids must be a list of content ids'),
+            ({'content_ids': [self.ids[0], 'x']}, 'content_ids must be a list of content ids'),
+            ({'content_ids': [[1], {'a': 1}]}, 'content_ids must be a list of content ids'),
+            ({'content_ids': [True, False]}, 'content_ids must be a list of content ids'),
+            ({'content_ids': self.ids[:2]}, 'content_ids must list every content of the course exactly once'),
+            ({'content_id': '1e9'}, 'content_id and after_id must be content ids'),
+            ({'content_id': self.ids[0], 'after_id': {}}, 'content_id and after_id must be content ids'),
+            ({'content_id': 0}, 'Content not found in this course'),
+            ({}, 'Provide content_ids or content_id'),
+        ]
+        for payload, message in invalid:
+            with self.subTest(payload=payload):
+                response = self.client.post(self.url, payload, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'error': message})
+
+
+# A fast hasher for the classmates' accounts
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AsyncViewTests(TestCase):
+    """The ASGI read endpoints answer like the sync views they stand in for"""
+
+    def setUp(self):
+        course_cache.backend.clear()
+        course_cache.clear()
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.course = Course.objects.create(title='Python', description='', price=10, lecturer=self.lecturer,
+                                            is_published=True)
+        Course.objects.create(title='Draft', description='', price=10, lecturer=self.lecturer)
+        self.contents = [
+            CourseContent.objects.create(course=self.course, title=f'Lesson {order}', content_type='text',
+                                         content_text='Text', order=order)
+            for order in range(3)
+        ]
+        Enrollment.objects.create(student=self.student, course=self.course)
+        LearningProgress.objects.create(student=self.student, content=self.contents[0], completed=True)
+        for index in range(3):
+            classmate = User.objects.create_user(f'classmate-{index}', f'classmate-{index}@example.com',
+                                                 'password123', role='student')
+            Enrollment.objects.create(student=classmate, course=self.course)
+        self.factory = AsyncRequestFactory()
+
+    def authorization(self, user):
+        access = CustomTokenObtainPairSerializer.get_token(user).access_token
+        return {'Authorization': f'Bearer {access}'}
+
+    def sync_get(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(url)
+
+    async def async_get(self, view, user, url, headers=None, **kwargs):
+        headers = {**self.authorization(user), **(headers or {})} if user else headers
+        return await view(self.factory.get(url, headers=headers), **kwargs)
+
+    async def test_responses_match_the_sync_views(self):
+        course_id = self.course.id
+        endpoints = [
+            (async_views.course_list_view, '/api/courses/', {}),
+            (async_views.course_list_view, '/api/courses/?page_size=1', {}),
+            (async_views.course_detail_view, f'/api/courses/{course_id}/', {'pk': course_id}),
+            (async_views.content_list_view, f'/api/courses/{course_id}/contents/', {'course_id': course_id}),
+            (async_views.my_enrollments_view, '/api/enrollments/', {}),
+            (async_views.my_progress_view, '/api/progress/', {}),
+        ]
+        for view, url, kwargs in endpoints:
+            with self.subTest(url=url):
+                expected = await sync_to_async(self.sync_get)(self.student, url)
+                response = await self.async_get(view, self.student, url, **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), expected.json())
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    async def test_conditional_get(self):
+        url = f'/api/courses/{self.course.id}/'
+        response = await self.async_get(async_views.course_detail_view, self.student, url, pk=self.course.id)
+        response = await self.async_get(async_views.course_detail_view, self.student, url,
+                                        headers={'If-None-Match': response['ETag']}, pk=self.course.id)
+        self.assertEqual(response.status_code, 304)
+
+        await Course.objects.filter(pk=self.course.pk).aupdate(title='Renamed', updated_at=timezone.now())
+        response = await self.async_get(async_views.course_detail_view, self.student, url,
+                                        headers={'If-None-Match': response['ETag']}, pk=self.course.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['title'], 'Renamed')
+
+    async def test_errors(self):
+        response = await self.async_get(async_views.course_list_view, None, '/api/courses/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+        response = await self.async_get(async_views.my_progress_view, self.lecturer, '/api/progress/')
+        self.assertEqual(response.status_code, 403)
+
+        draft = await Course.objects.aget(title='Draft')
+        response = await self.async_get(async_views.course_detail_view, self.student,
+                                        f'/api/courses/{draft.id}/', pk=draft.id)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_other_methods_reach_the_sync_view(self):
+        request = self.factory.post(
+            '/api/courses/', {'title': 'New', 'description': 'New course', 'price': '5.00'},
+            content_type='application/json', headers=self.authorization(self.lecturer),
+        )
+        response = await async_views.course_list_view(request)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(await Course.objects.filter(title='New', lecturer=self.lecturer).aexists())
+        self.assertIn('POST', response['Allow'])
+
+    @override_settings(ASGI_MODE=True)
+    async def test_student_progress_stream_is_async(self):
+        url = f'/api/courses/{self.course.id}/student-progress/'
+        expected = (await sync_to_async(self.sync_get)(self.lecturer, url)).json()
+        with mock.patch.object(CourseStudentProgressView, 'stream_batch_size', 3):
+            response = await AsyncClient().get(f'{url}?stream=true', headers=self.authorization(self.lecturer))
+            self.assertEqual(response.status_code, 200, getattr(response, 'data', None))
+            self.assertTrue(response.is_async)
+            body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(json.loads(body), expected)
+
+
+class KeysetPaginationTests(TestCase):
+    """Following `next` links visits every row once, in the unpaginated order"""
+
+    def setUp(self):
+        course_cache.backend.clear()
+        course_cache.clear()
+        self.lecturer = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        self.student = User.objects.create_user('student', 'student@example.com', 'password123', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def create_courses(self, rows):
+        courses = [
+            Course.objects.create(title=title, description='', price=price, lecturer=self.lecturer, is_published=True)
+            for title, price in rows
+        ]
+        index_courses(Course.objects.filter(id__in=[course.id for course in courses]).select_related('category'))
+        return courses
+
+    def walk(self, params, page_size=2):
+        response = self.client.get('/api/courses/', {**params, 'page_size': page_size})
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), page_size)
+            ids.extend(course['id'] for course in data['results'])
+            if data['next'] is None:
+                return ids
+            response = self.client.get(data['next'])
+
+    def assertWalksInOrder(self, params, page_size=2):
+        expected = [course['id'] for course in self.client.get('/api/courses/', params).json()]
+        self.assertEqual(self.walk(params, page_size), expected)
+        return expected
+
+    def cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def test_decimal_price_cursor(self):
+        self.create_courses([
+            ('A', '10.50'), ('B', '9.99'), ('C', '10.50'), ('D', '100.00'), ('E', '10.50'), ('F', '10.5'),
+        ])
+        for sort in ('price', '-price'):
+            with self.subTest(sort=sort):
+                ids = self.assertWalksInOrder({'sort': sort})
+                self.assertEqual(len(ids), 6)
+
+    def test_datetime_cursor(self):
+        courses = self.create_courses([(f'Course {index}', 10) for index in range(7)])
+        base = timezone.now().replace(microsecond=0)
+        # Microsecond differences and exact ties across page boundaries
+        offsets = [0, 1, 1, 999, 1000, 1000, 1001]
+        for course, offset in zip(courses, offsets):
+            Course.objects.filter(pk=course.pk).update(created_at=base + timedelta(microseconds=offset))
+        for sort in ('created_at', '-created_at'):
+            with self.subTest(sort=sort):
+                ids = self.assertWalksInOrder({'sort': sort})
+                self.assertEqual(len(ids), 7)
+
+    def test_search_rank_cursor(self):
+        self.create_courses([
+            ('Python', 10), ('Python Python', 10), ('Pythonic', 10), ('Python Basics', 10),
+            ('Python Web', 10), ('Python', 20), ('Learn Python', 10),
+        ])
+        ids = self.assertWalksInOrder({'search': 'python'}, page_size=1)
+        self.assertEqual(len(ids), 7)
+
+    def test_invalid_cursor(self):
+        self.create_courses([('A', 10), ('B', 12)])
+        invalid = {
+            'not base64': 'not base64!',
+            'not JSON': base64.urlsafe_b64encode(b'{').decode(),
+            'not a list': self.cursor({'price': 10}),
+            'wrong length': self.cursor(['10.00']),
+            'bad decimal': self.cursor(['ten', 1]),
+            'bad datetime': self.cursor(['yesterday', 1]),
+            'bad rank': self.cursor(['high', '2024-01-01T00:00:00Z', 1]),
+        }
+        params = {'not base64': {}, 'not JSON': {}, 'not a list': {}, 'wrong length': {'sort': 'price'},
+                  'bad decimal': {'sort': 'price'}, 'bad datetime': {}, 'bad rank': {'search': 'a'}}
+        for label, cursor in invalid.items():
+            with self.subTest(label):
+                response = self.client.get('/api/courses/', {**params[label], 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
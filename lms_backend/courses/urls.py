@@ -1,27 +1,52 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     CourseListCreateView, 
     CourseDetailView,
     EnrollmentView,
+    CourseRosterImportView,
     MyEnrollmentsView,
     CourseContentListCreateView,
+    CourseContentBulkCreateView,
+    CourseContentReorderView,
     CourseContentDetailView,
     MarkContentCompleteView,
+    VideoHeartbeatView,
     MyProgressView,
+    CourseProgressUpdateView,
     CourseStudentProgressView,
+    CourseProgressExportView,
     CategoryListCreateView
 )
 
+if settings.ASGI_MODE:
+    # Read-heavy endpoints answer GET with the async ORM; other methods reach the sync views
+    from .async_views import (
+        content_list_view, course_detail_view, course_list_view, my_enrollments_view, my_progress_view
+    )
+else:
+    course_list_view = CourseListCreateView.as_view()
+    course_detail_view = CourseDetailView.as_view()
+    content_list_view = CourseContentListCreateView.as_view()
+    my_enrollments_view = MyEnrollmentsView.as_view()
+    my_progress_view = MyProgressView.as_view()
+
 urlpatterns = [
     path('categories/', CategoryListCreateView.as_view(), name='category-list-create'),
-    path('courses/', CourseListCreateView.as_view(), name='course-list-create'),
-    path('courses/<int:pk>/', CourseDetailView.as_view(), name='course-detail'),
+    path('courses/', course_list_view, name='course-list-create'),
+    path('courses/<int:pk>/', course_detail_view, name='course-detail'),
     path('courses/<int:course_id>/enroll/', EnrollmentView.as_view(), name='enroll-course'),
-    path('enrollments/', MyEnrollmentsView.as_view(), name='my-enrollments'),
-    path('courses/<int:course_id>/contents/', CourseContentListCreateView.as_view(), name='course-content-list-create'),
+    path('courses/<int:course_id>/roster/', CourseRosterImportView.as_view(), name='course-roster-import'),
+    path('enrollments/', my_enrollments_view, name='my-enrollments'),
+    path('courses/<int:course_id>/contents/', content_list_view, name='course-content-list-create'),
+    path('courses/<int:course_id>/contents/bulk/', CourseContentBulkCreateView.as_view(), name='course-content-bulk-create'),
+    path('courses/<int:course_id>/contents/reorder/', CourseContentReorderView.as_view(), name='course-content-reorder'),
     path('contents/<int:pk>/', CourseContentDetailView.as_view(), name='course-content-detail'),
     path('contents/<int:content_id>/complete/', MarkContentCompleteView.as_view(), name='mark-content-complete'),
-    path('progress/', MyProgressView.as_view(), name='my-progress'),
+    path('contents/<int:content_id>/heartbeat/', VideoHeartbeatView.as_view(), name='video-heartbeat'),
+    path('progress/', my_progress_view, name='my-progress'),
+    path('courses/<int:course_id>/progress/', CourseProgressUpdateView.as_view(), name='course-progress-update'),
     path('courses/<int:course_id>/student-progress/', CourseStudentProgressView.as_view(), name='course-student-progress'),
+    path('courses/<int:course_id>/student-progress/export/', CourseProgressExportView.as_view(), name='course-progress-export'),
 ]
 
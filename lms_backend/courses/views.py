@@ -3,14 +3,37 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework.views import APIView
-from django.db.models import Count, Q
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.utils.encoders import JSONEncoder
+from asgiref.sync import sync_to_async
+from datetime import datetime, time
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Count, Exists, F, Max, Q, OuterRef, Subquery, Sum
 from django.db.models.functions import Lower
+from lms_backend.metrics import registry as metrics
 from .models import Course, Enrollment, CourseContent, LearningProgress, Category
 from .serializers import (
     CourseSerializer, EnrollmentSerializer, CourseContentSerializer,
     LearningProgressSerializer, CourseProgressSerializer, CategorySerializer
 )
-from accounts.models import User
+from .cache import category_cache, course_cache
+from .conditional import ConditionalGetMixin
+from .heartbeats import heartbeat_buffer
+from .ordering import ORDER_GAP, OrderingError, apply_ordering, move_content, next_order
+from .pagination import KeysetPagination
+from .parsers import CSVParser, NDJSONParser
+from .progress import (
+    EXPORT_FIELDS, EXPORT_STATUSES, apply_progress_changes, build_export_row, build_student_rows,
+    get_course_contents, get_export_rows, get_progress_summaries, lock_enrollments, summarize_enrollment,
+    upsert_progress
+)
+from .renderers import CSVRenderer, NDJSONRenderer
+from .roster import enroll_roster, read_roster
+from .search import search_courses
 
 class IsLecturer(permissions.BasePermission):
     """Custom permission to only allow lecturers to create/edit courses."""
@@ -20,15 +43,82 @@ class IsLecturer(permissions.BasePermission):
             return True
         return request.user.is_authenticated and request.user.role == 'lecturer'
 
+def get_enrolled_course_ids(user, course_ids=None):
+    """Return the set of course ids the student is enrolled in (one query)"""
+    if not user.is_authenticated or user.role != 'student':
+        return set()
+    enrollments = Enrollment.objects.filter(student=user)
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+    return set(enrollments.values_list('course_id', flat=True))
+
+
+# Aggregates summarizing everything a listing depends on, for response validators
+ENROLLMENT_STATE = {'count': Count('id'), 'last_enrolled': Max('enrolled_at')}
+COURSE_STATE = {
+    'last_modified': Max('updated_at'),
+    'count': Count('id'),
+    # students_count is bumped in SQL without touching updated_at
+    'students': Sum('students_count'),
+}
+CONTENT_STATE = {
+    'last_modified': Max('updated_at'),
+    'count': Count('id'),
+    'course_modified': Max('course__updated_at'),
+}
+COMPLETION_STATE = {'last_modified': Max('updated_at'), 'count': Count('id', filter=Q(completed=True))}
+
+
+def get_enrollment_state(user):
+    """Summary of the student's enrollments, for response validators (one query)"""
+    if not user.is_authenticated or user.role != 'student':
+        return None
+    return Enrollment.objects.filter(student=user).aggregate(**ENROLLMENT_STATE)
+
+
+def load_published_courses(course_ids):
+    """Serialized published courses by id, for filling the course cache"""
+    courses = Course.objects.filter(
+        id__in=course_ids, is_published=True
+    ).select_related('lecturer', 'category').order_by()
+    # Serialized without a request, so the cached payload carries no per-user data
+    return {item['id']: dict(item) for item in CourseSerializer(courses, many=True).data}
+
+
+def get_cached_courses(user, course_ids):
+    """Serialized published courses from the versioned cache, with the user's is_enrolled merged in"""
+    cached = course_cache.get_many(course_ids, load_published_courses)
+    enrolled_course_ids = get_enrolled_course_ids(user, course_ids)
+    return [
+        dict(cached[course_id], is_enrolled=course_id in enrolled_course_ids)
+        for course_id in course_ids
+        if course_id in cached
+    ]
+
+
 class CategoryListCreateView(generics.ListCreateAPIView):
     """List all categories or create new category (for lecturers)"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        # Return categories that have published courses
-        return Category.objects.filter(courses__is_published=True).distinct()
+        # Return categories that have published courses, with the count annotated
+        has_published = Course.objects.filter(category=OuterRef('pk'), is_published=True)
+        return Category.objects.filter(Exists(has_published)).annotate(
+            published_courses_count=Count('courses', filter=Q(courses__is_published=True))
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator.is_requested(request):
+            return super().list(request, *args, **kwargs)
+        # The sidebar is identical for every user, so serve it from the cache
+        data = category_cache.get_or_set(
+            'published',
+            lambda: list(self.get_serializer(self.get_queryset(), many=True).data)
+        )
+        return Response(data)
 
     def perform_create(self, serializer):
         # Only lecturers can create categories
@@ -37,14 +127,20 @@ class CategoryListCreateView(generics.ListCreateAPIView):
         serializer.save()
 
 
-class CourseListCreateView(generics.ListCreateAPIView):
+class CourseListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_validator_state(self):
+        courses = self.filter_queryset(self.get_queryset()).order_by().aggregate(**COURSE_STATE)
+        enrollments = get_enrollment_state(self.request.user)
+        return courses, enrollments
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Course.objects.all()
+        queryset = Course.objects.select_related('lecturer', 'category')
         
         # Base filtering by role
         if user.role == 'lecturer':
@@ -52,15 +148,6 @@ class CourseListCreateView(generics.ListCreateAPIView):
         else:
             queryset = queryset.filter(is_published=True)
         
-        # Search functionality
-        search_query = self.request.query_params.get('search', None)
-        if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(category__name__icontains=search_query)
-            )
-        
         # Category filter
         category_id = self.request.query_params.get('category', None)
         if category_id:
@@ -79,16 +166,41 @@ class CourseListCreateView(generics.ListCreateAPIView):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
         
-        # Sort options
-        sort_by = self.request.query_params.get('sort', '-created_at')
+        # Search functionality (ranked, prefix matching over the token index)
+        search_query = self.request.query_params.get('search', None)
+        if search_query:
+            queryset = search_courses(queryset, search_query)
+        
+        # Sort options; searches default to relevance order
+        default_sort = '-search_rank' if search_query else '-created_at'
+        sort_by = self.request.query_params.get('sort', default_sort)
         if sort_by in ['price', '-price', 'title', '-title', 'created_at', '-created_at', 'students_count', '-students_count']:
             queryset = queryset.order_by(sort_by)
+        elif sort_by == '-search_rank' and search_query:
+            queryset = queryset.order_by('-search_rank', '-created_at')
         
-        return queryset.distinct()
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if request.user.role == 'lecturer':
+            return super().list(request, *args, **kwargs)
+        # Students only see published metadata: resolve the page's ids from the database
+        # and the payloads from the course cache
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).only(
+            'id', 'created_at', 'price', 'title', 'students_count'
+        )
+        page = self.paginate_queryset(queryset)
+        courses = page if page is not None else queryset
+        data = get_cached_courses(request.user, [course.id for course in courses])
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        if self.request.method == 'GET':
+            context['enrolled_course_ids'] = get_enrolled_course_ids(self.request.user)
         return context
 
     def perform_create(self, serializer):
@@ -100,23 +212,53 @@ class CourseListCreateView(generics.ListCreateAPIView):
             )
         serializer.save(lecturer=self.request.user)
 
-class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_validator_state(self):
+        # Kept for retrieve(): the row is the database's word on visibility and counters
+        self.state = self.get_state_queryset().first()
+        return self.state
+
+    def get_state_queryset(self):
+        user = self.request.user
+        return self.get_queryset().filter(pk=self.kwargs['pk']).annotate(
+            is_enrolled=Exists(Enrollment.objects.filter(course=OuterRef('pk'), student_id=user.pk))
+        ).values('updated_at', 'students_count', 'is_enrolled')
+
     def get_queryset(self):
         user = self.request.user
         if user.role == 'lecturer':
             # Lecturers can only edit their own courses
-            return Course.objects.filter(lecturer=user)
+            return Course.objects.filter(lecturer=user).select_related('lecturer', 'category')
         else:
             # Students can only view published courses
-            return Course.objects.filter(is_published=True)
+            return Course.objects.filter(is_published=True).select_related('lecturer', 'category')
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.role == 'lecturer':
+            return super().retrieve(request, *args, **kwargs)
+        # The cached payload may predate an unpublish or enrollment seen by another
+        # worker; the validator state was just read from the database
+        if self.state is None:
+            raise NotFound()
+        pk = self.kwargs['pk']
+        data = course_cache.get_many([pk], load_published_courses).get(pk)
+        if data is None:
+            raise NotFound()
+        return Response(dict(
+            data, is_enrolled=self.state['is_enrolled'], students_count=self.state['students_count']
+        ))
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        if 'pk' in self.kwargs:
+            context['enrolled_course_ids'] = get_enrolled_course_ids(
+                self.request.user, course_ids=[self.kwargs['pk']]
+            )
         return context
 
     def perform_update(self, serializer):
@@ -159,15 +301,19 @@ class EnrollmentView(APIView):
             )
         
         # Check if already enrolled
-        enrollment, created = Enrollment.objects.get_or_create(
-            student=request.user,
-            course=course
-        )
+        with transaction.atomic():
+            enrollment, created = Enrollment.objects.get_or_create(
+                student=request.user,
+                course=course
+            )
+            if created:
+                # Increment in SQL so concurrent enrollments don't race or rewrite the row;
+                # `reconcile_students_count` repairs any drift
+                Course.objects.filter(pk=course.pk).update(students_count=F('students_count') + 1)
+                transaction.on_commit(lambda: course_cache.bump(course.pk))
         
         if created:
-            # Update students count
-            course.students_count = Enrollment.objects.filter(course=course).count()
-            course.save()
+            metrics.inc('lms_enrollments_total')
             serializer = EnrollmentSerializer(enrollment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         else:
@@ -177,44 +323,114 @@ class EnrollmentView(APIView):
             )
 
 
+class CourseRosterImportView(APIView):
+    """Enroll a cohort of students in a lecturer's course from a CSV of usernames or emails.
+
+    Send the CSV as the body (`Content-Type: text/csv`) or as a multipart upload
+    in the `file` field: one student per row in the first column, with an
+    optional header row. Responds with created, existing and unknown counts.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [CSVParser, MultiPartParser]
+    max_rows = 50000
+
+    def post(self, request, course_id):
+        if request.user.role != 'lecturer':
+            raise PermissionDenied('Only lecturers can import rosters')
+        
+        try:
+            course = Course.objects.get(id=course_id, lecturer=request.user)
+        except Course.DoesNotExist:
+            raise NotFound('Course not found or you are not the owner')
+        
+        if 'file' in request.FILES:
+            lines = (line.decode('utf-8-sig') for line in request.FILES['file'])
+        elif isinstance(request.data, list):
+            lines = request.data
+        else:
+            return Response(
+                {'error': 'Send a text/csv body or upload the CSV as "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            identifiers = list(read_roster(lines))
+        except UnicodeDecodeError:
+            return Response({'error': 'The CSV file must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(identifiers) > self.max_rows:
+            return Response(
+                {'error': f'At most {self.max_rows} students can be imported per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(enroll_roster(course, identifiers))
+
+
 class MyEnrollmentsView(generics.ListAPIView):
     """List all courses enrolled by the current student"""
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated, IsStudent]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        return Enrollment.objects.filter(student=self.request.user)
+        return Enrollment.objects.filter(student=self.request.user).select_related('course', 'student')
+
+
+def get_visible_contents(user, course_id, is_enrolled):
+    """Contents of a course the user may list"""
+    # Lecturers can see all content for their courses
+    if user.role == 'lecturer':
+        return CourseContent.objects.filter(
+            course_id=course_id, course__lecturer=user
+        ).select_related('course')
+    
+    # Students can only see content if enrolled
+    if user.role == 'student' and is_enrolled:
+        return CourseContent.objects.filter(
+            course_id=course_id, course__is_published=True
+        ).select_related('course')
+    
+    return CourseContent.objects.none()
 
 
-class CourseContentListCreateView(generics.ListCreateAPIView):
+class CourseContentListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """List or create course content (lecturers can create, enrolled students can view)"""
     serializer_class = CourseContentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_validator_state(self):
+        contents = self.get_queryset().order_by().aggregate(**CONTENT_STATE)
+        completed = {}
+        user = self.request.user
+        if user.role == 'student':
+            completed = LearningProgress.objects.filter(
+                student=user,
+                content__course_id=self.kwargs.get('course_id'),
+            ).aggregate(**COMPLETION_STATE)
+        return contents, completed
     
     def get_queryset(self):
         course_id = self.kwargs.get('course_id')
         user = self.request.user
-        
-        # Lecturers can see all content for their courses
-        if user.role == 'lecturer':
-            return CourseContent.objects.filter(course_id=course_id, course__lecturer=user)
-        
-        # Students can only see content if enrolled
-        elif user.role == 'student':
-            is_enrolled = Enrollment.objects.filter(
-                student=user,
-                course_id=course_id
-            ).exists()
-            if is_enrolled:
-                return CourseContent.objects.filter(course_id=course_id, course__is_published=True)
-            else:
-                return CourseContent.objects.none()
-        
-        return CourseContent.objects.none()
+        is_enrolled = user.role == 'student' and Enrollment.objects.filter(
+            student=user,
+            course_id=course_id
+        ).exists()
+        return get_visible_contents(user, course_id, is_enrolled)
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        user = self.request.user
+        if self.request.method == 'GET' and user.is_authenticated and user.role == 'student':
+            context['completed_content_ids'] = set(
+                LearningProgress.objects.filter(
+                    student=user,
+                    content__course_id=self.kwargs.get('course_id'),
+                    completed=True
+                ).order_by().values_list('content_id', flat=True)
+            )
         return context
     
     def perform_create(self, serializer):
@@ -230,7 +446,117 @@ class CourseContentListCreateView(generics.ListCreateAPIView):
         except Course.DoesNotExist:
             raise NotFound('Course not found or you are not the owner')
         
-        serializer.save(course=course)
+        # Without an explicit order (or with the form's default 0), append after the existing contents
+        if not serializer.validated_data.get('order'):
+            serializer.save(course=course, order=next_order(course))
+        else:
+            serializer.save(course=course)
+
+
+class CourseContentBulkCreateView(APIView):
+    """Create many contents for a lecturer's course from a JSON array or NDJSON stream"""
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+    max_rows = 5000
+    batch_size = 500
+
+    def post(self, request, course_id):
+        if request.user.role != 'lecturer':
+            raise PermissionDenied('Only lecturers can create course content')
+        
+        try:
+            course = Course.objects.get(id=course_id, lecturer=request.user)
+        except Course.DoesNotExist:
+            raise NotFound('Course not found or you are not the owner')
+        
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {'error': 'Expected a JSON array or NDJSON stream of contents'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > self.max_rows:
+            return Response(
+                {'error': f'At most {self.max_rows} contents can be imported per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validate every row before writing anything, reporting all errors at once
+        contents = []
+        errors = []
+        for index, row in enumerate(rows):
+            serializer = CourseContentSerializer(data=row, context={'request': request})
+            if serializer.is_valid():
+                contents.append(CourseContent(course=course, **serializer.validated_data))
+            else:
+                errors.append({'row': index, 'errors': serializer.errors})
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Rows without an explicit order (or with 0) are appended after the existing contents
+        order = next_order(course)
+        for content in contents:
+            if not content.order:
+                content.order = order
+                order += ORDER_GAP
+        
+        with transaction.atomic():
+            CourseContent.objects.bulk_create(contents, batch_size=self.batch_size)
+            # bulk_create skips the post_save signal that maintains the rollup
+            Course.objects.filter(pk=course.pk).update(content_count=F('content_count') + len(contents))
+        
+        return Response({'created': len(contents)}, status=status.HTTP_201_CREATED)
+
+
+def is_content_id(value):
+    """Whether a JSON value is an integer id (JSON booleans are ints in Python)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class CourseContentReorderView(APIView):
+    """Reorder a lecturer's course contents.
+
+    Send `{"content_ids": [...]}` with the full new order, or
+    `{"content_id": id, "after_id": id | null}` to move a single content.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, course_id):
+        if request.user.role != 'lecturer':
+            raise PermissionDenied('Only lecturers can reorder course content')
+        
+        try:
+            course = Course.objects.get(id=course_id, lecturer=request.user)
+        except Course.DoesNotExist:
+            raise NotFound('Course not found or you are not the owner')
+        
+        data = request.data
+        try:
+            if 'content_ids' in data:
+                content_ids = data['content_ids']
+                if not isinstance(content_ids, list) or not all(map(is_content_id, content_ids)):
+                    return Response(
+                        {'error': 'content_ids must be a list of content ids'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                contents = apply_ordering(course, content_ids)
+            elif 'content_id' in data:
+                content_id, after_id = data['content_id'], data.get('after_id')
+                if not is_content_id(content_id) or not (after_id is None or is_content_id(after_id)):
+                    return Response(
+                        {'error': 'content_id and after_id must be content ids'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                contents = move_content(course, content_id, after_id)
+            else:
+                return Response(
+                    {'error': 'Provide content_ids or content_id'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        except OrderingError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response([{'id': content.id, 'order': content.order} for content in contents])
 
 
 class CourseContentDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -243,14 +569,14 @@ class CourseContentDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Lecturers can manage their own course content
         if user.role == 'lecturer':
-            return CourseContent.objects.filter(course__lecturer=user)
+            return CourseContent.objects.filter(course__lecturer=user).select_related('course')
         
         # Students can view content if enrolled
         elif user.role == 'student':
             return CourseContent.objects.filter(
                 course__enrollments__student=user,
                 course__is_published=True
-            )
+            ).select_related('course')
         
         return CourseContent.objects.none()
     
@@ -305,20 +631,151 @@ class MarkContentCompleteView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get or create progress record
-        progress, created = LearningProgress.objects.get_or_create(
-            student=request.user,
-            content=content
-        )
-        
-        # Toggle completion status
-        progress.completed = not progress.completed
-        progress.save()
+        with transaction.atomic():
+            # Concurrent writers of this enrollment wait here, so the toggle reads the
+            # latest state and the post_save recount of completed_count is exact
+            lock_enrollments([(request.user.id, content.course_id)])
+            progress = LearningProgress.objects.filter(student=request.user, content=content).first()
+            if progress is None:
+                progress = LearningProgress(student=request.user, content=content)
+            
+            # Set the requested state when given, otherwise toggle (legacy behaviour)
+            completed = request.data.get('completed')
+            if isinstance(completed, bool):
+                progress.completed = completed
+            else:
+                progress.completed = not progress.completed
+            progress.save()
+        metrics.inc('lms_progress_writes_total', {'source': 'mark_complete'})
         
         serializer = LearningProgressSerializer(progress)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class CourseProgressUpdateView(APIView):
+    """Set completion for many contents of a course in one request.
+
+    The body maps content ids to the desired state, e.g. `{"12": true, "13": false}`.
+    Updates are idempotent (set, not toggle), so retries and offline replays are safe.
+    """
+    permission_classes = [IsAuthenticated, IsStudent]
+    max_items = 1000
+
+    def post(self, request, course_id):
+        updates = request.data
+        if not isinstance(updates, dict) or not updates:
+            return Response(
+                {'error': 'Expected an object mapping content ids to true/false'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(updates) > self.max_items:
+            return Response(
+                {'error': f'At most {self.max_items} contents can be updated per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            updates = {int(content_id): completed for content_id, completed in updates.items()}
+        except (TypeError, ValueError):
+            return Response({'error': 'Content ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(completed, bool) for completed in updates.values()):
+            return Response({'error': 'Completion values must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        is_enrolled = Enrollment.objects.filter(
+            student=request.user,
+            course_id=course_id
+        ).exists()
+        if not is_enrolled:
+            return Response(
+                {'error': 'You must be enrolled in this course to update progress'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Resolve the contents and their current progress in one query
+        existing = LearningProgress.objects.filter(student=request.user, content=OuterRef('pk'))
+        contents = CourseContent.objects.filter(course_id=course_id, id__in=updates).annotate(
+            was_completed=Subquery(existing.values('completed')[:1]),
+            was_completed_at=Subquery(existing.values('completed_at')[:1]),
+        ).values_list('id', 'was_completed', 'was_completed_at')
+        
+        now = timezone.now()
+        rows = []
+        found = set()
+        for content_id, was_completed, was_completed_at in contents:
+            found.add(content_id)
+            completed = updates[content_id]
+            if was_completed is not None and was_completed == completed:
+                continue
+            rows.append(LearningProgress(
+                student=request.user,
+                content_id=content_id,
+                completed=completed,
+                completed_at=(was_completed_at or now) if completed else None,
+            ))
+        
+        missing = set(updates) - found
+        if missing:
+            return Response(
+                {'error': 'Content not found in this course', 'content_ids': sorted(missing)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if rows:
+            with transaction.atomic():
+                enrollment_ids = lock_enrollments([(request.user.id, course_id)])
+                upsert_progress(rows)
+                apply_progress_changes(enrollment_ids, now)
+            metrics.inc('lms_progress_writes_total', {'source': 'batch'}, len(rows))
+        
+        return Response({
+            'course_id': course_id,
+            'updated': len(rows),
+            'progress': [
+                {
+                    'content_id': row.content_id,
+                    'completed': row.completed,
+                    'completed_at': row.completed_at,
+                }
+                for row in rows
+            ],
+        })
+
+
+class VideoHeartbeatView(APIView):
+    """Receive periodic playback pings (`position`, optional `duration` and `elapsed` seconds).
+
+    Pings are buffered in memory and written in batches, so a heartbeat normally
+    costs no database writes.
+    """
+    permission_classes = [IsAuthenticated, IsStudent]
+
+    def post(self, request, content_id):
+        try:
+            position = float(request.data.get('position'))
+            duration = request.data.get('duration')
+            duration = float(duration) if duration is not None else None
+            elapsed = request.data.get('elapsed')
+            elapsed = float(elapsed) if elapsed is not None else None
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'position, duration and elapsed must be numbers of seconds'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if position < 0 or (duration is not None and duration <= 0):
+            return Response(
+                {'error': 'position must be >= 0 and duration > 0'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not heartbeat_buffer.is_authorized(request.user, content_id):
+            return Response(
+                {'error': 'Video not found or you are not enrolled in its course'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        heartbeat_buffer.record(request.user.id, content_id, position, duration, elapsed)
+        return Response({'buffered': True}, status=status.HTTP_202_ACCEPTED)
+
+
 class MyProgressView(generics.ListAPIView):
     """Get progress for all courses the student is enrolled in"""
     serializer_class = CourseProgressSerializer
@@ -326,31 +783,7 @@ class MyProgressView(generics.ListAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        enrollments = Enrollment.objects.filter(student=user)
-        
-        progress_data = []
-        for enrollment in enrollments:
-            course = enrollment.course
-            total_content = CourseContent.objects.filter(course=course).count()
-            completed_content = LearningProgress.objects.filter(
-                student=user,
-                content__course=course,
-                completed=True
-            ).count()
-            
-            progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
-            
-            progress_data.append({
-                'course_id': course.id,
-                'course_title': course.title,
-                'total_content': total_content,
-                'completed_content': completed_content,
-                'progress_percentage': round(progress_percentage, 2),
-                'student_name': user.username,
-                'student_id': user.id,
-            })
-        
-        return progress_data
+        return [summarize_enrollment(user, enrollment) for enrollment in get_progress_summaries(user)]
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -359,8 +792,14 @@ class MyProgressView(generics.ListAPIView):
 
 
 class CourseStudentProgressView(APIView):
-    """Get progress of all students enrolled in a course (for lecturers)"""
+    """Get progress of all students enrolled in a course (for lecturers).
+
+    Supports cursor pagination over students (`page_size`, `cursor`) and a
+    streaming mode (`stream=true`) for very large courses.
+    """
     permission_classes = [IsAuthenticated]
+    max_page_size = 500
+    stream_batch_size = 500
     
     def get(self, request, course_id):
         user = request.user
@@ -372,15 +811,6 @@ class CourseStudentProgressView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        # Refresh user from database to ensure we have the latest role
-        try:
-            user = User.objects.get(id=user.id)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
         # Only lecturers can view student progress
         if user.role != 'lecturer':
             return Response(
@@ -399,51 +829,190 @@ class CourseStudentProgressView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get all enrollments for this course
-        enrollments = Enrollment.objects.filter(course=course)
-        total_content = CourseContent.objects.filter(course=course).count()
-        
-        student_progress = []
-        for enrollment in enrollments:
-            student = enrollment.student
-            completed_content = LearningProgress.objects.filter(
-                student=student,
-                content__course=course,
-                completed=True
-            ).count()
-            
-            progress_percentage = (completed_content / total_content * 100) if total_content > 0 else 0
-            
-            # Get detailed progress for each content item
-            content_progress = []
-            contents = CourseContent.objects.filter(course=course).order_by('order', 'created_at')
-            for content in contents:
-                progress = LearningProgress.objects.filter(
-                    student=student,
-                    content=content,
-                    completed=True
-                ).first()
-                content_progress.append({
-                    'content_id': content.id,
-                    'content_title': content.title,
-                    'completed': progress is not None,
-                    'completed_at': progress.completed_at if progress else None,
-                })
-            
-            student_progress.append({
-                'student_id': student.id,
-                'student_name': student.username,
-                'student_email': student.email,
-                'enrolled_at': enrollment.enrolled_at,
-                'total_content': total_content,
-                'completed_content': completed_content,
-                'progress_percentage': round(progress_percentage, 2),
-                'content_progress': content_progress,
-            })
-        
-        return Response({
+        contents = get_course_contents(course)
+        total_content = len(contents)
+        enrollments = (
+            Enrollment.objects.filter(course=course)
+            .select_related('student')
+            .only('id', 'enrolled_at', 'student__id', 'student__username', 'student__email')
+            .order_by('-id')
+        )
+
+        # Cursor pagination over students, keyed on the enrollment id
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                enrollments = enrollments.filter(id__lt=int(cursor))
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid cursor'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        page_size = request.query_params.get('page_size')
+        if page_size:
+            try:
+                page_size = min(max(int(page_size), 1), self.max_page_size)
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid page_size'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        header = {
             'course_id': course.id,
             'course_title': course.title,
             'total_content': total_content,
-            'students': student_progress,
-        })
+        }
+
+        if request.query_params.get('stream') in ('1', 'true'):
+            if page_size:
+                enrollments = enrollments[:page_size]
+            # Under ASGI a synchronous iterator would be read to the end before sending anything
+            stream = self.astream_progress if settings.ASGI_MODE else self.stream_progress
+            return StreamingHttpResponse(
+                stream(course, header, enrollments, contents),
+                content_type='application/json'
+            )
+
+        next_cursor = None
+        if page_size:
+            page = list(enrollments[:page_size + 1])
+            if len(page) > page_size:
+                page = page[:page_size]
+                next_cursor = page[-1].id
+            enrollments = page
+
+        data = dict(header)
+        data['students'] = build_student_rows(course, enrollments, contents)
+        if page_size:
+            data['next_cursor'] = next_cursor
+        return Response(data)
+
+    def stream_progress(self, course, header, enrollments, contents):
+        """Yield the progress report as a JSON document, one batch of students at a time"""
+        yield self.encode_header(header)
+        first = True
+        batch = []
+        for enrollment in enrollments.iterator(chunk_size=self.stream_batch_size):
+            batch.append(enrollment)
+            if len(batch) >= self.stream_batch_size:
+                yield self.encode_students(build_student_rows(course, batch, contents), first)
+                first = False
+                batch = []
+        if batch:
+            yield self.encode_students(build_student_rows(course, batch, contents), first)
+        yield ']}'
+
+    async def astream_progress(self, course, header, enrollments, contents):
+        yield self.encode_header(header)
+        first = True
+        batch = []
+        async for enrollment in enrollments.aiterator(chunk_size=self.stream_batch_size):
+            batch.append(enrollment)
+            if len(batch) >= self.stream_batch_size:
+                yield self.encode_students(await sync_to_async(build_student_rows)(course, batch, contents), first)
+                first = False
+                batch = []
+        if batch:
+            yield self.encode_students(await sync_to_async(build_student_rows)(course, batch, contents), first)
+        yield ']}'
+
+    def encode_header(self, header):
+        return JSONEncoder().encode(header)[:-1] + ', "students": ['
+
+    def encode_students(self, rows, first):
+        encoder = JSONEncoder()
+        return ('' if first else ', ') + ', '.join(encoder.encode(row) for row in rows)
+
+
+def parse_timestamp(value):
+    """Aware datetime from an ISO date (midnight) or datetime string, or None if invalid"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            date = parse_date(value)
+            parsed = datetime.combine(date, time.min) if date else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class CourseProgressExportView(APIView):
+    """Export one progress row per enrolled student as CSV or NDJSON (for lecturers).
+
+    The format comes from `?format=csv|ndjson` or the Accept header (CSV by
+    default). Filters: `enrolled_after` (inclusive) and `enrolled_before`
+    (exclusive) as ISO dates or datetimes, and `status` (`not_started`,
+    `in_progress` or `completed`). The header goes out straight away and rows
+    are written as they are read from a database cursor, so memory use is the
+    same for 50 or 500,000 enrollments.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    chunk_size = 2000
+    # Rows encoded per chunk written to the client
+    write_batch_size = 500
+
+    def get(self, request, course_id):
+        if request.user.role != 'lecturer':
+            raise PermissionDenied('Only lecturers can export student progress')
+        
+        try:
+            course = Course.objects.only('id', 'content_count').get(id=course_id, lecturer=request.user)
+        except Course.DoesNotExist:
+            raise NotFound('Course not found or you are not the owner')
+        
+        filters = {}
+        for param in ('enrolled_after', 'enrolled_before'):
+            value = request.query_params.get(param)
+            if value:
+                filters[param] = parse_timestamp(value)
+                if filters[param] is None:
+                    return Response(
+                        {'error': f'{param} must be an ISO date or datetime'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+        completion = request.query_params.get('status')
+        if completion:
+            if completion not in EXPORT_STATUSES:
+                return Response(
+                    {'error': f'status must be one of {", ".join(EXPORT_STATUSES)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            filters['status'] = completion
+        
+        rows = get_export_rows(course, **filters)
+        renderer = request.accepted_renderer
+        # Under ASGI a synchronous iterator would be read to the end before sending anything
+        stream = self.astream_rows if settings.ASGI_MODE else self.stream_rows
+        response = StreamingHttpResponse(
+            stream(rows, course.content_count, renderer),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="course-{course.id}-progress.{renderer.format}"'
+        return response
+
+    def stream_rows(self, rows, total_content, renderer):
+        yield renderer.render_header(EXPORT_FIELDS)
+        lines = []
+        for enrollment in rows.iterator(chunk_size=self.chunk_size):
+            lines.append(renderer.render_row(build_export_row(enrollment, total_content), EXPORT_FIELDS))
+            if len(lines) >= self.write_batch_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    async def astream_rows(self, rows, total_content, renderer):
+        yield renderer.render_header(EXPORT_FIELDS)
+        lines = []
+        async for enrollment in rows.aiterator(chunk_size=self.chunk_size):
+            lines.append(renderer.render_row(build_export_row(enrollment, total_content), EXPORT_FIELDS))
+            if len(lines) >= self.write_batch_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
@@ -2,6 +2,11 @@
 ASGI config for lms_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Loading it turns on ASGI_MODE, which serves the read-heavy course endpoints
+with the async ORM so one worker can multiplex many requests that are waiting
+on the database:
+
+    gunicorn lms_backend.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +14,11 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_backend.settings')
+os.environ.setdefault('ASGI_MODE', 'True')
+
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
 
-application = get_asgi_application()
+# WhiteNoise's middleware is dropped in ASGI mode; serve collected static files here
+application = ASGIStaticFilesHandler(get_asgi_application())
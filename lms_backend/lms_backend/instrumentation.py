@@ -0,0 +1,179 @@
+"""Per-request query count and timing instrumentation"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger('lms.performance')
+
+# The QueryRecorder of the request being served, for SerializationTimingMixin
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+    """`execute_wrapper` hook collecting the SQL and duration of every query in a request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+        self.serialize_duration = 0.0
+        self.serialize_db_duration = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.queries.append((elapsed, sql))
+
+
+class SerializationTimingMixin:
+    """Serializer mixin adding its `to_representation` time to the request's `serialize` timing.
+
+    `many=True` serializers are timed per item. Nested serializers and
+    serializers built inside another's fields count towards the outermost one
+    only.
+    """
+
+    def to_representation(self, instance):
+        recorder = current_recorder.get()
+        if recorder is None or recorder.serializing:
+            return super().to_representation(instance)
+        recorder.serializing = True
+        start = time.perf_counter()
+        db_before = recorder.duration
+        try:
+            return super().to_representation(instance)
+        finally:
+            recorder.serializing = False
+            recorder.serialize_duration += time.perf_counter() - start
+            recorder.serialize_db_duration += recorder.duration - db_before
+
+
+def get_view_name(request):
+    """The resolved view's class (or function) name, e.g. `CourseListCreateView`"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    func = match.func
+    return getattr(func, 'view_class', func).__name__
+
+
+class PerformanceMiddleware:
+    """Record query count, DB, serialization, render and total time for each request.
+
+    The numbers are sent back as a `Server-Timing` header (`db`, `serialize`,
+    `render`, `app`, `total`), logged as one JSON line on the `lms.performance`
+    logger, and requests over PERF_QUERY_BUDGET queries or PERF_LATENCY_BUDGET_MS
+    are logged as warnings together with their slowest SQL. `serialize` is the
+    time spent in serializers using SerializationTimingMixin, including the
+    queries they trigger (also counted under `db`, so they are subtracted once
+    from `app`). Rendering covers the DRF renderer (JSON encoding). The body of
+    streaming responses is produced after the response leaves here and is not
+    included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = settings.PERF_QUERY_BUDGET
+        self.latency_budget = settings.PERF_LATENCY_BUDGET_MS / 1000
+        self.server_timing = settings.PERF_SERVER_TIMING
+        self.slow_query_limit = settings.PERF_SLOW_QUERY_LIMIT
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        request._render_duration = 0.0
+        start = time.perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            with self.recording(recorder):
+                response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        request._render_duration = 0.0
+        start = time.perf_counter()
+        # The async ORM runs queries on the connections of the request's
+        # sync_to_async thread, not the event loop's, so hook those
+        recording = await sync_to_async(self.recording)(recorder)
+        # sync_to_async copies the context, so views run in threads see it too
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+            await sync_to_async(recording.close)()
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, total):
+        timings = {
+            'view': get_view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'serialize_ms': round(recorder.serialize_duration * 1000, 2),
+            'render_ms': round(request._render_duration * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        request.performance = timings
+        registry.observe_request(timings)
+        if self.server_timing:
+            serialize = recorder.serialize_duration - recorder.serialize_db_duration
+            app = max(total - recorder.duration - serialize - request._render_duration, 0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings["db_ms"]};desc="{recorder.count} queries"',
+                f'serialize;dur={timings["serialize_ms"]}',
+                f'render;dur={timings["render_ms"]}',
+                f'app;dur={round(app * 1000, 2)}',
+                f'total;dur={timings["total_ms"]}',
+            ])
+
+        if recorder.count > self.query_budget or total > self.latency_budget:
+            slowest = sorted(recorder.queries, key=lambda query: query[0], reverse=True)[:self.slow_query_limit]
+            timings['slow_queries'] = [
+                {'ms': round(elapsed * 1000, 2), 'sql': sql} for elapsed, sql in slowest
+            ]
+            logger.warning(json.dumps(timings), extra={'performance': timings})
+        else:
+            logger.info(json.dumps(timings), extra={'performance': timings})
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        start = time.perf_counter()
+
+        def record_render(rendered):
+            request._render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(record_render)
+        return response
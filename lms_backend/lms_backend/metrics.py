@@ -0,0 +1,208 @@
+"""In-process Prometheus-style metrics with multi-process aggregation"""
+import atexit
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'lms_http_requests_total': ('counter', 'HTTP requests by view, method and status', None),
+    'lms_http_request_duration_seconds': ('histogram', 'Request latency by view', LATENCY_BUCKETS),
+    'lms_db_queries_per_request': ('histogram', 'Database queries per request by view', QUERY_BUCKETS),
+    'lms_db_duration_seconds': ('histogram', 'Database time per request by view', LATENCY_BUCKETS),
+    'lms_cache_hits_total': ('counter', 'Application cache hits', None),
+    'lms_cache_misses_total': ('counter', 'Application cache misses', None),
+    'lms_enrollments_total': ('counter', 'Enrollments created', None),
+    'lms_progress_writes_total': ('counter', 'Learning progress rows written, by source', None),
+    'lms_heartbeats_received_total': ('counter', 'Video heartbeats received', None),
+}
+
+
+def label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in items) + '}'
+
+
+class MetricsRegistry:
+    """Counters and histograms kept in process memory.
+
+    With a `directory`, each process writes its snapshot to
+    `<directory>/metrics-<pid>.json` at most every `write_interval` seconds
+    (and at exit); the exposition merges every snapshot in the directory with
+    this process's live values, so any worker can answer a scrape for all of
+    them. Snapshots of exited workers are kept so counters don't go backwards;
+    clear the directory before (re)starting the server.
+    """
+
+    def __init__(self, directory=None, write_interval=5):
+        self.directory = directory
+        self.write_interval = write_interval
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._last_write = time.monotonic()
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._maybe_write()
+
+    def observe(self, name, value, labels=None):
+        buckets = METRICS[name][2]
+        key = (name, label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+            histogram['buckets'][bisect_left(buckets, value)] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self._maybe_write()
+
+    def register_collector(self, collector):
+        """Add a callable returning `[(counter name, labels, value), ...]` read at snapshot time"""
+        self._collectors.append(collector)
+
+    def observe_request(self, timings):
+        """Record the per-request numbers produced by PerformanceMiddleware"""
+        labels = {'view': timings['view']}
+        self.inc('lms_http_requests_total', dict(labels, method=timings['method'], status=timings['status']))
+        self.observe('lms_http_request_duration_seconds', timings['total_ms'] / 1000, labels)
+        self.observe('lms_db_queries_per_request', timings['queries'], labels)
+        self.observe('lms_db_duration_seconds', timings['db_ms'] / 1000, labels)
+
+    def snapshot(self):
+        with self._lock:
+            counters = [[name, dict(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, dict(labels), list(data['buckets']), data['sum'], data['count']]
+                for (name, labels), data in self._histograms.items()
+            ]
+        for collector in self._collectors:
+            counters.extend([name, labels, value] for name, labels, value in collector())
+        return {'counters': counters, 'histograms': histograms}
+
+    def _path(self):
+        return os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+
+    def _maybe_write(self):
+        if self.directory and time.monotonic() - self._last_write >= self.write_interval:
+            try:
+                self.write()
+            except OSError:
+                logger.exception('Failed to write metrics snapshot')
+
+    def write(self):
+        """Write this process's snapshot atomically"""
+        if not self.directory:
+            return
+        self._last_write = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(temporary, path)
+
+    def _snapshots(self):
+        yield self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        own = os.path.basename(self._path())
+        for filename in os.listdir(self.directory):
+            if filename == own or not filename.startswith('metrics-') or not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as handle:
+                    yield json.load(handle)
+            except (OSError, ValueError):
+                # Being replaced by its worker right now; the next scrape will read it
+                continue
+
+    def collect(self):
+        """Merge the snapshots of all processes into {name: {labels: value or histogram}}"""
+        merged = {}
+        for snapshot in self._snapshots():
+            for name, labels, value in snapshot['counters']:
+                series = merged.setdefault(name, {})
+                key = label_key(labels)
+                series[key] = series.get(key, 0) + value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                series = merged.setdefault(name, {})
+                key = label_key(labels)
+                current = series.get(key)
+                if current is None or len(current['buckets']) != len(buckets):
+                    series[key] = {'buckets': list(buckets), 'sum': total, 'count': count}
+                else:
+                    current['buckets'] = [a + b for a, b in zip(current['buckets'], buckets)]
+                    current['sum'] += total
+                    current['count'] += count
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for name, series in sorted(self.collect().items()):
+            kind, help_text, buckets = METRICS.get(name, ('untyped', '', None))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(series.items(), key=lambda item: str(item[0])):
+                if kind != 'histogram':
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip([*buckets, '+Inf'], value['buckets']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{format_labels(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    directory=settings.METRICS_DIR,
+    write_interval=settings.METRICS_WRITE_INTERVAL,
+)
+
+
+@atexit.register
+def write_on_exit():
+    try:
+        registry.write()
+    except Exception:
+        logger.exception('Failed to write metrics snapshot at exit')
+
+
+def metrics_view(request):
+    """Expose the aggregated metrics to `Authorization: Bearer <METRICS_TOKEN>`; 404 while no token is set"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404()
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lms_backend.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -61,6 +62,45 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'lms_backend.urls'
 
+# ASGI deployment (set by asgi.py): the read-heavy course endpoints run on the
+# async ORM so one worker multiplexes many requests waiting on the database
+ASGI_MODE = config('ASGI_MODE', default=False, cast=bool)
+if ASGI_MODE:
+    # WhiteNoise's middleware is sync-only and would pin a thread to every request;
+    # asgi.py serves static files instead
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
+# Request instrumentation: Server-Timing header and budgets above which a
+# request is logged as slow with its slowest queries
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+PERF_QUERY_BUDGET = config('PERF_QUERY_BUDGET', default=30, cast=int)
+PERF_LATENCY_BUDGET_MS = config('PERF_LATENCY_BUDGET_MS', default=500, cast=int)
+PERF_SLOW_QUERY_LIMIT = config('PERF_SLOW_QUERY_LIMIT', default=10, cast=int)
+
+# /metrics: with METRICS_DIR set, every worker writes its counters there and a
+# scrape of any worker reports all of them (empty the directory on deploy).
+# The endpoint answers 404 until METRICS_TOKEN is set and then requires it as a Bearer token
+METRICS_DIR = config('METRICS_DIR', default=None)
+METRICS_WRITE_INTERVAL = config('METRICS_WRITE_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# The per-request timing line is logged at INFO and slow requests at WARNING;
+# PERF_LOG_LEVEL=INFO turns on a line for every request
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'lms.performance': {
+            'handlers': ['console'],
+            'level': config('PERF_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=True, cast=bool)
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
@@ -84,9 +124,16 @@ TEMPLATES = [
 WSGI_APPLICATION = 'lms_backend.wsgi.application'
 AUTH_USER_MODEL = 'accounts.User'
 
+# Build request.user from the JWT claims (no per-request user query); set
+# JWT_TOKEN_USER=False to load the full user row on every request instead
+JWT_TOKEN_USER = config('JWT_TOKEN_USER', default=True, cast=bool)
+# Seconds a user's role/active state is trusted before it is re-read
+AUTH_USER_STATE_TTL = config('AUTH_USER_STATE_TTL', default=60, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.TokenUserAuthentication' if JWT_TOKEN_USER
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -111,7 +158,9 @@ if DATABASE_URL:
     # Django 5.2 automatically uses psycopg (v3) if available, falls back to psycopg2
     db_config = dj_database_url.config(
         default=DATABASE_URL,
-        conn_max_age=600,
+        # ASGI requests each run their ORM calls on a fresh thread, so persistent
+        # connections would be left behind by threads that never come back
+        conn_max_age=0 if ASGI_MODE else 600,
         conn_health_checks=True,
     )
     # Ensure we're using postgresql backend (works with both psycopg and psycopg2)
@@ -131,6 +180,21 @@ else:
                 'PORT': config('DB_PORT', default='5432'),
             }
         }
+    elif DB_ENGINE == 'sqlite':
+        # Local benchmarking without a database server (see `manage.py seed_lms`)
+        DATABASES = {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+                'OPTIONS': {
+                    # WAL lets readers run alongside the single writer; writers queue
+                    # for up to `timeout` seconds instead of failing with "database is locked"
+                    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                    'transaction_mode': 'IMMEDIATE',
+                    'timeout': config('DB_TIMEOUT', default=20, cast=int),
+                },
+            }
+        }
     else:
         DATABASES = {
             'default': {
@@ -144,6 +208,47 @@ else:
         }
 
 
+# Cache
+# Defaults to process-local memory; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='lms-cache'),
+    }
+}
+if 'redis' not in CACHE_BACKEND:
+    # Local memory and file caches cull entries beyond this bound; Redis uses its maxmemory policy
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+
+# Seconds the category sidebar is kept in the shared cache and in each worker's memory.
+# A per-process default cache isn't shared, so there both layers expire together
+CATEGORY_CACHE_LOCAL_TTL = config('CATEGORY_CACHE_LOCAL_TTL', default=5, cast=int)
+CATEGORY_CACHE_TTL = config(
+    'CATEGORY_CACHE_TTL', default=300 if 'locmem' not in CACHE_BACKEND else CATEGORY_CACHE_LOCAL_TTL, cast=int
+)
+
+# Versioned course cache: Django cache alias, TTL in seconds and per-worker LRU size
+COURSE_CACHE_ALIAS = config('COURSE_CACHE_ALIAS', default='default')
+# A per-process backend never sees another worker's invalidations, so there entries
+# and version keys are only trusted for a few seconds (0 keeps versions until bumped)
+COURSE_CACHE_SHARED = 'locmem' not in CACHES.get(COURSE_CACHE_ALIAS, CACHES['default'])['BACKEND']
+COURSE_CACHE_TTL = config('COURSE_CACHE_TTL', default=3600 if COURSE_CACHE_SHARED else 5, cast=int)
+COURSE_CACHE_VERSION_TTL = config('COURSE_CACHE_VERSION_TTL', default=0 if COURSE_CACHE_SHARED else 5, cast=int)
+COURSE_CACHE_LOCAL_MAX_ENTRIES = config('COURSE_CACHE_LOCAL_MAX_ENTRIES', default=1000, cast=int)
+
+
+# Video heartbeats: flush buffered watch time every N seconds (0 disables the timer)
+# or once this many (student, content) pairs are pending
+HEARTBEAT_FLUSH_INTERVAL = config('HEARTBEAT_FLUSH_INTERVAL', default=10, cast=float)
+HEARTBEAT_FLUSH_SIZE = config('HEARTBEAT_FLUSH_SIZE', default=1000, cast=int)
+# Fraction of a video that must be watched before it is marked completed
+VIDEO_COMPLETION_THRESHOLD = config('VIDEO_COMPLETION_THRESHOLD', default=0.9, cast=float)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
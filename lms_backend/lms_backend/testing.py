@@ -0,0 +1,129 @@
+"""Helpers for the query-count and latency tests"""
+import logging
+import re
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Literals are replaced so the same statement with other ids/values compares equal
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r'IN \((?:\?, )*\?\)')
+LONG_IN_LIST_RE = re.compile(r'IN \(([^(),]+, ){10,}[^(),]+\)')
+LONG_VALUES_RE = re.compile(r'VALUES (\([^()]*\), ){3,}\([^()]*\)')
+
+
+async def read_async_stream(response):
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+def normalize_sql(sql):
+    return IN_LIST_RE.sub('IN (...)', LITERAL_RE.sub('?', sql))
+
+
+def shorten_sql(sql):
+    """Elide long IN and VALUES lists so failure messages stay readable"""
+    sql = LONG_IN_LIST_RE.sub(lambda match: f'IN (... {match.group(0).count(",") + 1} values)', sql)
+    return LONG_VALUES_RE.sub(lambda match: f'VALUES (...) x {match.group(0).count("), (") + 1}', sql)
+
+
+def added_queries(baseline, queries):
+    """SQL in `queries` beyond the statements already in `baseline`, in execution order"""
+    extra = Counter(map(normalize_sql, queries)) - Counter(map(normalize_sql, baseline))
+    added = []
+    for sql in queries:
+        shape = normalize_sql(sql)
+        if extra[shape]:
+            extra[shape] -= 1
+            added.append(sql)
+    return added
+
+
+class QueryScalingMixin:
+    """Run a request against fixtures of growing size and assert it scales.
+
+    Test cases implement `seed(size)`, growing the fixtures to `size` rows of
+    whatever the endpoints under test list or aggregate. `assertScales()`
+    seeds each of `sizes` in turn, sends the request with cold caches and
+    fails when the query count at a larger size differs from the smallest,
+    printing the SQL that was added, or when the time spent outside the
+    database (view code, serializers and rendering) at the largest size
+    exceeds `time_budget_ms`.
+    """
+
+    sizes = (10, 100, 1000)
+    # Generous on purpose: the tests guard against regressions in complexity, not milliseconds
+    time_budget_ms = settings.PERF_LATENCY_BUDGET_MS
+
+    def seed(self, size):
+        raise NotImplementedError
+
+    def clear_caches(self):
+        from courses.cache import category_cache, course_cache
+        from courses.heartbeats import heartbeat_buffer
+
+        cache.clear()
+        course_cache.clear()
+        category_cache.invalidate('published')
+        heartbeat_buffer._authorized.clear()
+
+    def measure(self, request):
+        """Send `request()` and return (response, [sql], Server-Timing numbers)"""
+        self.clear_caches()
+        # Budgets are asserted by the test; the middleware's slow-request warnings would repeat them
+        logger = logging.getLogger('lms.performance')
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                response = request()
+                if response.streaming:
+                    # Streamed bodies run their queries while being consumed; keep the body readable
+                    body = async_to_sync(read_async_stream)(response) if response.is_async else response.getvalue()
+                    response.streaming_content = [body]
+        finally:
+            logger.setLevel(level)
+        return response, [query['sql'] for query in captured], response.wsgi_request.performance
+
+    def assertScales(self, request, status_code=200, time_budget_ms=None):
+        """Assert `request()` runs the same queries at every size; returns the last response.
+
+        `time_budget_ms` overrides the class budget; 0 checks the query count only.
+        """
+        runs = []
+        for size in self.sizes:
+            self.seed(size)
+            response, queries, timings = self.measure(request)
+            self.assertEqual(
+                response.status_code, status_code,
+                f'{timings["method"]} {timings["path"]} at {size} rows: {getattr(response, "data", None)}'
+            )
+            runs.append((size, queries, timings))
+
+        base_size, baseline, _ = runs[0]
+        for size, queries, timings in runs[1:]:
+            if len(queries) != len(baseline):
+                message = [
+                    f'{timings["method"]} {timings["path"]} ran {len(baseline)} queries at {base_size} rows '
+                    f'and {len(queries)} at {size} rows'
+                ]
+                for label, extra in (('Added', added_queries(baseline, queries)),
+                                     ('Missing', added_queries(queries, baseline))):
+                    if extra:
+                        message.append(f'{label} SQL:')
+                        message.extend(f'  {shorten_sql(sql)}' for sql in extra)
+                self.fail('\n'.join(message))
+
+        size, _, timings = runs[-1]
+        budget = self.time_budget_ms if time_budget_ms is None else time_budget_ms
+        spent = timings['total_ms'] - timings['db_ms']
+        if budget:
+            self.assertLessEqual(
+                spent, budget,
+                f'{timings["method"]} {timings["path"]} spent {spent:.0f} ms outside the database at {size} rows '
+                f'(budget {budget} ms; serialize {timings["serialize_ms"]} ms, render {timings["render_ms"]} ms, {timings["queries"]} queries)'
+            )
+        return response
@@ -0,0 +1,141 @@
+import json
+import os
+import re
+import tempfile
+import time
+from unittest import mock
+
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from courses.cache import category_cache
+from courses.models import Category, Course
+from courses.serializers import CategorySerializer
+from .metrics import MetricsRegistry
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def observe(self, registry, view, seconds):
+        registry.observe_request({
+            'view': view, 'method': 'GET', 'status': 200,
+            'total_ms': seconds * 1000, 'db_ms': seconds * 500, 'queries': 3,
+        })
+
+    def test_exposition(self):
+        registry = MetricsRegistry()
+        self.observe(registry, 'CourseListCreateView', 0.02)
+        self.observe(registry, 'CourseListCreateView', 0.3)
+        registry.inc('lms_enrollments_total', value=2)
+        registry.inc('lms_cache_hits_total', {'cache': 'a "quoted"\nname'})
+        lines = registry.render().splitlines()
+
+        self.assertIn('# TYPE lms_http_request_duration_seconds histogram', lines)
+        self.assertIn('lms_http_requests_total{method="GET",status="200",view="CourseListCreateView"} 2', lines)
+        # Buckets are cumulative and end with +Inf
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="0.01"} 0', lines)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="0.025"} 1', lines)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="0.5"} 2', lines)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="+Inf"} 2', lines)
+        self.assertIn('lms_http_request_duration_seconds_count{view="CourseListCreateView"} 2', lines)
+        self.assertIn('lms_enrollments_total 2', lines)
+        self.assertIn('lms_cache_hits_total{cache="a \\"quoted\\"\\nname"} 1', lines)
+
+    def test_collectors_are_read_at_scrape_time(self):
+        registry = MetricsRegistry()
+        received = [0]
+        registry.register_collector(lambda: [('lms_heartbeats_received_total', {}, received[0])])
+        received[0] = 7
+        self.assertIn('lms_heartbeats_received_total 7', registry.render().splitlines())
+
+    def test_snapshots_of_other_processes_are_merged(self):
+        worker = MetricsRegistry()
+        self.observe(worker, 'CourseListCreateView', 0.02)
+        worker.inc('lms_enrollments_total', value=3)
+        with open(os.path.join(self.directory, 'metrics-1.json'), 'w') as handle:
+            json.dump(worker.snapshot(), handle)
+        # Being replaced by its worker; skipped until the next scrape
+        with open(os.path.join(self.directory, 'metrics-2.json'), 'w') as handle:
+            handle.write('{"counters": [')
+
+        registry = MetricsRegistry(directory=self.directory)
+        self.observe(registry, 'CourseListCreateView', 2)
+        registry.inc('lms_enrollments_total')
+        # This process's own snapshot isn't counted on top of its live values
+        registry.write()
+        lines = registry.render().splitlines()
+
+        self.assertIn('lms_enrollments_total 4', lines)
+        self.assertIn('lms_http_requests_total{method="GET",status="200",view="CourseListCreateView"} 2', lines)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="0.025"} 1', lines)
+        self.assertIn('lms_http_request_duration_seconds_bucket{view="CourseListCreateView",le="+Inf"} 2', lines)
+        self.assertIn('lms_http_request_duration_seconds_sum{view="CourseListCreateView"} 2.02', lines)
+
+    def test_writes_are_throttled(self):
+        registry = MetricsRegistry(directory=self.directory, write_interval=3600)
+        registry.inc('lms_enrollments_total')
+        self.assertEqual(os.listdir(self.directory), [])
+        registry.write_interval = 0
+        registry.inc('lms_enrollments_total')
+        self.assertEqual(os.listdir(self.directory), [f'metrics-{os.getpid()}.json'])
+
+
+class MetricsViewTests(TestCase):
+    @override_settings(METRICS_TOKEN='')
+    def test_disabled_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+        self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer sécret'}).status_code, 401)
+
+        self.client.get('/api/categories/')
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('view="CategoryListCreateView"', body)
+        self.assertIn('lms_cache_hits_total{cache="course"}', body)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        category_cache.invalidate('published')
+        self.user = User.objects.create_user('lecturer', 'lecturer@example.com', 'password123', role='lecturer')
+        for name in ('Web', 'Data'):
+            category = Category.objects.create(name=name)
+            Course.objects.create(title=name, description='', price=10, lecturer=self.user, category=category,
+                                  is_published=True)
+        access = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {access}'}
+
+    def slow_count(self, obj):
+        time.sleep(0.03)
+        return obj.courses.count()
+
+    def server_timing(self, response):
+        return {name: float(duration) for name, duration in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])}
+
+    def test_serialization_is_reported_separately(self):
+        with mock.patch.object(CategorySerializer, 'get_courses_count', self.slow_count):
+            response = self.client.get('/api/categories/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        timing = self.server_timing(response)
+        self.assertGreaterEqual(timing['serialize'], 60)
+        self.assertGreaterEqual(response.wsgi_request.performance['serialize_ms'], 60)
+        self.assertLess(timing['app'], timing['serialize'])
+
+    async def test_serialization_is_timed_under_asgi(self):
+        with mock.patch.object(CategorySerializer, 'get_courses_count', self.slow_count):
+            response = await AsyncClient().get('/api/categories/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        timing = self.server_timing(response)
+        self.assertGreaterEqual(timing['serialize'], 60)
+        self.assertLess(timing['app'], timing['serialize'])
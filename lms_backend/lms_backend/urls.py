@@ -19,6 +19,7 @@ from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenRefreshView
 from accounts.views import CustomTokenObtainPairView
 from django.contrib import admin
+from .metrics import metrics_view
 
 def api_root(request):
     return JsonResponse({
@@ -34,6 +35,7 @@ def api_root(request):
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', api_root, name='api-root'),
+    path('metrics', metrics_view, name='metrics'),
     path("api/", include('accounts.urls')),
     path("api/", include('courses.urls')),
     path("api/login/", CustomTokenObtainPairView.as_view(), name='login'),